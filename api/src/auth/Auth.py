@@ -1,5 +1,6 @@
 from datetime import UTC, timedelta, datetime
 from functools import wraps
+import inspect
 from typing import Annotated, Callable, List
 import uuid
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
@@ -10,6 +11,7 @@ import os
 
 from sqlalchemy import select
 from src.models.UserModel import User
+from src.auth.Principal import Principal, cache_principal, get_cached_principal
 from src.schemas.TokenSchema import TokenData
 from src.database import get_db
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -53,7 +55,7 @@ def check_current_user(token: Annotated[str,Depends(oauth_scheme)])-> dict:
             raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
 
 
-        token_data = TokenData(id=payload.get("id"), role=payload.get("role"))
+        token_data = TokenData(id=payload.get("id"), role=payload.get("role"), organization_id=payload.get("organization_id"), token_version=payload.get("ver"))
 
         return token_data
 
@@ -62,29 +64,63 @@ def check_current_user(token: Annotated[str,Depends(oauth_scheme)])-> dict:
 
 
 
-async def get_current_user(payload: Annotated[TokenData, Depends(check_current_user)], db: Annotated[AsyncSession, Depends(get_db)])-> dict:
+async def load_principal(db: AsyncSession, user_id: uuid.UUID) -> Principal | None:
+    principal = get_cached_principal(user_id)
+    if principal is None:
+        result = await db.execute(select(User.id, User.email, User.role, User.organization_id, User.allow_notifications, User.token_version).where(User.id == user_id))
+        user = result.first()
+
+        if user is None:
+            return None
+
+        principal = cache_principal(Principal(**user._mapping))
+
+    return principal
+
+
+async def get_current_user(payload: Annotated[TokenData, Depends(check_current_user)], db: Annotated[AsyncSession, Depends(get_db)])-> Principal:
     try:
         if payload.id is None:
             raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
 
-        result = await db.execute(select(User).where(User.id == payload.id))
-        user = result.scalars().first()
+        user_id = uuid.UUID(payload.id)
 
-        if user is None:
+        principal = await load_principal(db, user_id)
+        if principal is None:
+            raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
+
+        #the role and organization claims are stale once the user's token version has been bumped
+        if payload.token_version is not None and payload.token_version != principal.token_version:
             raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
 
-        return user
+        return principal
         
 
     except Exception:
         raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
 
 
+def token_claims(user: User) -> dict:
+    return {"id": str(user.id), "role": user.role, "organization_id": str(user.organization_id) if user.organization_id else None, "ver": user.token_version}
+
+
+def check_token_roles(roles: List[str]):
+    def dependency(payload: Annotated[TokenData, Depends(check_current_user)]) -> TokenData:
+        #tokens issued before role claims existed fall through to the principal check
+        if payload.role is not None and payload.role not in roles:
+            raise HTTPException(status_code=403, detail="Forbidden")
+
+        return payload
+
+    return dependency
+
+
 def required_roles(roles: List[str]):
     def decorator(func):
         @wraps(func)
         async def wrapper(*args, **kwargs):
 
+            kwargs.pop("token_claims", None)
             current_user = kwargs.get("current_user")
 
 
@@ -93,6 +129,13 @@ def required_roles(roles: List[str]):
 
             return await func(*args, **kwargs)
 
+        #expose the role claim check as the first dependency of the route, so forbidden requests
+        #are rejected from the signed token before get_current_user is resolved
+        signature = inspect.signature(func)
+        claims_param = inspect.Parameter("token_claims", inspect.Parameter.KEYWORD_ONLY, annotation=Annotated[TokenData, Depends(check_token_roles(roles))])
+        params = [claims_param] + [p.replace(kind=inspect.Parameter.KEYWORD_ONLY) for p in signature.parameters.values()]
+        wrapper.__signature__ = signature.replace(parameters=params)
+
         return wrapper
 
     return decorator
@@ -0,0 +1,114 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+import bcrypt
+from dotenv import load_dotenv
+from fastapi import HTTPException
+
+load_dotenv()
+
+T = TypeVar("T")
+
+
+#cost factor of new hashes; stored hashes with a lower cost are rehashed on the next successful login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+#bcrypt releases the GIL while hashing, so threads run in parallel on separate cores
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+#calls allowed to wait for a free worker before new ones are turned away
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", 32))
+
+
+class PasswordHasher:
+    """Runs bcrypt in a dedicated, bounded thread pool so the event loop keeps serving other requests.
+
+    When every worker is busy and the queue is full, calls fail fast with a 503 instead of piling up.
+    """
+
+    def __init__(self, workers: int, max_queue: int, rounds: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.rounds = rounds
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self.in_flight = 0
+        self.in_flight_max = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self.wait_total = 0.0
+        self.run_total = 0.0
+
+    async def _run(self, fn: Callable[..., T], *args) -> T:
+        if self.in_flight >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail="Server busy, try again later", headers={"Retry-After": "1"})
+
+        loop = asyncio.get_running_loop()
+        self.in_flight += 1
+        self.in_flight_max = max(self.in_flight_max, self.in_flight)
+        queued_at = time.perf_counter()
+        started_at = queued_at
+
+        def timed():
+            nonlocal started_at
+            started_at = time.perf_counter()
+            return fn(*args)
+
+        def done(_):
+            #runs in the worker thread once bcrypt is finished with the call
+            finished_at = time.perf_counter()
+            try:
+                loop.call_soon_threadsafe(self._release, started_at - queued_at, finished_at - started_at)
+            except RuntimeError:
+                #the loop is already closed
+                pass
+
+        #released when the thread is done, not when the caller stops waiting: a cancelled request
+        #leaves bcrypt running and that work still counts against the queue limit
+        job = self._executor.submit(timed)
+        job.add_done_callback(done)
+        return await asyncio.wrap_future(job)
+
+    def _release(self, wait: float, run: float) -> None:
+        self.in_flight -= 1
+        self.completed += 1
+        self.wait_total += wait
+        self.run_total += run
+
+    async def hash(self, password: str) -> str:
+        hashed = await self._run(bcrypt.hashpw, password.encode("utf-8"), bcrypt.gensalt(self.rounds))
+        return hashed.decode("utf-8")
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run(bcrypt.checkpw, password.encode("utf-8"), hashed.encode("utf-8"))
+
+    async def rehash(self, password: str) -> str:
+        hashed = await self.hash(password)
+        self.rehashed += 1
+        return hashed
+
+    def needs_rehash(self, hashed: str) -> bool:
+        #bcrypt hashes look like $2b$<cost>$<salt and hash>; only weaker hashes are upgraded, never downgraded
+        try:
+            return int(hashed.split("$")[2]) < self.rounds
+        except (IndexError, ValueError):
+            return False
+
+    def status(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "rounds": self.rounds,
+            "in_flight": self.in_flight,
+            "queued": max(self.in_flight - self.workers, 0),
+            "in_flight_max": self.in_flight_max,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+            "wait_avg_ms": round(self.wait_total / self.completed * 1000, 3) if self.completed else 0.0,
+            "run_avg_ms": round(self.run_total / self.completed * 1000, 3) if self.completed else 0.0,
+        }
+
+
+password_hasher = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE, BCRYPT_ROUNDS)
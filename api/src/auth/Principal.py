@@ -0,0 +1,44 @@
+from dataclasses import dataclass
+from typing import Optional
+import uuid
+import os
+from cachetools import TTLCache
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """Slim, immutable view of the authenticated user used by the auth dependencies."""
+    id: uuid.UUID
+    email: str
+    role: str
+    organization_id: Optional[uuid.UUID]
+    allow_notifications: bool
+    token_version: int
+
+
+#in-process TTL/LRU cache of principals keyed by user id
+principal_cache: TTLCache = TTLCache(
+    maxsize=int(os.getenv("PRINCIPAL_CACHE_MAXSIZE", 10000)),
+    ttl=int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", 60)),
+)
+
+
+def get_cached_principal(user_id: uuid.UUID) -> Optional[Principal]:
+    return principal_cache.get(user_id)
+
+
+def cache_principal(principal: Principal) -> Principal:
+    principal_cache[principal.id] = principal
+    return principal
+
+
+def invalidate_principal(user_id: uuid.UUID) -> None:
+    #must be called by every write path that changes or removes a user
+    principal_cache.pop(user_id, None)
+
+
+def clear_principal_cache() -> None:
+    principal_cache.clear()
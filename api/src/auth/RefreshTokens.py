@@ -0,0 +1,161 @@
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import hashlib
+import logging
+import os
+import secrets
+from typing import Optional
+import uuid
+from cachetools import TTLCache
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.database import SessionLocal
+from src.models.RefreshTokenModel import RefreshToken
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 30))
+REFRESH_TOKEN_SWEEP_INTERVAL_SECONDS = int(os.getenv("REFRESH_TOKEN_SWEEP_INTERVAL_SECONDS", 60 * 60))
+
+#the sweeper runs outside of any request, so it opens its own sessions
+sweep_session_factory = SessionLocal
+
+#hashes of revoked tokens, so replays of a revoked session are turned away without a query;
+#entries outlive the tokens themselves, which expire in the database anyway
+revoked_refresh_tokens: TTLCache = TTLCache(
+    maxsize=int(os.getenv("REVOKED_REFRESH_TOKENS_MAXSIZE", 100000)),
+    ttl=REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class RotatedRefreshToken:
+    user_id: uuid.UUID
+    family_id: uuid.UUID
+
+
+def _invalid_refresh_token() -> HTTPException:
+    return HTTPException(status_code=401, detail="Invalid refresh token", headers={"WWW-Authenticate": "Bearer"})
+
+
+def hash_refresh_token(token: str) -> str:
+    #the token is 256 random bits, so a fast hash is enough to make a leaked table useless
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def issue_refresh_token(db: AsyncSession, user_id: uuid.UUID, family_id: Optional[uuid.UUID] = None) -> str:
+    #the row is added to the caller's session and saved with its commit
+    token = secrets.token_urlsafe(32)
+    db.add(RefreshToken(
+        user_id=user_id,
+        family_id=family_id or uuid.uuid4(),
+        token_hash=hash_refresh_token(token),
+        expires_at=datetime.now() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    ))
+    return token
+
+
+async def _revoke(db: AsyncSession, *criteria) -> int:
+    result = await db.execute(
+        update(RefreshToken)
+        .where(*criteria, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.now())
+        .returning(RefreshToken.token_hash)
+    )
+    token_hashes = result.scalars().all()
+    await db.commit()
+
+    for token_hash in token_hashes:
+        revoked_refresh_tokens[token_hash] = True
+    return len(token_hashes)
+
+
+async def rotate_refresh_token(db: AsyncSession, token: str) -> RotatedRefreshToken:
+    token_hash = hash_refresh_token(token)
+    if token_hash in revoked_refresh_tokens:
+        raise _invalid_refresh_token()
+
+    #a token can be exchanged once: the conditional update claims it even under concurrent requests
+    result = await db.execute(
+        update(RefreshToken)
+        .where(
+            RefreshToken.token_hash == token_hash,
+            RefreshToken.rotated_at.is_(None),
+            RefreshToken.revoked_at.is_(None),
+            RefreshToken.expires_at > datetime.now(),
+        )
+        .values(rotated_at=datetime.now())
+        .returning(RefreshToken.user_id, RefreshToken.family_id)
+    )
+    claimed = result.first()
+
+    if claimed is None:
+        #a token that was already rotated is being replayed, it may have been stolen, so the whole session goes
+        result = await db.execute(select(RefreshToken.family_id, RefreshToken.rotated_at).where(RefreshToken.token_hash == token_hash))
+        replayed = result.first()
+        if replayed is not None and replayed.rotated_at is not None:
+            await _revoke(db, RefreshToken.family_id == replayed.family_id)
+        raise _invalid_refresh_token()
+
+    return RotatedRefreshToken(user_id=claimed.user_id, family_id=claimed.family_id)
+
+
+async def revoke_user_refresh_tokens(db: AsyncSession, user_id: uuid.UUID) -> int:
+    return await _revoke(db, RefreshToken.user_id == user_id)
+
+
+async def sweep_expired_refresh_tokens(db: AsyncSession) -> int:
+    #an expired token can no longer be rotated, so its row only matters until then
+    result = await db.execute(delete(RefreshToken).where(RefreshToken.expires_at < datetime.now()))
+    await db.commit()
+    return result.rowcount
+
+
+def clear_revoked_refresh_tokens() -> None:
+    revoked_refresh_tokens.clear()
+
+
+class RefreshTokenSweeper:
+    #a single asyncio task deleting expired refresh tokens every REFRESH_TOKEN_SWEEP_INTERVAL_SECONDS
+
+    def __init__(self):
+        self._loop = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+
+        self._loop = loop
+        self._task = loop.create_task(self._run())
+
+    async def shutdown(self) -> None:
+        if self._loop is not asyncio.get_running_loop():
+            return
+
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._loop = None
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with sweep_session_factory() as db:
+                    swept = await sweep_expired_refresh_tokens(db)
+                if swept:
+                    logger.info("Deleted %s expired refresh tokens", swept)
+            except Exception:
+                logger.exception("Could not sweep expired refresh tokens")
+
+            await asyncio.sleep(REFRESH_TOKEN_SWEEP_INTERVAL_SECONDS)
+
+
+refresh_token_sweeper = RefreshTokenSweeper()
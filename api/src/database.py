@@ -1,14 +1,109 @@
 from typing import Generator
+import time
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from dotenv import load_dotenv
 import os
 
 load_dotenv()
 
 
-engine = create_async_engine(os.getenv("POSTGRES_URI"))
+class PoolMetrics:
+    """Counters fed by the instrumented pool, read by the /health/pool endpoint."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.connections_opened = 0
+
+    def record_wait(self, seconds: float):
+        self.checkouts += 1
+        self.wait_total += seconds
+        self.wait_max = max(self.wait_max, seconds)
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    #times how long each checkout waits for a free connection (or for a new one to be opened)
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.timeouts += 1
+            raise
+        pool_metrics.record_wait(time.perf_counter() - start)
+        return connection
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def create_engine_from_env(uri: str | None = None):
+    uri = uri or os.getenv("POSTGRES_URI")
+
+    connect_args = {}
+    if "asyncpg" in uri:
+        #asyncpg keeps its own statement cache per connection, plus the sqlalchemy adapter cache
+        statement_cache_size = _env_int("DB_STATEMENT_CACHE_SIZE", 100)
+        connect_args = {"statement_cache_size": statement_cache_size, "prepared_statement_cache_size": statement_cache_size}
+
+    db_engine = create_async_engine(
+        uri,
+        poolclass=InstrumentedAsyncPool,
+        pool_size=_env_int("DB_POOL_SIZE", 5),
+        max_overflow=_env_int("DB_MAX_OVERFLOW", 10),
+        pool_timeout=_env_int("DB_POOL_TIMEOUT", 30),
+        pool_recycle=_env_int("DB_POOL_RECYCLE", 1800),
+        pool_pre_ping=_env_bool("DB_POOL_PRE_PING", True),
+        connect_args=connect_args,
+    )
+
+    @event.listens_for(db_engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        pool_metrics.connections_opened += 1
+
+    return db_engine
+
+
+def get_pool_status(db_engine=None) -> dict:
+    pool = (db_engine or engine).pool
+    capacity = pool.size() + pool._max_overflow
+    in_use = pool.checkedout()
+
+    return {
+        "pool_size": pool.size(),
+        "max_overflow": pool._max_overflow,
+        "connections_in_use": in_use,
+        "connections_idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "saturation": round(in_use / capacity, 3) if capacity > 0 else None,
+        "checkouts": pool_metrics.checkouts,
+        "checkout_timeouts": pool_metrics.timeouts,
+        "checkout_wait_avg_ms": round(pool_metrics.wait_total / pool_metrics.checkouts * 1000, 3) if pool_metrics.checkouts else 0.0,
+        "checkout_wait_max_ms": round(pool_metrics.wait_max * 1000, 3),
+        "connections_opened": pool_metrics.connections_opened,
+    }
+
+
+engine = create_engine_from_env()
 
 SessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
@@ -24,7 +119,10 @@ async def get_db():
 
 
 async def init_models():
+    #imported here, the upgrades need the models and the models need Base from this module
+    from src.schema_upgrades import upgrade_database
+
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+        await upgrade_database(conn)
 
 
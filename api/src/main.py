@@ -3,12 +3,17 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from src.routes.health.HealthController import health_router
 from src.database import engine, init_models
+from src.shared.export_jobs import export_workers
+from src.shared.notifications import fcm_client
+from src.shared.notification_outbox import notification_dispatcher
+from src.auth.RefreshTokens import refresh_token_sweeper
 from src.routes.user.UserController import user_router
 from src.routes.surveyusers.SurveyUsersController import survey_users_router
 from src.routes.organization.OrganizationController import org_router
 from src.routes.category.CategoryController import category_router
 from src.routes.survey.SurveyController import survey_router
 from src.routes.answer.AnswerController import answer_router
+from src.routes.export.ExportController import export_router
 from src.routes.mailing.MailController import mail_router
 from src.routes.tag.TagController import tag_router
 from src.routes.userfcmtoken.UserFcmTokenController import user_fcm_token_router
@@ -20,7 +25,16 @@ from google.oauth2 import service_account
 @asynccontextmanager
 async def lifespan(app:FastAPI):
     await init_models()
+    #the workers' first sweep queues the jobs left unfinished by a restart
+    export_workers.start()
+    #notifications left in the outbox by a restart are sent right away
+    notification_dispatcher.wake()
+    refresh_token_sweeper.start()
     yield
+    await export_workers.shutdown()
+    await refresh_token_sweeper.shutdown()
+    await notification_dispatcher.shutdown()
+    await fcm_client.aclose()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -34,6 +48,7 @@ app.include_router(category_router)
 app.include_router(survey_router)
 app.include_router(survey_users_router)
 app.include_router(answer_router)
+app.include_router(export_router)
 app.include_router(mail_router)
 app.include_router(tag_router)
 app.include_router(user_fcm_token_router)
@@ -2,7 +2,7 @@ import datetime
 from typing import TYPE_CHECKING
 import uuid
 from src.database import Base
-from sqlalchemy import DateTime, ForeignKey, Integer, UUID, String, func
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Identity, Index, Integer, UUID, String, func, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 if TYPE_CHECKING:
@@ -11,6 +11,9 @@ if TYPE_CHECKING:
     from src.models.UserModel import User
 
 
+#id of the current transaction as a plain integer
+CURRENT_XACT_ID = text("pg_current_xact_id()::text::bigint")
+
 
 class Answer(Base):
     __tablename__ = "answers"
@@ -19,11 +22,23 @@ class Answer(Base):
     option_id: Mapped[uuid.UUID] = mapped_column(UUID, ForeignKey("options.id"), nullable=True)
     question_id: Mapped[uuid.UUID] = mapped_column(UUID, ForeignKey("questions.id"), nullable=False)
     text: Mapped[str] = mapped_column(String(250), nullable=True)
+    created_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=False, default=datetime.datetime.now, server_default=func.now())
+    #monotonic insertion order; a resubmitted answer is a new row with a higher sequence
+    sequence: Mapped[int] = mapped_column(BigInteger, Identity(), nullable=False)
+    #transaction that wrote the answer, the watermark of incremental exports (see get_export_watermark)
+    xact_id: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default=CURRENT_XACT_ID)
+
 
 
+    option: Mapped["Option"] = relationship(back_populates="answers", lazy="raise")
+    participant: Mapped["User"] = relationship(back_populates="answers", lazy="raise")
+    question: Mapped["Question"] = relationship(back_populates="answers", lazy="raise")
 
-    option: Mapped["Option"] = relationship(back_populates="answers", lazy="selectin")
-    participant: Mapped["User"] = relationship(back_populates="answers", lazy="selectin")
-    question: Mapped["Question"] = relationship(back_populates="answers", lazy="selectin")
+    __table_args__ = (
+        Index("ix_answers_xact", "xact_id"),
+        #replacing a respondent's answers deletes by (user_id, question_id); exports and stats read by question
+        Index("ix_answers_user_question", "user_id", "question_id"),
+        Index("ix_answers_question", "question_id"),
+    )
 
 
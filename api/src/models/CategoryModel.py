@@ -18,6 +18,6 @@ class Category(Base):
     id: Mapped[uuid.UUID] = mapped_column(UUID, primary_key=True, index=True, default=uuid.uuid4)   
     name: Mapped[str] = mapped_column(String(100), nullable=False)
 
-    surveys: Mapped[Optional[List["Survey"]]] = relationship(back_populates="category", cascade="all, delete", lazy="selectin")
+    surveys: Mapped[Optional[List["Survey"]]] = relationship(back_populates="category", cascade="all, delete", lazy="raise")
 
     
\ No newline at end of file
@@ -0,0 +1,36 @@
+from datetime import datetime
+from typing import Optional
+import uuid
+from src.database import Base
+from sqlalchemy import BigInteger, CheckConstraint, DateTime, ForeignKey, Index, Integer, String, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+class ExportJob(Base):
+    __tablename__ = "export_jobs"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID, primary_key=True, default=uuid.uuid4)
+    survey_id: Mapped[uuid.UUID] = mapped_column(UUID, ForeignKey("surveys.id", ondelete="CASCADE"), nullable=False)
+    requested_by: Mapped[Optional[uuid.UUID]] = mapped_column(UUID, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    format: Mapped[str] = mapped_column(String(20), nullable=False)
+    multiple_choice: Mapped[str] = mapped_column(String(20), nullable=False, default="joined", server_default="joined")
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="pending")
+    #identifies the answers and questions the artifact was built from, see answers_fingerprint
+    answer_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    answers_sequence: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    questions_hash: Mapped[Optional[str]] = mapped_column(String(32), nullable=True)
+    path: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
+    size: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(String(250), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.now)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    #renewed by the worker running the job; once it lapses any process may run the job again
+    lease_expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    #new for every claim, so a worker whose lease was taken over cannot renew or finish the job
+    lease_token: Mapped[Optional[uuid.UUID]] = mapped_column(UUID, nullable=True)
+
+    __table_args__ = (
+        CheckConstraint("status IN ('pending', 'running', 'completed', 'failed')", name="export_job_status_check"),
+        #reuse lookup: latest job of a survey for a format
+        Index("ix_export_jobs_survey_format", "survey_id", "format", "created_at"),
+    )
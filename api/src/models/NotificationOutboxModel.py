@@ -0,0 +1,27 @@
+from datetime import datetime
+from typing import Optional
+import uuid
+from src.database import Base
+from sqlalchemy import JSON, CheckConstraint, DateTime, Index, Integer, String, UUID, func, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+class NotificationOutbox(Base):
+    __tablename__ = "notification_outbox"
+
+    #rows are queued with INSERT ... SELECT from the device tokens, so every default is a server default
+    id: Mapped[uuid.UUID] = mapped_column(UUID, primary_key=True, server_default=func.gen_random_uuid())
+    token: Mapped[str] = mapped_column(String(255), nullable=False)
+    #FCM message without its token: notification and data
+    message: Mapped[dict] = mapped_column(JSON, nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, server_default="pending")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
+    last_error: Mapped[Optional[str]] = mapped_column(String(250), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        #sent notifications are deleted, dead ones are kept for inspection
+        CheckConstraint("status IN ('pending', 'dead')", name="notification_outbox_status_check"),
+        Index("ix_notification_outbox_due", "next_attempt_at", postgresql_where=text("status = 'pending'")),
+    )
@@ -1,7 +1,7 @@
 from typing import List, TYPE_CHECKING
 import uuid
 from src.database import Base
-from sqlalchemy import Boolean, ForeignKey, Integer,  String, UUID
+from sqlalchemy import Boolean, ForeignKey, Index, Integer,  String, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 
@@ -25,7 +25,12 @@ class Option(Base):
 
 
 
-    question: Mapped["Question"] = relationship(back_populates="options", lazy="selectin")
-    answers: Mapped[List["Answer"]] = relationship(back_populates="option", cascade="all, delete", lazy="selectin")
+    question: Mapped["Question"] = relationship(back_populates="options", lazy="raise")
+    answers: Mapped[List["Answer"]] = relationship(back_populates="option", cascade="all, delete", lazy="raise")
+
+
+    __table_args__ = (
+        Index("ix_options_question", "question_id"),
+    )
 
 
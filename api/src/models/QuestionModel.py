@@ -2,7 +2,7 @@ from typing import List, TYPE_CHECKING
 import uuid
 from src.models.AnswerModel import Answer
 from src.database import Base
-from sqlalchemy import Boolean, CheckConstraint, Column, ForeignKey, Integer, String, Date, UUID
+from sqlalchemy import Boolean, CheckConstraint, Column, ForeignKey, Index, Integer, String, Date, UUID
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -26,14 +26,15 @@ class Question(Base):
 
 
 
-    survey: Mapped["Survey"] = relationship(back_populates="questions", lazy="selectin")
-    options: Mapped[List["Option"]] = relationship(back_populates="question", cascade="all, delete", lazy="selectin")
-    answers: Mapped[List["Answer"]] = relationship(back_populates="question", cascade="all, delete", lazy="selectin")
+    survey: Mapped["Survey"] = relationship(back_populates="questions", lazy="raise")
+    options: Mapped[List["Option"]] = relationship(back_populates="question", cascade="all, delete", lazy="raise")
+    answers: Mapped[List["Answer"]] = relationship(back_populates="question", cascade="all, delete", lazy="raise")
 
 
     __table_args__ = (
         CheckConstraint("type IN ('single_choice', 'multiple_choice', 'likert_scale', 'open')", name="type_check"),
         CheckConstraint("number > 0", name="number_check"),
+        Index("ix_questions_survey", "survey_id", "number"),
     )
 
 
@@ -0,0 +1,21 @@
+from datetime import datetime
+from typing import Optional
+import uuid
+from src.database import Base
+from sqlalchemy import DateTime, ForeignKey, String, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID, primary_key=True, default=uuid.uuid4)
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    #every token rotated out of the same login shares its family, so a replayed token revokes the whole session
+    family_id: Mapped[uuid.UUID] = mapped_column(UUID, nullable=False, index=True)
+    #sha256 of the token, the token itself is only ever sent to the client
+    token_hash: Mapped[str] = mapped_column(String(64), nullable=False, unique=True)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    rotated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    revoked_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.now)
@@ -2,12 +2,13 @@ from typing import List, Optional, TYPE_CHECKING
 import uuid
 from src.models.TagModel import Tag
 from src.database import Base
-from sqlalchemy import CheckConstraint, Column, ForeignKey, Integer, String, Date, UniqueConstraint, func, UUID
+from sqlalchemy import CheckConstraint, Column, ForeignKey, Index, Integer, String, Date, UniqueConstraint, func, UUID
 from sqlalchemy.ext.hybrid import hybrid_property
 from datetime import date
 from sqlalchemy.orm import  Mapped, mapped_column, relationship
 from src.models.SurveyUserModel import survey_user
 from src.models.SurveyTagModel import survey_tag
+from src.models.SurveyRespondentModel import survey_respondent
 
 
 if TYPE_CHECKING:
@@ -29,20 +30,35 @@ class Survey(Base):
     owner_id: Mapped[uuid.UUID] = mapped_column(UUID, ForeignKey("users.id"), nullable=False)
     organization_id: Mapped[uuid.UUID] = mapped_column(UUID, ForeignKey("organizations.id"), nullable=True)
     category_id: Mapped[uuid.UUID] = mapped_column(UUID, ForeignKey("categories.id"), nullable=False)
+    #maintained by the answers triggers in SurveyRespondentModel
+    respondent_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    answer_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
 
  
 
-    assigned_users: Mapped[Optional[List["User"]]] = relationship(secondary=survey_user, back_populates="surveys_assigned",lazy="selectin")
-    owner: Mapped["User"] = relationship(back_populates="surveys_owned", lazy="selectin")
-    category: Mapped["Category"] = relationship(back_populates="surveys", lazy="selectin")
-    questions: Mapped[Optional[List["Question"]]] = relationship(back_populates="survey", cascade="all, delete", lazy="selectin")
-    organization: Mapped[Optional["Organization"]] = relationship(back_populates="surveys", lazy="selectin")
-    tags: Mapped[Optional[List["Tag"]]] = relationship(secondary=survey_tag, back_populates="surveys", lazy="selectin")
+    assigned_users: Mapped[Optional[List["User"]]] = relationship(secondary=survey_user, back_populates="surveys_assigned",lazy="raise")
+    owner: Mapped["User"] = relationship(back_populates="surveys_owned", lazy="raise")
+    category: Mapped["Category"] = relationship(back_populates="surveys", lazy="raise")
+    questions: Mapped[Optional[List["Question"]]] = relationship(back_populates="survey", cascade="all, delete", lazy="raise")
+    organization: Mapped[Optional["Organization"]] = relationship(back_populates="surveys", lazy="raise")
+    tags: Mapped[Optional[List["Tag"]]] = relationship(secondary=survey_tag, back_populates="surveys", lazy="raise")
 
 
     __table_args__ = (
         CheckConstraint("scope IN ('private', 'organization', 'public')", name="scope_check"),
         CheckConstraint("(scope = 'organization' AND 'organization_id' IS NOT NULL) OR (scope <> 'organization')", name="check_org_scope"),
         CheckConstraint("end_date >= start_date", name="end_date_check"),
+        #keyset ordering of survey listings, one index per listing filter and sort field (see src/shared/sorting.py)
+        Index("ix_surveys_owner_end_date", "owner_id", "end_date", "id"),
+        Index("ix_surveys_organization_end_date", "organization_id", "end_date", "id"),
+        Index("ix_surveys_scope_end_date", "scope", "end_date", "id"),
+        Index("ix_surveys_owner_start_date", "owner_id", "start_date", "id"),
+        Index("ix_surveys_organization_start_date", "organization_id", "start_date", "id"),
+        Index("ix_surveys_scope_start_date", "scope", "start_date", "id"),
+        Index("ix_surveys_owner_name", "owner_id", "name", "id"),
+        Index("ix_surveys_organization_name", "organization_id", "name", "id"),
+        Index("ix_surveys_scope_name", "scope", "name", "id"),
+        #highlighted surveys: most respondents first within a scope, read backwards
+        Index("ix_surveys_scope_activity", "scope", "respondent_count", "answer_count", "id"),
     )
 
@@ -0,0 +1,125 @@
+from src.database import Base
+from sqlalchemy import DDL, Column, ForeignKey, Index, Integer, Table, event, text
+from src.models.AnswerModel import Answer
+
+# Per-survey respondent bookkeeping behind Survey.respondent_count and Survey.answer_count.
+# The counters are kept by statement-level triggers on answers, so every writer (submissions,
+# COPY imports, cascading deletes) updates them in its own transaction.
+
+survey_respondent = Table(
+    "survey_respondents",
+    Base.metadata,
+    Column("survey_id", ForeignKey("surveys.id", ondelete="CASCADE"), primary_key=True),
+    Column("user_id", ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+    Column("answer_count", Integer, nullable=False, default=0),
+    #respondents left without answers only exist until the end of the delete trigger
+    Index("ix_survey_respondents_emptied", "survey_id", postgresql_where=text("answer_count <= 0")),
+)
+
+
+#the surveys row is updated first: its lock serializes submissions to the same survey,
+#so the respondent lookup that follows sees every committed respondent
+ANSWERS_INSERTED = DDL("""
+CREATE OR REPLACE FUNCTION answers_inserted_counters() RETURNS trigger AS $$
+BEGIN
+    UPDATE surveys s SET answer_count = s.answer_count + added.answers
+    FROM (
+        SELECT q.survey_id, count(*) AS answers
+        FROM inserted_answers a JOIN questions q ON q.id = a.question_id
+        GROUP BY q.survey_id
+    ) added
+    WHERE s.id = added.survey_id;
+
+    UPDATE surveys s SET respondent_count = s.respondent_count + added.respondents
+    FROM (
+        SELECT q.survey_id, count(DISTINCT a.user_id) AS respondents
+        FROM inserted_answers a JOIN questions q ON q.id = a.question_id
+        WHERE NOT EXISTS (
+            SELECT 1 FROM survey_respondents r WHERE r.survey_id = q.survey_id AND r.user_id = a.user_id
+        )
+        GROUP BY q.survey_id
+    ) added
+    WHERE s.id = added.survey_id;
+
+    INSERT INTO survey_respondents AS r (survey_id, user_id, answer_count)
+    SELECT q.survey_id, a.user_id, count(*)
+    FROM inserted_answers a JOIN questions q ON q.id = a.question_id
+    GROUP BY q.survey_id, a.user_id
+    ON CONFLICT (survey_id, user_id) DO UPDATE SET answer_count = r.answer_count + EXCLUDED.answer_count;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+""")
+
+ANSWERS_INSERTED_TRIGGER = DDL("""
+CREATE TRIGGER answers_inserted_counters
+AFTER INSERT ON answers REFERENCING NEW TABLE AS inserted_answers
+FOR EACH STATEMENT EXECUTE FUNCTION answers_inserted_counters()
+""")
+
+ANSWERS_DELETED = DDL("""
+CREATE OR REPLACE FUNCTION answers_deleted_counters() RETURNS trigger AS $$
+BEGIN
+    UPDATE surveys s SET answer_count = s.answer_count - removed.answers
+    FROM (
+        SELECT q.survey_id, count(*) AS answers
+        FROM deleted_answers a JOIN questions q ON q.id = a.question_id
+        GROUP BY q.survey_id
+    ) removed
+    WHERE s.id = removed.survey_id;
+
+    UPDATE survey_respondents r SET answer_count = r.answer_count - removed.answers
+    FROM (
+        SELECT q.survey_id, a.user_id, count(*) AS answers
+        FROM deleted_answers a JOIN questions q ON q.id = a.question_id
+        GROUP BY q.survey_id, a.user_id
+    ) removed
+    WHERE r.survey_id = removed.survey_id AND r.user_id = removed.user_id;
+
+    UPDATE surveys s SET respondent_count = s.respondent_count - emptied.respondents
+    FROM (
+        SELECT r.survey_id, count(*) AS respondents
+        FROM survey_respondents r
+        WHERE r.answer_count <= 0
+        GROUP BY r.survey_id
+    ) emptied
+    WHERE s.id = emptied.survey_id;
+
+    DELETE FROM survey_respondents WHERE answer_count <= 0;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+""")
+
+ANSWERS_DELETED_TRIGGER = DDL("""
+CREATE TRIGGER answers_deleted_counters
+AFTER DELETE ON answers REFERENCING OLD TABLE AS deleted_answers
+FOR EACH STATEMENT EXECUTE FUNCTION answers_deleted_counters()
+""")
+
+#rebuilds the bookkeeping from the answers themselves, for answers written before the triggers were installed;
+#callers must keep answer writers out meanwhile (see src/schema_upgrades.py)
+RECOUNT_SURVEY_RESPONDENTS = [
+    "DELETE FROM survey_respondents",
+    """
+    INSERT INTO survey_respondents (survey_id, user_id, answer_count)
+    SELECT q.survey_id, a.user_id, count(*)
+    FROM answers a JOIN questions q ON q.id = a.question_id
+    GROUP BY q.survey_id, a.user_id
+    """,
+    """
+    UPDATE surveys s SET respondent_count = counted.respondents, answer_count = counted.answers
+    FROM (
+        SELECT surveys.id AS survey_id, count(r.user_id) AS respondents, coalesce(sum(r.answer_count), 0) AS answers
+        FROM surveys LEFT JOIN survey_respondents r ON r.survey_id = surveys.id
+        GROUP BY surveys.id
+    ) counted
+    WHERE s.id = counted.survey_id AND (s.respondent_count, s.answer_count) IS DISTINCT FROM (counted.respondents, counted.answers)
+    """,
+]
+
+#the functions only resolve table names when they run, so they can be created together with answers
+for ddl in (ANSWERS_INSERTED, ANSWERS_INSERTED_TRIGGER, ANSWERS_DELETED, ANSWERS_DELETED_TRIGGER):
+    event.listen(Answer.__table__, "after_create", ddl.execute_if(dialect="postgresql"))
@@ -18,7 +18,7 @@ class Tag(Base):
     name: Mapped[str] = mapped_column(String(50), nullable=True, unique=True)
         
 
-    surveys: Mapped[Optional[List["Survey"]]]=relationship(secondary=survey_tag, back_populates="tags", lazy="selectin")
+    surveys: Mapped[Optional[List["Survey"]]]=relationship(secondary=survey_tag, back_populates="tags", lazy="raise")
 
 
     
@@ -28,7 +28,7 @@ class UserFcmToken(Base):
     updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.now, onupdate=datetime.now)
 
     
-    user: Mapped["User"] = relationship(back_populates="fcm_tokens", lazy="selectin")
+    user: Mapped["User"] = relationship(back_populates="fcm_tokens", lazy="raise")
 
     __table_args__ = (
         UniqueConstraint("fcm_token", "user_id", name="fcm_token_user_unique"),
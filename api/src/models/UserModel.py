@@ -2,7 +2,7 @@ from datetime import date
 import uuid
 from typing import List, Optional, TYPE_CHECKING
 from src.database import Base
-from sqlalchemy import Boolean, CheckConstraint, ForeignKey, Integer, String, Date, UUID
+from sqlalchemy import Boolean, CheckConstraint, ForeignKey, Index, Integer, String, Date, UUID
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from src.models.SurveyUserModel import survey_user
@@ -30,22 +30,27 @@ class User(Base):
     birthdate: Mapped[date] = mapped_column(Date, nullable=True)
     gender: Mapped[str] = mapped_column(String(50), nullable=True)
     allow_notifications: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
+    token_version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
 
 
     organization_id: Mapped[uuid.UUID] = mapped_column(UUID, ForeignKey("organizations.id"), nullable=True)
     
     
 
-    organization: Mapped["Organization"] = relationship(back_populates="users", lazy="selectin")
-    surveys_assigned: Mapped[Optional[List["Survey"]]]=relationship(secondary=survey_user, back_populates="assigned_users", lazy="selectin")
-    surveys_owned: Mapped[Optional[List["Survey"]]] = relationship(back_populates="owner", cascade="all, delete", lazy="selectin")
-    answers: Mapped[Optional[List["Answer"]]] = relationship(back_populates="participant", cascade="all, delete", lazy="selectin")
-    fcm_tokens: Mapped[Optional[List["UserFcmToken"]]] = relationship(back_populates="user", cascade="all, delete", lazy="selectin")
+    organization: Mapped["Organization"] = relationship(back_populates="users", lazy="raise")
+    surveys_assigned: Mapped[Optional[List["Survey"]]]=relationship(secondary=survey_user, back_populates="assigned_users", lazy="raise")
+    surveys_owned: Mapped[Optional[List["Survey"]]] = relationship(back_populates="owner", cascade="all, delete", lazy="raise")
+    answers: Mapped[Optional[List["Answer"]]] = relationship(back_populates="participant", cascade="all, delete", lazy="raise")
+    fcm_tokens: Mapped[Optional[List["UserFcmToken"]]] = relationship(back_populates="user", cascade="all, delete", lazy="raise")
 
     __table_args__ = (
         CheckConstraint("role IN ('researcher', 'participant', 'admin')", name="role_check"),
         CheckConstraint("gender IN ('male', 'female', 'other')", name="gender_check"),
         CheckConstraint("birthDate <=CURRENT_DATE", name="birthDate_check"),
+        #keyset ordering of organization members (see src/shared/sorting.py); the unique email index covers the full listing
+        Index("ix_users_organization_email", "organization_id", "email", "id"),
+        Index("ix_users_organization_role", "organization_id", "role", "id"),
+        Index("ix_users_role", "role", "id"),
     )
 
     @hybrid_property
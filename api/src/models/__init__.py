@@ -6,6 +6,9 @@ from src.models.QuestionModel import Base
 from src.models.OptionModel import Base
 from src.models.AnswerModel import Base
 from src.models.SurveyUserModel import Base
+from src.models.ExportJobModel import Base
+from src.models.NotificationOutboxModel import Base
+from src.models.RefreshTokenModel import Base
 
 
 
@@ -1,7 +1,6 @@
-import io
-from typing import Annotated
+from typing import Annotated, Optional
 import uuid
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
 from sqlalchemy import delete, or_, select, update, and_
 from src.schemas.UserSchema import UserRoleEnum
@@ -17,8 +16,14 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src.auth.Auth import get_current_user, required_roles
 from src.models.UserModel import User
 from src.models.SurveyUserModel import survey_user
+from src.shared.submissions import build_answer_rows, load_survey_questions, replace_user_answers
+from src.shared.answer_listing import get_survey_answers_page, get_user_answers, stream_survey_answers_ndjson
+from src.shared.pagination import PageParams, page_params
+from src.shared.exports import EXPORT_FORMATS, get_export_watermark, get_exportable_survey, load_export_questions
+from src.shared.response_cache import survey_stats_cache
+from src.shared.stats import compute_survey_stats
+from src.schemas.SurveyStatsSchema import SurveyStatsResponse
 from datetime import datetime
-import pandas as pd
 
 
 
@@ -49,73 +54,23 @@ async def register_survey_answers_from_user(survey_id: uuid.UUID, answer: Answer
 
     if existing_survey.scope == SurveyScopeEnum.organization:
         #check if user belongs to the organization
-        result = await db.execute(select(User).where(User.id == current_user.id, User.organization_id == existing_survey.organization_id))
-        user = result.unique().scalars().first()
-        if not user:
+        if current_user.organization_id != existing_survey.organization_id:
             raise HTTPException(status_code=400, detail="User not assigned to the organization")
     
     
 
-    for q in answer.questions:
-        #check if question belongs to survey
-        result = await db.execute(select(Question).where(Question.id == q.id, Question.survey_id == survey_id))
-        question = result.unique().scalars().first()
-        if not question:
-            raise HTTPException(status_code=400, detail="Question not found in this survey")
-        
-        #check if there are previous answers registered for this question
-        result = await db.execute(select(Answer).where(Answer.question_id == q.id, Answer.user_id == current_user.id))
-        answers = result.unique().scalars().all()
-        if answers:
-            await db.execute(delete(Answer).where(Answer.question_id == q.id, Answer.user_id == current_user.id))
-        
-        option_count = 0
-        if question.type == QuestionTypeEnum.open:
-            if not q.text:
-                raise HTTPException(status_code=400, detail=f"Question {question.description} has no answer")
-            
-        else:
-            if not q.options:
-                raise HTTPException(status_code=400, detail=f"Question {question.description} has no options")
-            
-            for o in q.options:
-                #check if option belong to question
-                result = await db.execute(select(Option).where(Option.id == o.id, Option.question_id == q.id))
-                option = result.unique().scalars().first()
-                if not option:
-                    raise HTTPException(status_code=400, detail="Option not found in this question")
-            option_count += 1    
-    
-            if option_count == 0:
-                raise HTTPException(status_code=400, detail="Question has no answers")
-        
-            if option_count > 1 and question.type != QuestionTypeEnum.multiple_choice:
-                raise HTTPException(status_code=400, detail="Question is not multiple answer")
+    #validate the whole submission against the survey's question/option map
+    questions = await load_survey_questions(db, survey_id)
+    rows = build_answer_rows(questions, answer, current_user.id)
 
         
 
-    #create answers in one transaction
+    #replace previous answers in one transaction
     try:
-        for question in answer.questions:
-
-
-            if question.type == QuestionTypeEnum.open:
-                new_answer = Answer(
-                    user_id=current_user.id,
-                    text=question.text,
-                    question_id=question.id,
-                )
-                db.add(new_answer)
-            else:
-                for option in question.options:
-                    new_answer = Answer(
-                        user_id=current_user.id,
-                        option_id=option.id,
-                        question_id=question.id,
-                    )
-                    db.add(new_answer)
+        await replace_user_answers(db, current_user.id, [q.id for q in answer.questions], rows)
             
         await db.commit()
+        survey_stats_cache.invalidate(survey_id)
 
         #set new updated_at for the survey
         #await db.execute(update(survey_user).where(and_(survey_user.c.survey_id == survey_id, survey_user.c.user_id == current_user.id)).values(updated_at=datetime.now()))
@@ -139,55 +94,15 @@ async def get_all_user_answers(user_id: uuid.UUID, current_user: Annotated[User,
         raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
     
     #check if user exists
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.unique().scalars().first()
-    if not user:
+    result = await db.execute(select(User.id).where(User.id == user_id))
+    if not result.first():
         raise HTTPException(status_code=404, detail="User not found")
     
     if current_user.id != user_id and current_user.role != UserRoleEnum.admin:
         raise HTTPException(status_code=403, detail="You are not allowed to access this user's answers")
     
-    #get all answers from user
-    result = await db.execute(
-        select(Answer, Option, Question, Survey)
-        .outerjoin(Option, Answer.option_id == Option.id)
-        .join(Question, Answer.question_id == Question.id)
-        .join(Survey, Question.survey_id == Survey.id)
-        .where(Answer.user_id == user_id)
-    )
-    answers = result.all()
-
-
-    explored_answers = {}
-    for answer, option, question, survey in answers:
-        if survey.id not in explored_answers:
-            explored_answers[survey.id] = {
-                "survey_id": survey.id,
-                "questions": []
-            }
-        question_found = False
-        for q in explored_answers[survey.id]["questions"]:
-            if q["id"] == str(question.id):
-                if question.type == QuestionTypeEnum.open:
-                    q["text"] = answer.text
-                else:
-                    q["options"].append({
-                        "id": str(option.id),
-                    })
-                question_found = True
-                break
-        if not question_found:
-            explored_answers[survey.id]["questions"].append({
-                "id": str(question.id),
-                "text": answer.text if question.type == QuestionTypeEnum.open else None,
-                "options": [{
-                    "id": str(option.id),
-                }] if question.type != QuestionTypeEnum.open else None
-            })
-    answers_list = list(explored_answers.values())
-    
     return {
-        "answers": answers_list,
+        "answers": await get_user_answers(db, user_id),
     }
         
 
@@ -195,106 +110,36 @@ async def get_all_user_answers(user_id: uuid.UUID, current_user: Annotated[User,
 async def get_survey_answers(
     survey_id: uuid.UUID,
     current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[AsyncSession, Depends(get_db)]
+    db: Annotated[AsyncSession, Depends(get_db)],
+    page: Annotated[PageParams, Depends(page_params)]
 ):
     if not current_user:
         raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
     
-    # Verificar que el usuario tiene acceso a la encuesta
-    result = await db.execute(select(Survey).where(Survey.id == survey_id))
-    survey = result.unique().scalars().first()
-    
-    if not survey:
-        raise HTTPException(status_code=404, detail="Survey not found")
-    
-    # Verificar permisos según el scope de la encuesta
-    if survey.scope == SurveyScopeEnum.private:
-        # Verificar si el usuario está asignado a la encuesta
-        result = await db.execute(
-            select(survey_user).where(
-                and_(
-                    survey_user.c.user_id == current_user.id,
-                    survey_user.c.survey_id == survey_id
-                )
-            )
-        )
-        assignment = result.unique().scalars().first()
+    await get_exportable_survey(db, survey_id, current_user)
 
-        if not assignment and survey.owner_id != current_user.id and current_user.role != UserRoleEnum.admin:
-            raise HTTPException(status_code=403, detail="Access denied: User not assigned to this survey")
+    #a page holds page.limit respondents with all their answers
+    answers, next_cursor = await get_survey_answers_page(db, survey_id, page)
 
-    elif survey.scope == SurveyScopeEnum.organization:
-        # Verificar si el usuario pertenece a la misma organización
-        if current_user.organization_id != survey.organization_id and current_user.role != UserRoleEnum.admin:
-            raise HTTPException(status_code=403, detail="Access denied: User not in the same organization")
+    return {
+        "answers": answers,
+        "next_cursor": next_cursor,
+    }
 
-    # Obtener todas las respuestas de la encuesta
-    result = await db.execute(
-        select(Answer, Option, Question, User)
-        .join(Question, Answer.question_id == Question.id)
-        .join(User, Answer.user_id == User.id)
-        .outerjoin(Option, Answer.option_id == Option.id)
-        .where(Question.survey_id == survey_id)
-    )
-    answers = result.all()
 
-    # Estructurar las respuestas
-    explored_answers = {}
-    for answer, option, question, user in answers:
-        if user.id not in explored_answers:
-            explored_answers[user.id] = {
-                "user_id": str(user.id),
-                "username": f"{user.name} {user.lastname or ''}",
-                "questions": []
-            }
-        
-        question_found = False
-        for q in explored_answers[user.id]["questions"]:
-            if q["id"] == str(question.id):
-                if question.type == "open":
-                    # Para preguntas abiertas, guardamos el texto directamente
-                    q["text"] = answer.text
-                else:
-                    # Para otros tipos de preguntas, guardamos las opciones
-                    if option:  # Verificamos que la opción existe
-                        if "options" not in q:
-                            q["options"] = []
-                        q["options"].append({
-                            "id": str(option.id),
-                            "description": option.description,
-                            "points": option.points
-                        })
-                question_found = True
-                break
-        
-        if not question_found:
-            new_question = {
-                "id": str(question.id),
-                "description": question.description,
-                "type": question.type,
-            }
-            
-            if question.type == "open":
-                # Para preguntas abiertas, incluimos el texto
-                new_question["text"] = answer.text
-            else:
-                # Para otros tipos, incluimos la lista de opciones
-                if option:  # Verificamos que la opción existe
-                    new_question["options"] = [{
-                        "id": str(option.id),
-                        "description": option.description,
-                        "points": option.points
-                    }]
-                else:
-                    new_question["options"] = []
-            
-            explored_answers[user.id]["questions"].append(new_question)
+@answer_router.get("/surveys/{survey_id}/answers/stream", status_code=200)
+async def stream_survey_answers(
+    survey_id: uuid.UUID,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)]
+):
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
 
-    answers_list = list(explored_answers.values())
-    
-    return {
-        "answers": answers_list,
-    }
+    await get_exportable_survey(db, survey_id, current_user)
+
+    #every respondent of the survey, one JSON object per line, with the same shape as the paginated listing
+    return StreamingResponse(content=stream_survey_answers_ndjson(db, survey_id), media_type="application/x-ndjson")
 
 @answer_router.get("/surveys/{survey_id}/answers/export/{format}", status_code=200)
 async def export_survey_answers(
@@ -302,96 +147,39 @@ async def export_survey_answers(
     format: AvailableFormatsEnum,
     filename: str,
     current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[AsyncSession, Depends(get_db)]
+    db: Annotated[AsyncSession, Depends(get_db)],
+    multiple_choice: MultipleChoiceLayoutEnum = MultipleChoiceLayoutEnum.joined,
+    since: Annotated[Optional[int], Query(ge=0)] = None
 ):
     if not current_user:
         raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
     
-    # Verificar que el usuario tiene acceso a la encuesta
-    result = await db.execute(select(Survey).where(Survey.id == survey_id))
-    survey = result.unique().scalars().first()
-    
-    if not survey:
-        raise HTTPException(status_code=404, detail="Survey not found")
-    
-    # Verificar permisos según el scope de la encuesta
-    if survey.scope == SurveyScopeEnum.private:
-        # Verificar si el usuario está asignado a la encuesta
-        result = await db.execute(
-            select(survey_user).where(
-                and_(
-                    survey_user.c.user_id == current_user.id,
-                    survey_user.c.survey_id == survey_id
-                )
-            )
-        )
-        assignment = result.unique().scalars().first()
-
-        if not assignment and survey.owner_id != current_user.id and current_user.role != UserRoleEnum.admin:
-            raise HTTPException(status_code=403, detail="Access denied: User not assigned to this survey")
-
-    elif survey.scope == SurveyScopeEnum.organization:
-        # Verificar si el usuario pertenece a la misma organización
-        if current_user.organization_id != survey.organization_id and current_user.role != UserRoleEnum.admin:
-            raise HTTPException(status_code=403, detail="Access denied: User not in the same organization")
-
-    # Obtener todas las respuestas de la encuesta
-    result = await db.execute(
-        select(Question.description.label("question"), User.email.label("user_email"), Option.description.label("option"), Answer.text.label("answer"))
-        .select_from(Survey)
-        .join(Question, Survey.id == Question.survey_id)
-        .join(Answer, Question.id == Answer.question_id)
-        .join(User, Answer.user_id == User.id)
-        .outerjoin(Option, Answer.option_id == Option.id)
-        .where(Survey.id == survey_id)
+    await get_exportable_survey(db, survey_id, current_user)
+    questions = await load_export_questions(db, survey_id)
+    export_format = EXPORT_FORMATS[format]
+
+    #the watermark is read before any row, the next export can ask for the respondents changed since then
+    watermark = await get_export_watermark(db)
+    window = (since, watermark) if since is not None else None
+
+    #one wide row per respondent is written as the answers are read from a server-side cursor
+    return StreamingResponse(
+        content=export_format.writer(db, survey_id, questions, multiple_choice, window),
+        media_type=export_format.media_type,
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}.{export_format.extension}",
+            "X-Export-Watermark": str(watermark),
+        }
     )
-    answers = result.all()
 
-    answers_list = []
-    questions_list = []
-
-    for question, user_email, option, answer in answers:
-        if question not in questions_list:
-            questions_list.append(question)
-        if option:
-            answers_list.append({
-                "question": question,
-                "user_email": user_email,
-                "answer": option,
-            })
-        else:
-            answers_list.append({
-                "question": question,
-                "user_email": user_email,
-                "answer": answer,
-            })
-        
-    # Convertir las respuestas a un DataFrame
-    df = pd.DataFrame(answers_list)
-    df = df.pivot(index='user_email', columns='question', values='answer')
-    df = df.reset_index().rename(columns={'user_email': 'user'})
 
-    if format == AvailableFormatsEnum.csv:
-
-        IO = io.StringIO()
-        df.to_csv(IO, index=False)
-
-        return StreamingResponse(
-            content=iter([IO.getvalue()]),
-            media_type="text/csv",
-            headers={"Content-Disposition": f"attachment; filename={filename}.csv"}
-        )
-    elif format == AvailableFormatsEnum.excel:
-
-        IO = io.BytesIO()
-        df.to_excel(IO, index=False)
-
-        return StreamingResponse(
-            content=iter([IO.getvalue()]),
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": f"attachment; filename={filename}.xlsx"}
-        )
+@answer_router.get("/surveys/{survey_id}/stats", status_code=200, response_model=SurveyStatsResponse)
+async def get_survey_stats(survey_id: uuid.UUID, current_user: Annotated[User, Depends(get_current_user)], db: Annotated[AsyncSession, Depends(get_db)]):
 
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
 
-    
+    #same access rules as the answers export
+    await get_exportable_survey(db, survey_id, current_user)
 
+    return await survey_stats_cache.get_or_compute(survey_id, lambda: compute_survey_stats(db, survey_id))
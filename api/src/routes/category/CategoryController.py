@@ -10,6 +10,8 @@ from typing import Annotated, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import OAuth2PasswordRequestForm
 from src.auth.Auth import create_access_token, check_current_user, get_current_user, oauth_scheme, required_roles
+from src.shared.pagination import PageParams, page_params, paginate, page_rows
+from src.shared.response_cache import categories_cache, invalidate_category_caches
 
 category_router = APIRouter(tags=["Category"])
 
@@ -30,22 +32,25 @@ async def create_category(category: CategoryCreate, current_user: Annotated[User
         db.add(new_category)
         await db.commit()
         await db.refresh(new_category)
+        invalidate_category_caches()
 
         return new_category
 
 
 @category_router.get("/categories", status_code=200, response_model=CategoryResponseList)
-async def get_all_categories(current_user: Annotated[User, Depends(get_current_user)], db: Annotated[AsyncSession, Depends(get_db)]):
+async def get_all_categories(current_user: Annotated[User, Depends(get_current_user)], db: Annotated[AsyncSession, Depends(get_db)], page: Annotated[PageParams, Depends(page_params)]):
 
         if not current_user:
             raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
         
 
-        result = await db.execute(select(Category))
+        async def load_page():
+            result = await db.execute(paginate(select(Category), Category.name, Category.id, page))
 
+            categories, next_cursor = page_rows(result.unique().scalars().all(), page, key=lambda c: (c.name, c.id))
+            return CategoryResponseList.model_validate({ "categories": categories, "next_cursor": next_cursor }, from_attributes=True)
 
-        categories = result.unique().scalars().all()
-        return { "categories": categories }
+        return await categories_cache.get_or_compute((page.cursor, page.limit), load_page)
     
 
 
@@ -91,6 +96,7 @@ async def update_category(id: uuid.UUID, category: CategoryUpdate, current_user:
 
         await db.execute(update(Category).where(Category.id == id).values(category.model_dump()))
         await db.commit()
+        invalidate_category_caches()
 
         return existing_category
 
@@ -109,6 +115,7 @@ async def delete_category(id: uuid.UUID, current_user: Annotated[User, Depends(g
 
         await db.delete(existing_category)
         await db.commit()
+        invalidate_category_caches()
     
         return None
 
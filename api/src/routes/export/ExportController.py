@@ -0,0 +1,82 @@
+from typing import Annotated, Optional
+import os
+import uuid
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import FileResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.auth.Auth import get_current_user
+from src.database import get_db
+from src.models.ExportJobModel import ExportJob
+from src.models.UserModel import User
+from src.schemas.AnswerSchema import AvailableFormatsEnum
+from src.schemas.ExportJobSchema import *
+from src.shared.export_jobs import request_export
+from src.shared.exports import EXPORT_FORMATS, get_exportable_survey
+
+
+export_router = APIRouter(tags=["Export"])
+
+
+async def get_survey_export_job(db: AsyncSession, survey_id: uuid.UUID, job_id: uuid.UUID) -> ExportJob:
+    result = await db.execute(select(ExportJob).where(ExportJob.id == job_id, ExportJob.survey_id == survey_id))
+    job = result.scalars().first()
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+
+    return job
+
+
+@export_router.post("/surveys/{survey_id}/answers/exports", status_code=202, response_model=ExportJobResponse)
+async def create_export_job(survey_id: uuid.UUID, export: ExportJobCreate, response: Response, current_user: Annotated[User, Depends(get_current_user)], db: Annotated[AsyncSession, Depends(get_db)]):
+
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
+
+    await get_exportable_survey(db, survey_id, current_user)
+
+    job = await request_export(db, survey_id, export.format, export.multiple_choice, current_user.id)
+
+    #an artifact built from the current answers can be downloaded right away
+    if job.status == ExportJobStatusEnum.completed:
+        response.status_code = 200
+
+    return job
+
+
+@export_router.get("/surveys/{survey_id}/answers/exports/{job_id}", status_code=200, response_model=ExportJobResponse)
+async def get_export_job(survey_id: uuid.UUID, job_id: uuid.UUID, current_user: Annotated[User, Depends(get_current_user)], db: Annotated[AsyncSession, Depends(get_db)]):
+
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
+
+    await get_exportable_survey(db, survey_id, current_user)
+
+    return await get_survey_export_job(db, survey_id, job_id)
+
+
+@export_router.get("/surveys/{survey_id}/answers/exports/{job_id}/download", status_code=200)
+async def download_export_job(survey_id: uuid.UUID, job_id: uuid.UUID, current_user: Annotated[User, Depends(get_current_user)], db: Annotated[AsyncSession, Depends(get_db)], filename: Optional[str] = None):
+
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
+
+    await get_exportable_survey(db, survey_id, current_user)
+
+    job = await get_survey_export_job(db, survey_id, job_id)
+
+    if job.status != ExportJobStatusEnum.completed:
+        raise HTTPException(status_code=409, detail=f"Export job is {job.status}")
+
+    if not os.path.exists(job.path):
+        raise HTTPException(status_code=410, detail="Export file is no longer available")
+
+    export_format = EXPORT_FORMATS[AvailableFormatsEnum(job.format)]
+
+    #FileResponse answers Range requests with 206 partial content, so interrupted downloads can resume
+    return FileResponse(
+        job.path,
+        media_type=export_format.media_type,
+        filename=f"{filename or job.id}.{export_format.extension}",
+    )
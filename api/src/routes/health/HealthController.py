@@ -1,8 +1,18 @@
 from fastapi import APIRouter
+from src.database import get_pool_status
+from src.auth.Passwords import password_hasher
 
 
 health_router = APIRouter()
 
 @health_router.get("/health", tags=["health"], status_code=200)
 async def health():
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+@health_router.get("/health/pool", tags=["health"], status_code=200)
+async def pool_health():
+    return get_pool_status()
+
+@health_router.get("/health/passwords", tags=["health"], status_code=200)
+async def password_hashing_health():
+    return password_hasher.status()
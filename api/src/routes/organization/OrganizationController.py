@@ -11,11 +11,22 @@ from src.database import get_db
 from typing import Annotated, List
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.auth.Auth import create_access_token, check_current_user, get_current_user, required_roles
+from src.shared.loaders import SURVEY_DETAIL
+from src.shared.pagination import PageParams, page_params, paginate, page_rows
+from src.shared.sorting import Sort, SURVEY_SORT, USER_SORT, sort_params
 
 
 
 org_router = APIRouter(tags=["Organization"])
 
+
+def select_organizations_with_counts():
+    #counts are correlated subqueries on the indexed organization_id columns, users and surveys are never loaded
+    users_count = select(func.count(User.id)).where(User.organization_id == Organization.id).correlate(Organization).scalar_subquery()
+    surveys_count = select(func.count(Survey.id)).where(Survey.organization_id == Organization.id).correlate(Organization).scalar_subquery()
+
+    return select(Organization.id, Organization.name, users_count.label("users_count"), surveys_count.label("surveys_count"))
+
 @org_router.post("/organizations", status_code=201, response_model=OrganizationResponse)
 @required_roles(["admin"])
 async def create_organization(org: OrganizationCreate, db: Annotated[AsyncSession, Depends(get_db)], current_user: Annotated[User, Depends(get_current_user)] = None):
@@ -45,11 +56,10 @@ async def get_all_organizations(db: Annotated[AsyncSession, Depends(get_db)], cu
         if not current_user:
             raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
         
-        result = await db.execute(select(Organization))
-        orgs = result.unique().scalars().all()
+        result = await db.execute(select_organizations_with_counts())
 
         
-        organizations = [OrganizationResponse(id=o.id, name=o.name, users_count=len(o.users), surveys_count=len(o.surveys)) for o in orgs]
+        organizations = [OrganizationResponse(**o._mapping) for o in result.all()]
 
 
         return { "organizations": organizations}
@@ -62,20 +72,21 @@ async def get_organization_by_id(id:uuid.UUID, db: Annotated[AsyncSession, Depen
         if not current_user:
             raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
         
-        result = await db.execute(select(Organization).where(Organization.id == id))
-        existing_org = result.unique().scalars().first()
+        result = await db.execute(select_organizations_with_counts().where(Organization.id == id))
+        existing_org = result.first()
 
         if not existing_org:
             raise HTTPException(status_code=404, detail="Organization not found") 
         
-        return OrganizationResponse(id=existing_org.id, name=existing_org.name, users_count=len(existing_org.users), surveys_count=len(existing_org.surveys))
+        return OrganizationResponse(**existing_org._mapping)
 
 
 @org_router.get("/organizations/{id}/users", status_code=200, response_model=UserResponseList)
 @required_roles(["researcher", "admin"])
 async def get_all_users_in_organization(id:uuid.UUID, db: Annotated[AsyncSession, Depends(get_db)], 
-                                        current_user: Annotated[User, Depends(get_current_user)] = None, 
-                                        sortBy: Optional[str] = 'email', order: Optional[str] = 'ASC'):
+                                        page: Annotated[PageParams, Depends(page_params)],
+                                        sort: Annotated[Sort, Depends(sort_params(USER_SORT))],
+                                        current_user: Annotated[User, Depends(get_current_user)] = None):
         
         if not current_user:
             raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
@@ -90,21 +101,17 @@ async def get_all_users_in_organization(id:uuid.UUID, db: Annotated[AsyncSession
             raise HTTPException(status_code=403, detail="You are not allowed to access this organization")
         
 
-        result = await db.execute(select(User).where(User.organization_id == id))
+        query = select(User).where(User.organization_id == id)
+        result = await db.execute(paginate(query, sort.column, User.id, page, descending=sort.descending))
 
-        users = result.unique().scalars().all()
+        users, next_cursor = page_rows(result.unique().scalars().all(), page, key=lambda u: (sort.key(u), u.id))
 
-        if sortBy == "email":
-            users.sort(key=lambda a: (a.email), reverse=order == 'DESC')
-        elif sortBy == "role":
-            users.sort(key=lambda a: (a.role), reverse=order == 'DESC')
-
-        return { "users": users}
+        return { "users": users, "next_cursor": next_cursor}
 
 @org_router.get("/organizations/{org_id}/surveys", status_code=200, response_model=SurveyResponseList)
 @required_roles(["admin", "researcher", "participant"])
 async def get_surveys_in_organization(current_user: Annotated[User, Depends(get_current_user)], db: Annotated[AsyncSession, Depends(get_db)], 
-                        org_id: uuid.UUID, category_id: Optional[uuid.UUID] = None):
+                        org_id: uuid.UUID, page: Annotated[PageParams, Depends(page_params)], sort: Annotated[Sort, Depends(sort_params(SURVEY_SORT))], category_id: Optional[uuid.UUID] = None):
     
         if not current_user:
             raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
@@ -119,16 +126,16 @@ async def get_surveys_in_organization(current_user: Annotated[User, Depends(get_
             raise HTTPException(status_code=403, detail="Forbidden")
         
         
-        result = await db.execute(select(Survey).where(and_(Survey.scope == SurveyScopeEnum.organization, 
-                                                                Survey.organization_id == org_id)))
+        query = select(Survey).options(*SURVEY_DETAIL).where(and_(Survey.scope == SurveyScopeEnum.organization, 
+                                                                Survey.organization_id == org_id))
+        if category_id:
+            query = query.where(Survey.category_id == category_id)
+        result = await db.execute(paginate(query, sort.column, Survey.id, page, descending=sort.descending))
     
-        surveys = result.unique().scalars().all()
-
-        
-        surveys = sorted(surveys, key=lambda x: x.end_date, reverse=True)
+        surveys, next_cursor = page_rows(result.unique().scalars().all(), page, key=lambda s: (sort.key(s), s.id))
 
 
-        return { "surveys": surveys}
+        return { "surveys": surveys, "next_cursor": next_cursor}
             
     
 
@@ -178,18 +185,14 @@ async def delete_organization(id: uuid.UUID, db: Annotated[AsyncSession, Depends
             raise HTTPException(status_code=404, detail="Organization not found")
         
         
-        result = await db.execute(select(User).where(User.organization_id == id))
+        result = await db.execute(select(User.id).where(User.organization_id == id).limit(1))
 
-        users = result.unique().scalars().all()
-
-        if len(users) > 0:
+        if result.first() is not None:
             raise HTTPException(status_code=400, detail="Organization has users")
         
-        result = await db.execute(select(Survey).where(Survey.organization_id == id))
-
-        surveys = result.unique().scalars().all()
+        result = await db.execute(select(Survey.id).where(Survey.organization_id == id).limit(1))
 
-        if len(surveys) > 0:
+        if result.first() is not None:
             raise HTTPException(status_code=400, detail="Organization has surveys")
 
         await db.delete(existing_org)
@@ -19,6 +19,12 @@ from src.auth.Auth import create_access_token, check_current_user, oauth_scheme,
 from sqlalchemy.orm import selectinload
 from src.models.SurveyTagModel import survey_tag
 from src.models.SurveyUserModel import survey_user
+from src.shared.loaders import SURVEY_DETAIL, SURVEY_QUESTIONS
+from src.shared.pagination import PageParams, page_params, paginate, page_rows
+from src.shared.sorting import Sort, SURVEY_SORT, sort_params
+from src.shared.response_cache import highlighted_surveys_cache, invalidate_survey_caches, public_surveys_cache
+from src.shared.notification_outbox import enqueue_notifications, notification_dispatcher
+from src.schemas.NotificationSchema import NotificationRequest
 
 
 
@@ -27,22 +33,30 @@ survey_router = APIRouter(tags=["Survey"])
 @survey_router.get("/surveys/", status_code=200, response_model=SurveyResponseList)
 @required_roles(["admin", "researcher", "participant"])
 async def get_surveys_by_scope(current_user: Annotated[User, Depends(get_current_user)], db: Annotated[AsyncSession, Depends(get_db)], 
-                        scope: SurveyScopeEnum):
+                        scope: SurveyScopeEnum, page: Annotated[PageParams, Depends(page_params)], sort: Annotated[Sort, Depends(sort_params(SURVEY_SORT))]):
     
         if not current_user:
             raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
     
         if scope == SurveyScopeEnum.public:
-            result = await db.execute(select(Survey).where(and_(Survey.scope == SurveyScopeEnum.public, Survey.end_date >= date.today())))
+            query = select(Survey).options(*SURVEY_DETAIL).where(and_(Survey.scope == SurveyScopeEnum.public, Survey.end_date >= date.today()))
         else: 
             if current_user.role != "admin":
                 raise HTTPException(status_code=403, detail="Forbidden")
-            result = await db.execute(select(Survey).where(Survey.scope == scope))
-    
+            query = select(Survey).options(*SURVEY_DETAIL).where(Survey.scope == scope)
+
+        async def load_page():
+            result = await db.execute(paginate(query, sort.column, Survey.id, page, descending=sort.descending))
+
+            surveys, next_cursor = page_rows(result.unique().scalars().all(), page, key=lambda s: (sort.key(s), s.id))
 
-        surveys = result.unique().scalars().all()
+            return SurveyResponseList.model_validate({ "surveys": surveys, "next_cursor": next_cursor}, from_attributes=True)
+
+        #the public listing is the same for every user
+        if scope == SurveyScopeEnum.public:
+            return await public_surveys_cache.get_or_compute((date.today(), page.cursor, page.limit, sort.column.key, sort.descending), load_page)
 
-        return { "surveys": surveys}
+        return await load_page()
 
 @survey_router.get("/surveys/{id}", status_code=200, response_model=SurveyResponse)
 async def get_survey_by_id(id:uuid.UUID, current_user: Annotated[User, Depends(get_current_user)], db: Annotated[AsyncSession, Depends(get_db)]):
@@ -51,10 +65,10 @@ async def get_survey_by_id(id:uuid.UUID, current_user: Annotated[User, Depends(g
             raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
         
         if current_user.role == "admin":
-            result = await db.execute(select(Survey).join(User).where(Survey.id == id))
+            result = await db.execute(select(Survey).options(*SURVEY_DETAIL).join(User).where(Survey.id == id))
 
         if current_user.role == "researcher" or current_user.role == "participant":
-            result = await db.execute(select(Survey).join(User).where(and_(Survey.id == id, User.organization_id == current_user.organization_id)))
+            result = await db.execute(select(Survey).options(*SURVEY_DETAIL).join(User).where(and_(Survey.id == id, User.organization_id == current_user.organization_id)))
 
         survey = result.unique().scalars().first()   
 
@@ -84,6 +98,7 @@ async def delete_survey(id:uuid.UUID, current_user: Annotated[User, Depends(get_
 
         await db.delete(survey)
         await db.commit()
+        invalidate_survey_caches(id)
 
         return None
 
@@ -183,6 +198,21 @@ async def create_survey(survey: SurveyCreate, current_user: Annotated[User, Depe
                     question_id=question.id  # Usar el ID directamente
                 )
                 db.add(new_option)
+
+        #publishing an organization survey notifies every member of the organization: their devices are queued
+        #in the outbox with one query, in the same transaction as the survey, and sent in chunks by the dispatcher
+        queued = 0
+        if new_survey.scope == SurveyScopeEnum.organization:
+            members = select(User.id).where(User.organization_id == new_survey.organization_id, User.id != new_survey.owner_id)
+            notification = NotificationRequest(
+                type="survey_published",
+                title=survey.notification_title or "New survey in your organization",
+                body=survey.notification_body or new_survey.name,
+                email=current_user.email,
+                survey_id=new_survey.id,
+                survey_name=new_survey.name
+            )
+            queued = await enqueue_notifications(db, members, notification)
         
         await db.commit()  # Commit final
         
@@ -255,7 +285,10 @@ async def create_survey(survey: SurveyCreate, current_user: Annotated[User, Depe
             ],
             tags=[TagResponse(id=t.id, name=t.name) for t in all_tags]
         )
-        
+
+        invalidate_survey_caches()
+        if queued:
+            notification_dispatcher.wake()
         return response
         
     except Exception as e:
@@ -266,7 +299,8 @@ async def create_survey(survey: SurveyCreate, current_user: Annotated[User, Depe
 
 @survey_router.get("/surveys/owner/{owner_id}", status_code=200, response_model=SurveyResponseList)
 @required_roles(["admin", "researcher"])
-async def get_surveys_by_owner(current_user: Annotated[User, Depends(get_current_user)], db: Annotated[AsyncSession, Depends(get_db)], owner_id: uuid.UUID):
+async def get_surveys_by_owner(current_user: Annotated[User, Depends(get_current_user)], db: Annotated[AsyncSession, Depends(get_db)], owner_id: uuid.UUID,
+                               page: Annotated[PageParams, Depends(page_params)], sort: Annotated[Sort, Depends(sort_params(SURVEY_SORT))]):
     
         if not current_user:
             raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
@@ -280,15 +314,13 @@ async def get_surveys_by_owner(current_user: Annotated[User, Depends(get_current
             raise HTTPException(status_code=403, detail="Forbidden")
 
         #de momento no se muestran las encuestas de organizacion en esta vista
-        result = await db.execute(select(Survey).where(and_(Survey.owner_id == owner_id, Survey.scope != SurveyScopeEnum.organization)))
+        query = select(Survey).options(*SURVEY_DETAIL).where(and_(Survey.owner_id == owner_id, Survey.scope != SurveyScopeEnum.organization))
+        result = await db.execute(paginate(query, sort.column, Survey.id, page, descending=sort.descending))
     
-        surveys = result.unique().scalars().all()
-
-
-        surveys = sorted(surveys, key=lambda x: x.end_date, reverse=True)
+        surveys, next_cursor = page_rows(result.unique().scalars().all(), page, key=lambda s: (sort.key(s), s.id))
        
 
-        return { "surveys": surveys}
+        return { "surveys": surveys, "next_cursor": next_cursor}
 
 @survey_router.get("/surveys/public/highlighted", status_code=200, response_model=SurveyResponseList)
 async def get_highlighted_public_surveys(current_user: Annotated[User, Depends(get_current_user)], db: Annotated[AsyncSession, Depends(get_db)]):
@@ -296,28 +328,26 @@ async def get_highlighted_public_surveys(current_user: Annotated[User, Depends(g
     if not current_user:
         raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
     
-    # Consulta para obtener las encuestas más populares basadas en el número de respuestas
-    result = await db.execute(
-        select(
-            Survey,
-            func.count(Answer.question_id).label("response_count")
+    async def load_highlighted():
+        #counters are maintained on every answer write, so this walks ix_surveys_scope_activity backwards
+        result = await db.execute(
+            select(Survey)
+            .options(*SURVEY_DETAIL)
+            .where(Survey.scope == SurveyScopeEnum.public, Survey.end_date >= date.today(), Survey.answer_count > 0)
+            .order_by(Survey.respondent_count.desc(), Survey.answer_count.desc(), Survey.id.desc())
+            .limit(5)
+            #the counters change underneath the session, never serve them from the identity map
+            .execution_options(populate_existing=True)
         )
-        .join(Question, Survey.id == Question.survey_id)
-        .join(Answer, Question.id == Answer.question_id)
-        .where(and_(Survey.end_date >= date.today(), Survey.end_date.isnot(None)))
-        .group_by(Survey.id)
-        .order_by(func.count(Answer.question_id).desc())
-        .limit(5)
-    )
-    
-    # Obtener los resultados y asignar el conteo a cada encuesta
-    surveys_with_counts = result.all()
-    surveys = []
-    for survey, count in surveys_with_counts:
-        survey.response_count = count
-        surveys.append(survey)
 
-    return {"surveys": surveys}
+        surveys = result.scalars().all()
+        for survey in surveys:
+            survey.response_count = survey.answer_count
+
+        return SurveyResponseList.model_validate({"surveys": surveys}, from_attributes=True)
+
+    #new answers show up once the entry expires, survey writes invalidate it
+    return await highlighted_surveys_cache.get_or_compute(date.today(), load_highlighted)
 
 
 @survey_router.put("/surveys/{id}", status_code=200, response_model=SurveyResponse)
@@ -330,7 +360,7 @@ async def update_survey(id: uuid.UUID, survey: SurveyUpdate, current_user: Annot
     # Obtener el cuestionario existente con sus preguntas y opciones
     result = await db.execute(
         select(Survey)
-        .options(selectinload(Survey.questions).selectinload(Question.options))
+        .options(*SURVEY_QUESTIONS, selectinload(Survey.tags))
         .where(Survey.id == id)
     )
     existing_survey = result.unique().scalars().first()
@@ -480,12 +510,12 @@ async def update_survey(id: uuid.UUID, survey: SurveyUpdate, current_user: Annot
     try:
         # Hacer commit de todos los cambios
         await db.commit()
+        invalidate_survey_caches(id)
         
         # Recargar el cuestionario actualizado con todas sus relaciones
         result = await db.execute(
             select(Survey)
-            .options(selectinload(Survey.questions).selectinload(Question.options))
-            .options(selectinload(Survey.tags))
+            .options(*SURVEY_DETAIL)
             .where(Survey.id == id)
         )
         updated_survey = result.unique().scalars().first()
@@ -3,13 +3,16 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import and_, or_, select, update
 from src.models.UserFcmTokenModel import UserFcmToken
-from src.shared.notifications import send_notification
+from src.shared.notification_outbox import enqueue_notifications, notification_dispatcher
 from src.models.CategoryModel import Category
 from src.models.SurveyModel import Survey
 from src.models.SurveyUserModel import survey_user
 from src.auth.Auth import get_current_user, required_roles
 from src.models.UserModel import User
 from src.database import get_db
+from src.shared.loaders import SURVEY_DETAIL
+from src.shared.pagination import PageParams, page_params, paginate, page_rows
+from src.shared.sorting import Sort, SURVEY_SORT, USER_SORT, sort_params
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.schemas.SurveySchema import *
 from src.schemas.UserSchema import *
@@ -20,7 +23,8 @@ survey_users_router = APIRouter(tags=["Survey Users"])
 
 @survey_users_router.get("/surveys/{id}/users", status_code=200, response_model=UserResponseWithPendingAssignments)
 @required_roles(["admin", "researcher"])
-async def get_all_survey_assigned_users(id: uuid.UUID, current_user: Annotated[User, Depends(get_current_user)], db: Annotated[AsyncSession, Depends(get_db)]):
+async def get_all_survey_assigned_users(id: uuid.UUID, current_user: Annotated[User, Depends(get_current_user)], db: Annotated[AsyncSession, Depends(get_db)],
+                                        page: Annotated[PageParams, Depends(page_params)], sort: Annotated[Sort, Depends(sort_params(USER_SORT))]):
     if not current_user:
         raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
     
@@ -33,45 +37,41 @@ async def get_all_survey_assigned_users(id: uuid.UUID, current_user: Annotated[U
         raise HTTPException(status_code=404, detail="Survey not found")
     
     
-    users = []
+    # tanto si el scope es organization como si es private, se incluyen los usuarios que están asignados al cuestionario
+    membership = [and_(survey_user.c.user_id.isnot(None), survey_user.c.status != AssignmentStatusEnum.rejected)]
 
     if existing_survey.scope == SurveyScopeEnum.organization:
         if current_user.role == "researcher" and current_user.organization_id != existing_survey.organization_id:
             raise HTTPException(status_code=403, detail="Forbidden")
 
-        result = await db.execute(select(User, Survey).where(User.organization_id == existing_survey.organization_id))
-        users_in_organization = result.unique().scalars().all()
-        users.extend(users_in_organization)
+        membership.append(User.organization_id == existing_survey.organization_id)
     
     if existing_survey.scope == SurveyScopeEnum.private:
-        result = await db.execute(select(User, Survey).where(and_(User.id == existing_survey.owner_id,
-                                                                  Survey.id == existing_survey.id)))
-        owner = result.unique().scalars().first()
-        users.append(owner)
-    
-    # tanto si el scope es organization como si es private, se buscan los usuarios que están asignados al cuestionario
-    result2 = await db.execute(select(User, survey_user.c.status).join(survey_user).where(and_(survey_user.c.survey_id == id,
-                                                                            User.id == survey_user.c.user_id, 
-                                                                            survey_user.c.status != AssignmentStatusEnum.rejected)))
-    
-    
+        membership.append(User.id == existing_survey.owner_id)
     
-    users_assigned = result2.all()
+    #one query for every member of the survey, with their assignment status when they have one
+    query = (select(User, survey_user.c.status)
+             .outerjoin(survey_user, and_(survey_user.c.user_id == User.id, survey_user.c.survey_id == id))
+             .where(or_(*membership)))
+    result = await db.execute(paginate(query, sort.column, User.id, page, descending=sort.descending))
+
+    rows, next_cursor = page_rows(result.all(), page, key=lambda row: (sort.key(row[0]), row[0].id))
     
 
+    users = []
     pending_assignments = {}
-    for user, status in users_assigned:
-        if user not in users:
-            users.append(user)
+    for user, status in rows:
+        users.append(user)
         if status == AssignmentStatusEnum.requested_pending or status == AssignmentStatusEnum.invited_pending:
             pending_assignments[str(user.id)] = status
         
 
-    return { "users": users, "pending_assignments": pending_assignments }
+    return { "users": users, "pending_assignments": pending_assignments, "next_cursor": next_cursor }
     
 
 @survey_users_router.get("/users/{id}/surveys", status_code=200, response_model=SurveyResponseList)
-async def get_user_surveys_assigned(id: uuid.UUID, current_user: Annotated[User, Depends(get_current_user)], db: Annotated[AsyncSession, Depends(get_db)]):
+async def get_user_surveys_assigned(id: uuid.UUID, current_user: Annotated[User, Depends(get_current_user)], db: Annotated[AsyncSession, Depends(get_db)],
+                                    page: Annotated[PageParams, Depends(page_params)], sort: Annotated[Sort, Depends(sort_params(SURVEY_SORT))]):
     
         if not current_user:
             raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
@@ -97,23 +97,24 @@ async def get_user_surveys_assigned(id: uuid.UUID, current_user: Annotated[User,
         """
        
         #buscamos los cuestionarios asignados al usuario
-        result = await db.execute(select(Survey, survey_user.c.status.label("status")).join(survey_user, Survey.id == survey_user.c.survey_id).where(survey_user.c.user_id == id))
+        query = (select(Survey, survey_user.c.status.label("status")).options(*SURVEY_DETAIL)
+                 .join(survey_user, Survey.id == survey_user.c.survey_id)
+                 .where(and_(survey_user.c.user_id == id,
+                             or_(survey_user.c.status.is_(None),
+                                 survey_user.c.status.notin_([AssignmentStatusEnum.rejected, AssignmentStatusEnum.requested_pending])))))
+        result = await db.execute(paginate(query, sort.column, Survey.id, page, descending=sort.descending))
         
             
-        surveys_assigned = result.all()
+        surveys_assigned, next_cursor = page_rows(result.all(), page, key=lambda row: (sort.key(row[0]), row[0].id))
 
         surveys = []
 
         for survey, status in surveys_assigned:
-            if status == AssignmentStatusEnum.rejected or status == AssignmentStatusEnum.requested_pending:
-                continue
             survey.assignment_status = status
             surveys.append(survey)
-            
-        surveys = sorted(surveys, key=lambda x: x.end_date, reverse=True)
 
 
-        return { "surveys": surveys}
+        return { "surveys": surveys, "next_cursor": next_cursor}
     
 
 @survey_users_router.post("/surveys/{id}/users/add", status_code=200, response_model=UserResponse)
@@ -190,31 +191,17 @@ async def assign_users_to_survey(id: uuid.UUID, user: AssignParticipantToSurvey,
                 else:
                     update_assignment = survey_user.update().values(status=AssignmentStatusEnum.invited_pending).where(and_(survey_user.c.user_id == existing_user.id, survey_user.c.survey_id == existing_survey.id))
                     await db.execute(update_assignment)
-                    await db.commit()
         
         else: 
             new_assignment =  survey_user.insert().values([{"user_id": existing_user.id, "survey_id": existing_survey.id, "status": AssignmentStatusEnum.invited_pending}])
             await db.execute(new_assignment)
-            await db.commit()
     
-        try: #obtener los tokens de los usuarios que estan asignados al cuestionario
-            result = await db.execute(select(UserFcmToken).where(UserFcmToken.user_id == existing_user.id))
-            tokens = result.unique().scalars().all()
-
-            fcm_tokens = [token.fcm_token for token in tokens]
-
-        #enviar notificaciones a los usuarios que estan asignados al cuestionario
-            if fcm_tokens and existing_user.allow_notifications:
-                 for token in fcm_tokens:
-                    notifcation_params = NotificationRequest(token=token, title=user.notification_title, body=user.notification_body, email=current_user.email, survey_id=existing_survey.id, survey_name=existing_survey.name, user_id=existing_user.id)
-                    success = send_notification(notifcation_params)
-                    if not success:
-                        raise HTTPException(status_code=500, detail="Error sending notification")
-        
-        except Exception as e:
-            print(e)
-            raise HTTPException(status_code=500, detail=f"Error sending notification: {str(e)}")
-        
+        notification = NotificationRequest(title=user.notification_title, body=user.notification_body, email=current_user.email, survey_id=existing_survey.id, survey_name=existing_survey.name, user_id=existing_user.id)
+        queued = await enqueue_notifications(db, [existing_user.id], notification)
+        await db.commit()
+
+        if queued:
+            notification_dispatcher.wake()
 
         return existing_user
 
@@ -226,7 +213,7 @@ async def accept_survey_assignment(user_id: uuid.UUID, survey_id: uuid.UUID, cur
             raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
         
         #check if survey exists
-        result = await db.execute(select(Survey).where(Survey.id == survey_id))
+        result = await db.execute(select(Survey).options(*SURVEY_DETAIL).where(Survey.id == survey_id))
         existing_survey = result.unique().scalars().first()
 
         if not existing_survey:
@@ -274,7 +261,7 @@ async def reject_survey_assignment(user_id: uuid.UUID, survey_id: uuid.UUID, cur
             raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
         
         #check if survey exists
-        result = await db.execute(select(Survey).where(Survey.id == survey_id))
+        result = await db.execute(select(Survey).options(*SURVEY_DETAIL).where(Survey.id == survey_id))
         existing_survey = result.unique().scalars().first()
 
         if not existing_survey:
@@ -435,33 +422,18 @@ async def request_survey_access(id: uuid.UUID, user_id: uuid.UUID, payload: Requ
                 else:
                     update_assignment = survey_user.update().values(status=AssignmentStatusEnum.requested_pending).where(and_(survey_user.c.user_id == existing_user.id, survey_user.c.survey_id == existing_survey.id))
                     await db.execute(update_assignment)
-                    await db.commit()
         
         else: 
             new_assignment =  survey_user.insert().values([{"user_id": existing_user.id, "survey_id": existing_survey.id, "status": AssignmentStatusEnum.requested_pending}])
             await db.execute(new_assignment)
-            await db.commit()
 
     
-        try: #obtener el token del owner del cuestionario
-            result = await db.execute(select(UserFcmToken).where(UserFcmToken.user_id == existing_survey.owner_id))
-            tokens = result.unique().scalars().all()
-
-            fcm_tokens = [token.fcm_token for token in tokens]
-
-            if fcm_tokens and existing_user.allow_notifications:
-                 for token in fcm_tokens:
-                    #enviar notificaciones al owner del cuestionario
-                    send_notification_params = NotificationRequest(token=token, title=payload.notification_title, body=payload.notification_body, email=current_user.email, survey_id=existing_survey.id, survey_name=existing_survey.name, user_id=existing_user.id)
-                    success = send_notification(send_notification_params)
-                    if not success:
-                        raise HTTPException(status_code=500, detail="Error sending notification")
-        
-        except Exception as e:
-            print(e)
-            raise HTTPException(status_code=500, detail=f"Error sending notification: {str(e)}")
-        
-        
+        notification = NotificationRequest(title=payload.notification_title, body=payload.notification_body, email=current_user.email, survey_id=existing_survey.id, survey_name=existing_survey.name, user_id=existing_user.id)
+        queued = await enqueue_notifications(db, [existing_survey.owner_id], notification)
+        await db.commit()
+
+        if queued:
+            notification_dispatcher.wake()
 
         return existing_user
 
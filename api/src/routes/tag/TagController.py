@@ -12,6 +12,9 @@ from fastapi.security import OAuth2PasswordRequestForm
 from src.auth.Auth import create_access_token, check_current_user, get_current_user, oauth_scheme, required_roles
 from src.models.TagModel import Tag
 from src.schemas.TagSchema import *
+from src.shared.pagination import PageParams, page_params, paginate, page_rows
+from src.shared.response_cache import tags_cache
+from sqlalchemy import func
 
 tag_router = APIRouter(tags=["Tag"])
 
@@ -19,17 +22,24 @@ tag_router = APIRouter(tags=["Tag"])
 
 
 @tag_router.get("/tags", status_code=200, response_model=TagResponseList)
-async def get_all_tags(current_user: Annotated[User, Depends(get_current_user)], db: Annotated[AsyncSession, Depends(get_db)]):
+async def get_all_tags(current_user: Annotated[User, Depends(get_current_user)], db: Annotated[AsyncSession, Depends(get_db)], page: Annotated[PageParams, Depends(page_params)]):
 
         if not current_user:
             raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
         
 
-        result = await db.execute(select(Tag))
+        async def load_page():
+            #tag names are nullable, coalesce them so the keyset comparison never sees NULL
+            tag_name = func.coalesce(Tag.name, "")
+            result = await db.execute(paginate(select(Tag), tag_name, Tag.id, page))
 
-        tags = result.unique().scalars().all()
-        return {
-              "tags": tags
-        }
+            tags, next_cursor = page_rows(result.unique().scalars().all(), page, key=lambda t: (t.name or "", t.id))
+            return TagResponseList.model_validate({
+                  "tags": tags,
+                  "next_cursor": next_cursor
+            }, from_attributes=True)
+
+        #tags are only created by survey writes, which invalidate this cache
+        return await tags_cache.get_or_compute((page.cursor, page.limit), load_page)
     
     
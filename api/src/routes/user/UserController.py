@@ -3,13 +3,17 @@ from sqlalchemy import or_, select, update
 from src.models.UserModel import User
 from src.models.OrganizationModel import Organization
 from src.schemas.UserSchema import *
-from src.schemas.TokenSchema import Token
-import bcrypt
+from src.schemas.TokenSchema import RefreshTokenRequest, Token
+from src.auth.Passwords import password_hasher
 from src.database import get_db
 from typing import Annotated, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import OAuth2PasswordRequestForm
-from src.auth.Auth import create_access_token, check_current_user, oauth_scheme, get_current_user, required_roles
+from src.auth.Auth import create_access_token, check_current_user, load_principal, oauth_scheme, get_current_user, required_roles, token_claims
+from src.auth.RefreshTokens import issue_refresh_token, revoke_user_refresh_tokens, rotate_refresh_token
+from src.auth.Principal import invalidate_principal
+from src.shared.pagination import PageParams, page_params, paginate, page_rows
+from src.shared.sorting import Sort, USER_SORT, sort_params
 
 user_router = APIRouter(tags=["User"])
 
@@ -35,7 +39,7 @@ async def create_user(user: UserCreateRequest, db: Annotated[AsyncSession, Depen
 
 
     #hash password
-    hashed_password = bcrypt.hashpw(user.password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    hashed_password = await password_hasher.hash(user.password)
 
     #insert user to db
     new_user = User(name=user.name, lastname=user.lastname, email=user.email, password=hashed_password, role=user.role, birthdate= user.birthdate, gender= user.gender, organization_id= existing_org.id if existing_org else None)
@@ -60,50 +64,82 @@ async def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()], db:
             raise HTTPException(status_code=404, detail="User not found")
         
     #check password
-    password_is_valid = bcrypt.checkpw(form_data.password.encode('utf-8'), existing_user.password.encode('utf-8'))
+    password_is_valid = await password_hasher.verify(form_data.password, existing_user.password)
 
     if not password_is_valid:
         raise HTTPException(status_code=401, detail="Authentication failed")
+
+    #hashes made with an older cost factor are upgraded while the plain password is at hand
+    if password_hasher.needs_rehash(existing_user.password):
+        existing_user.password = await password_hasher.rehash(form_data.password)
         
         #generate user token
-    access_token = create_access_token({"id": str(existing_user.id)})
+    access_token = create_access_token(token_claims(existing_user))
+    refresh_token = issue_refresh_token(db, existing_user.id)
+    await db.commit()
+
+    return Token(access_token=access_token, token_type="bearer", refresh_token=refresh_token)
+
+
+@user_router.post("/users/token/refresh", status_code=200)
+async def refresh_access_token(body: RefreshTokenRequest, db: Annotated[AsyncSession, Depends(get_db)]):
+
+    #renewing a session costs a hash and an indexed update instead of a password verification
+    rotated = await rotate_refresh_token(db, body.refresh_token)
+
+    principal = await load_principal(db, rotated.user_id)
+    if principal is None:
+        raise HTTPException(status_code=401, detail="Invalid refresh token", headers={"WWW-Authenticate": "Bearer"})
 
-    return Token(access_token=access_token, token_type="bearer")
+    #claims come from the current user, so a bumped token version is picked up here
+    access_token = create_access_token(token_claims(principal))
+    refresh_token = issue_refresh_token(db, rotated.user_id, rotated.family_id)
+    await db.commit()
+
+    return Token(access_token=access_token, token_type="bearer", refresh_token=refresh_token)
     
 
 
 
 @user_router.get("/users/me", status_code=200, response_model=UserResponse)
-async def get_user(current_user: Annotated[User, Depends(get_current_user)] = None):
+async def get_user(db: Annotated[AsyncSession, Depends(get_db)], current_user: Annotated[User, Depends(get_current_user)] = None):
     
     if not current_user:
         raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
+
+    #current_user is only the cached principal, the profile needs the full row
+    result = await db.execute(select(User).where(User.id == current_user.id))
+    existing_user = result.unique().scalars().first()
+
+    if not existing_user:
+        raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
         
-    return current_user
+    return existing_user
     
 
 
 @user_router.get("/users", status_code=200, response_model=UserResponseList, dependencies=[Depends(check_current_user)])
 @required_roles(["admin"])
-async def get_all_users(db: Annotated[AsyncSession, Depends(get_db)], current_user: Annotated[User, Depends(get_current_user)] = None, role: Optional[UserRoleEnum] = None, org: Optional[uuid.UUID] = None):
+async def get_all_users(db: Annotated[AsyncSession, Depends(get_db)], page: Annotated[PageParams, Depends(page_params)], sort: Annotated[Sort, Depends(sort_params(USER_SORT))], current_user: Annotated[User, Depends(get_current_user)] = None, role: Optional[UserRoleEnum] = None, org: Optional[uuid.UUID] = None):
         
         if not current_user:
             raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
 
         if current_user.role == "admin":
             if org and role:
-                result = await db.execute(select(User).where(User.organization_id == org, User.role == role))
+                query = select(User).where(User.organization_id == org, User.role == role)
             elif org:
-                result = await db.execute(select(User).where(User.organization_id == org))
+                query = select(User).where(User.organization_id == org)
             elif role:
-                result = await db.execute(select(User).where(User.role == role))
+                query = select(User).where(User.role == role)
             else:
-                result = await db.execute(select(User))
+                query = select(User)
                 
        
+        result = await db.execute(paginate(query, sort.column, User.id, page, descending=sort.descending))
 
-        users = result.unique().scalars().all()
-        return { "users": users}
+        users, next_cursor = page_rows(result.unique().scalars().all(), page, key=lambda u: (sort.key(u), u.id))
+        return { "users": users, "next_cursor": next_cursor}
     
 
 
@@ -144,10 +180,13 @@ async def update_password(current_user: Annotated[User, Depends(get_current_user
             raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
     
 
-        hashed_password = bcrypt.hashpw(pw.password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        hashed_password = await password_hasher.hash(pw.password)
 
         await db.execute(update(User).where(User.id == current_user.id).values(password=hashed_password))
         await db.commit()
+        invalidate_principal(current_user.id)
+        #sessions opened with the old password cannot be renewed
+        await revoke_user_refresh_tokens(db, current_user.id)
 
         return None
 
@@ -161,10 +200,12 @@ async def reset_password(pw: UserResetPasswordRequest, db: Annotated[AsyncSessio
             raise HTTPException(status_code=404, detail="User not found")
     
 
-        hashed_password = bcrypt.hashpw(pw.password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        hashed_password = await password_hasher.hash(pw.password)
 
         await db.execute(update(User).where(User.email == pw.email).values(password=hashed_password))
         await db.commit()
+        invalidate_principal(existing_user.id)
+        await revoke_user_refresh_tokens(db, existing_user.id)
 
         return None
 
@@ -210,6 +251,9 @@ async def update_user(id: uuid.UUID, current_user: Annotated[User, Depends(get_c
                 existing_org = result.unique().scalars().first()
                 if not existing_org:
                     raise HTTPException(status_code=404, detail="Organization not found")
+                if existing_user.organization_id != existing_org.id:
+                    #invalidate the organization claim of the tokens already issued
+                    existing_user.token_version += 1
                 existing_user.organization_id = existing_org.id
             
             
@@ -218,6 +262,7 @@ async def update_user(id: uuid.UUID, current_user: Annotated[User, Depends(get_c
         
         await db.flush()
         await db.commit()
+        invalidate_principal(existing_user.id)
 
 
         return existing_user
@@ -240,6 +285,7 @@ async def update_user_notifications(id: uuid.UUID, current_user: Annotated[User,
 
         await db.execute(update(User).where(User.id == id).values(allow_notifications=notifications.allow_notifications))
         await db.commit()
+        invalidate_principal(id)
 
 
         return existing_user
@@ -266,13 +312,14 @@ async def delete_user(id: uuid.UUID, current_user: Annotated[User, Depends(get_c
 
 
         if current_user.role != "admin":
-            password_is_valid = bcrypt.checkpw(password.password.encode('utf-8'), existing_user.password.encode('utf-8'))
+            password_is_valid = await password_hasher.verify(password.password, existing_user.password)
 
             if not password_is_valid:
                 raise HTTPException(status_code=401, detail="Incorrect password")
 
         await db.delete(existing_user)
         await db.commit()
+        invalidate_principal(id)
     
         return None
 
@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import and_, select
@@ -32,6 +33,10 @@ async def register_user_fcm_token(user_fcm_token: UserFcmTokenCreate, db: Annota
 
         return {"message": "Token registered successfully"}
     else:
+        #registering a token again marks the device as alive, stale tokens are swept by updated_at
+        existing_token.updated_at = datetime.now()
+        await db.commit()
+
         return {"message": "Token already registered"}
 
 
@@ -0,0 +1,115 @@
+import asyncio
+from typing import List, Tuple
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.schema import CreateIndex
+from src.database import Base, engine
+import src.models
+from src.models.SurveyRespondentModel import ANSWERS_DELETED, ANSWERS_DELETED_TRIGGER, ANSWERS_INSERTED, ANSWERS_INSERTED_TRIGGER, RECOUNT_SURVEY_RESPONDENTS
+
+# Upgrades for databases created before a model change. create_all only creates missing tables,
+# so every column, index or trigger added to an existing table is also listed here as DDL that
+# can run against both old and freshly created schemas. Each upgrade runs once, in order, and is
+# recorded in schema_upgrades. The app applies pending upgrades at startup; to apply them by hand:
+#
+#     python -m src.schema_upgrades
+
+#any constant works, it only has to be the same for every process
+SCHEMA_UPGRADE_LOCK = 724_301
+
+
+def create_index(table: str, name: str) -> str:
+    #the DDL of an index declared on a model, so the upgrade and create_all build the same index
+    index = next(index for index in Base.metadata.tables[table].indexes if index.name == name)
+    return str(CreateIndex(index, if_not_exists=True).compile(dialect=postgresql.dialect()))
+
+
+UPGRADES: List[Tuple[str, List[str]]] = [
+    ("0001_users_token_version", [
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS token_version INTEGER NOT NULL DEFAULT 0",
+    ]),
+    ("0002_keyset_sort_indexes", [
+        create_index("surveys", "ix_surveys_owner_end_date"),
+        create_index("surveys", "ix_surveys_organization_end_date"),
+        create_index("surveys", "ix_surveys_scope_end_date"),
+        create_index("surveys", "ix_surveys_owner_start_date"),
+        create_index("surveys", "ix_surveys_organization_start_date"),
+        create_index("surveys", "ix_surveys_scope_start_date"),
+        create_index("surveys", "ix_surveys_owner_name"),
+        create_index("surveys", "ix_surveys_organization_name"),
+        create_index("surveys", "ix_surveys_scope_name"),
+        create_index("users", "ix_users_organization_email"),
+        create_index("users", "ix_users_organization_role"),
+        create_index("users", "ix_users_role"),
+    ]),
+    ("0003_answer_lookup_indexes", [
+        create_index("answers", "ix_answers_user_question"),
+        create_index("answers", "ix_answers_question"),
+        create_index("questions", "ix_questions_survey"),
+        create_index("options", "ix_options_question"),
+    ]),
+    ("0004_export_job_leases", [
+        "ALTER TABLE export_jobs ADD COLUMN IF NOT EXISTS answers_sequence BIGINT",
+        "ALTER TABLE export_jobs ADD COLUMN IF NOT EXISTS questions_hash VARCHAR(32)",
+        "ALTER TABLE export_jobs ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP",
+        "ALTER TABLE export_jobs DROP COLUMN IF EXISTS answers_hash",
+    ]),
+    ("0005_answer_export_watermark", [
+        "ALTER TABLE answers ADD COLUMN IF NOT EXISTS created_at TIMESTAMP NOT NULL DEFAULT now()",
+        "ALTER TABLE answers ADD COLUMN IF NOT EXISTS sequence BIGINT GENERATED BY DEFAULT AS IDENTITY",
+        #answers written before transaction ids were recorded belong to every export window starting at 0
+        "ALTER TABLE answers ADD COLUMN IF NOT EXISTS xact_id BIGINT NOT NULL DEFAULT 0",
+        "ALTER TABLE answers ALTER COLUMN xact_id SET DEFAULT pg_current_xact_id()::text::bigint",
+        create_index("answers", "ix_answers_xact"),
+        "DROP INDEX IF EXISTS ix_answers_sequence",
+    ]),
+    ("0006_survey_respondent_counters", [
+        "ALTER TABLE surveys ADD COLUMN IF NOT EXISTS respondent_count INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE surveys ADD COLUMN IF NOT EXISTS answer_count INTEGER NOT NULL DEFAULT 0",
+        create_index("surveys", "ix_surveys_scope_activity"),
+        #answer writers wait until the triggers are in place and the counters match the answers
+        "LOCK TABLE answers IN SHARE MODE",
+        ANSWERS_INSERTED.statement,
+        "DROP TRIGGER IF EXISTS answers_inserted_counters ON answers",
+        ANSWERS_INSERTED_TRIGGER.statement,
+        ANSWERS_DELETED.statement,
+        "DROP TRIGGER IF EXISTS answers_deleted_counters ON answers",
+        ANSWERS_DELETED_TRIGGER.statement,
+        *RECOUNT_SURVEY_RESPONDENTS,
+    ]),
+    ("0007_export_job_lease_token", [
+        "ALTER TABLE export_jobs ADD COLUMN IF NOT EXISTS lease_token UUID",
+    ]),
+]
+
+
+async def upgrade_database(conn: AsyncConnection) -> List[str]:
+    #workers starting together wait here for the first one instead of racing it
+    await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SCHEMA_UPGRADE_LOCK})
+    await conn.run_sync(Base.metadata.create_all)
+
+    await conn.execute(text("CREATE TABLE IF NOT EXISTS schema_upgrades (name VARCHAR(100) PRIMARY KEY, applied_at TIMESTAMP NOT NULL DEFAULT now())"))
+    applied = set((await conn.execute(text("SELECT name FROM schema_upgrades"))).scalars())
+
+    upgraded = []
+    for name, statements in UPGRADES:
+        if name in applied:
+            continue
+        for statement in statements:
+            await conn.execute(text(statement))
+        await conn.execute(text("INSERT INTO schema_upgrades (name) VALUES (:name)"), {"name": name})
+        upgraded.append(name)
+
+    return upgraded
+
+
+async def main():
+    async with engine.begin() as conn:
+        upgraded = await upgrade_database(conn)
+    await engine.dispose()
+    print("\n".join(upgraded) if upgraded else "Database is up to date")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -10,6 +10,12 @@ class AnswerBase(BaseModel):...
 class AvailableFormatsEnum(str, Enum):
     csv = "csv"
     excel = "excel"
+    parquet = "parquet"
+    arrow = "arrow"
+
+class MultipleChoiceLayoutEnum(str, Enum):
+    joined = "joined"
+    one_hot = "one_hot"
 
 class AnswerCreate(AnswerBase):
     questions: List[QuestionAnswer]
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 import uuid
 from pydantic import BaseModel, Field
 
@@ -18,3 +18,4 @@ class CategoryResponse(CategoryBase):
 
 class CategoryResponseList(BaseModel):
     categories: List[CategoryResponse]
+    next_cursor: Optional[str] = None
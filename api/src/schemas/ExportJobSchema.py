@@ -0,0 +1,30 @@
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+import uuid
+from pydantic import BaseModel
+from src.schemas.AnswerSchema import AvailableFormatsEnum, MultipleChoiceLayoutEnum
+
+
+class ExportJobStatusEnum(str, Enum):
+    pending = "pending"
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+
+
+class ExportJobCreate(BaseModel):
+    format: AvailableFormatsEnum
+    multiple_choice: MultipleChoiceLayoutEnum = MultipleChoiceLayoutEnum.joined
+
+
+class ExportJobResponse(BaseModel):
+    id: uuid.UUID
+    survey_id: uuid.UUID
+    format: AvailableFormatsEnum
+    multiple_choice: MultipleChoiceLayoutEnum
+    status: ExportJobStatusEnum
+    size: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
@@ -1,12 +1,20 @@
+from enum import Enum
 from typing import Optional
 import uuid
 from pydantic import BaseModel
 
 class NotificationRequest(BaseModel):
-    token: str
+    token: Optional[str] = None
     title: str
     body: str
     email: Optional[str] = None
     survey_id: Optional[uuid.UUID] = None
     survey_name: Optional[str] = None
     user_id: Optional[uuid.UUID] = None
+    #lets the app tell invitations from other notifications
+    type: Optional[str] = None
+
+
+class NotificationOutboxStatusEnum(str, Enum):
+    pending = "pending"
+    dead = "dead"
@@ -31,6 +31,9 @@ class SurveyCreate(SurveyBase):
     end_date: Optional[date] = Field(default_factory=lambda: date.today() + timedelta(days=7))
     questions: Optional[List[QuestionCreateRequest]] = Field(default=None)
     tags: Optional[List[TagCreateRequest]] = Field(default=None)
+    #sent to the members of the organization when an organization survey is published
+    notification_title: Optional[str] = Field(default=None)
+    notification_body: Optional[str] = Field(default=None)
 
     @model_validator(mode="after")
     def validate_start_date(self):
@@ -63,7 +66,9 @@ class SurveyResponse(SurveyBase):
     invitations_rejected: Optional[int] = Field(default=None)
     questions: List[QuestionResponse]
     response_count: Optional[int] = Field(default=None)
+    respondent_count: Optional[int] = Field(default=None)
     tags: Optional[List[TagResponse]] = Field(default=None)
 
 class SurveyResponseList(BaseModel):
     surveys: List[SurveyResponse]
+    next_cursor: Optional[str] = Field(default=None)
@@ -0,0 +1,32 @@
+from typing import List, Optional
+from uuid import UUID
+from pydantic import BaseModel, Field
+from src.schemas.QuestionSchema import QuestionTypeEnum
+
+
+class OptionStats(BaseModel):
+    id: UUID
+    description: str
+    points: Optional[int] = None
+    count: int
+    #share of the question's respondents that picked the option, multiple choice can add up to more than 100
+    percentage: float
+
+
+class QuestionStats(BaseModel):
+    id: UUID
+    number: int
+    description: str
+    type: QuestionTypeEnum
+    respondents: int
+    answers: int
+    options: List[OptionStats] = Field(default_factory=list)
+    points_sum: Optional[int] = None
+    points_mean: Optional[float] = None
+
+
+class SurveyStatsResponse(BaseModel):
+    survey_id: UUID
+    respondents: int
+    answers: int
+    questions: List[QuestionStats]
@@ -1,4 +1,5 @@
 import uuid
+from typing import Optional
 from pydantic import BaseModel
 
 class TagBase(BaseModel):
@@ -11,5 +12,6 @@ class TagResponse(TagBase):
 
 class TagResponseList(BaseModel):
     tags: list[TagResponse]
+    next_cursor: Optional[str] = None
 
 
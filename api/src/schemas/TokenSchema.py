@@ -5,6 +5,13 @@ from pydantic import BaseModel
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: str | None = None
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
 
 class TokenData(BaseModel):
-    id: str | None = None
\ No newline at end of file
+    id: str | None = None
+    role: str | None = None
+    organization_id: str | None = None
+    token_version: int | None = None
\ No newline at end of file
@@ -87,10 +87,12 @@ class UserByRoleRequest(BaseModel):
 
 class UserResponseList(BaseModel):
     users: List[UserResponse]
+    next_cursor: Optional[str] = None
 
 class UserResponseWithPendingAssignments(BaseModel):
     users: List[UserResponse]
     pending_assignments: dict[str, AssignmentStatusEnum]
+    next_cursor: Optional[str] = None
     
 class UserUpdateNotificationsRequest(BaseModel):
     allow_notifications: bool
@@ -0,0 +1,56 @@
+import asyncio
+import csv
+import sys
+import uuid
+from typing import Iterator, List
+from src.database import SessionLocal
+from src.shared.submissions import AnswerRecord, bulk_insert_answers
+#register every mapper before the first statement is compiled
+import src.models
+import src.models.UserFcmTokenModel
+
+
+# Offline answer import: python -m src.shared.answer_import answers.csv
+# The csv needs a header with user_id, question_id, option_id and text; empty cells are NULL.
+
+IMPORT_BATCH_SIZE = 10000
+
+
+def read_answer_records(path: str) -> Iterator[List[AnswerRecord]]:
+    with open(path, newline="", encoding="utf-8") as file:
+        batch = []
+        for row in csv.DictReader(file):
+            batch.append((
+                uuid.UUID(row["user_id"]),
+                uuid.UUID(row["question_id"]),
+                uuid.UUID(row["option_id"]) if row.get("option_id") else None,
+                row.get("text") or None,
+            ))
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+async def import_answers(path: str) -> int:
+    imported = 0
+
+    async with SessionLocal() as db:
+        try:
+            for batch in read_answer_records(path):
+                imported += await bulk_insert_answers(db, batch)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+    return imported
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("usage: python -m src.shared.answer_import <answers.csv>")
+        sys.exit(1)
+
+    print(f"Imported {asyncio.run(import_answers(sys.argv[1]))} answers")
@@ -0,0 +1,155 @@
+import json
+import uuid
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.models.AnswerModel import Answer
+from src.models.OptionModel import Option
+from src.models.QuestionModel import Question
+from src.models.SurveyRespondentModel import survey_respondent
+from src.models.UserModel import User
+from src.schemas.QuestionSchema import QuestionTypeEnum
+from src.shared.exports import EXPORT_CHUNK_ROWS, EXPORT_FETCH_SIZE
+from src.shared.pagination import PageParams, decode_cursor, encode_cursor
+
+
+def _survey_answer_rows(survey_id: uuid.UUID) -> Select:
+    #only the columns the response needs, ordered by respondent so each one is finished before the next starts
+    return (
+        select(
+            Answer.user_id, User.name, User.lastname,
+            Question.id, Question.description, Question.type,
+            Option.id, Option.description, Option.points, Answer.text,
+        )
+        .join(Question, Answer.question_id == Question.id)
+        .join(User, Answer.user_id == User.id)
+        .outerjoin(Option, Answer.option_id == Option.id)
+        .where(Question.survey_id == survey_id)
+        .order_by(Answer.user_id, Question.number, Question.id, Option.description)
+    )
+
+
+class RespondentAnswers:
+    """Groups answer rows ordered by respondent into one response entry per respondent."""
+
+    def __init__(self):
+        self._current: Optional[dict] = None
+        self._questions: Dict[uuid.UUID, dict] = {}
+
+    def add(self, row: Tuple) -> Optional[dict]:
+        #returns the previous respondent once the rows move on to another one
+        user_id, name, lastname, question_id, description, question_type, option_id, option, points, text = row
+        finished = None
+
+        if self._current is None or self._current["user_id"] != str(user_id):
+            finished = self.finish()
+            self._current = {"user_id": str(user_id), "username": f"{name} {lastname or ''}", "questions": []}
+
+        question = self._questions.get(question_id)
+        if question is None:
+            question = self._questions[question_id] = {"id": str(question_id), "description": description, "type": question_type}
+            if question_type != QuestionTypeEnum.open:
+                question["options"] = []
+            self._current["questions"].append(question)
+
+        if question_type == QuestionTypeEnum.open:
+            question["text"] = text
+        elif option_id is not None:
+            question["options"].append({"id": str(option_id), "description": option, "points": points})
+
+        return finished
+
+    def finish(self) -> Optional[dict]:
+        finished, self._current = self._current, None
+        self._questions = {}
+        return finished
+
+
+def group_respondents(rows: Iterable[Tuple]) -> List[dict]:
+    respondents = RespondentAnswers()
+    grouped = [respondent for respondent in map(respondents.add, rows) if respondent is not None]
+
+    last = respondents.finish()
+    if last is not None:
+        grouped.append(last)
+    return grouped
+
+
+async def get_survey_answers_page(db: AsyncSession, survey_id: uuid.UUID, page: PageParams) -> Tuple[List[dict], Optional[str]]:
+    #pages are cut by respondent, from the bookkeeping table kept by the answers triggers,
+    #so a respondent's answers are never split between two pages
+    query = select(survey_respondent.c.user_id).where(survey_respondent.c.survey_id == survey_id)
+
+    if page.cursor:
+        after, = decode_cursor(page.cursor, (survey_respondent.c.user_id,))
+        query = query.where(survey_respondent.c.user_id > after)
+
+    result = await db.execute(query.order_by(survey_respondent.c.user_id).limit(page.limit + 1))
+    user_ids = result.scalars().all()
+
+    next_cursor = None
+    if len(user_ids) > page.limit:
+        user_ids = user_ids[:page.limit]
+        next_cursor = encode_cursor([user_ids[-1]])
+
+    if not user_ids:
+        return [], None
+
+    result = await db.execute(_survey_answer_rows(survey_id).where(Answer.user_id.in_(user_ids)))
+    return group_respondents(result.all()), next_cursor
+
+
+async def stream_survey_answers_ndjson(db: AsyncSession, survey_id: uuid.UUID) -> AsyncIterator[str]:
+    #one JSON line per respondent, read from a server-side cursor; the generator owns the session until the last chunk is sent
+    try:
+        result = await db.stream(_survey_answer_rows(survey_id).execution_options(yield_per=EXPORT_FETCH_SIZE))
+        respondents = RespondentAnswers()
+
+        lines = []
+        async for row in result:
+            finished = respondents.add(row)
+            if finished is None:
+                continue
+
+            lines.append(json.dumps(finished))
+            if len(lines) == EXPORT_CHUNK_ROWS:
+                yield "\n".join(lines) + "\n"
+                lines = []
+
+        last = respondents.finish()
+        if last is not None:
+            lines.append(json.dumps(last))
+        if lines:
+            yield "\n".join(lines) + "\n"
+
+    finally:
+        await db.close()
+
+
+async def get_user_answers(db: AsyncSession, user_id: uuid.UUID) -> List[dict]:
+    result = await db.execute(
+        select(Question.survey_id, Question.id, Question.type, Answer.option_id, Answer.text)
+        .join(Question, Answer.question_id == Question.id)
+        .where(Answer.user_id == user_id)
+        .order_by(Question.survey_id, Question.number, Question.id)
+    )
+
+    surveys: Dict[uuid.UUID, dict] = {}
+    questions: Dict[uuid.UUID, dict] = {}
+    for survey_id, question_id, question_type, option_id, text in result.all():
+        survey = surveys.get(survey_id)
+        if survey is None:
+            survey = surveys[survey_id] = {"survey_id": survey_id, "questions": []}
+
+        question = questions.get(question_id)
+        if question is None:
+            is_open = question_type == QuestionTypeEnum.open
+            question = questions[question_id] = {"id": str(question_id), "text": None, "options": None if is_open else []}
+            survey["questions"].append(question)
+
+        if question["options"] is None:
+            question["text"] = text
+        elif option_id is not None:
+            question["options"].append({"id": str(option_id)})
+
+    return list(surveys.values())
@@ -0,0 +1,299 @@
+import asyncio
+import logging
+import os
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence, Set, Tuple
+from dotenv import load_dotenv
+from sqlalchemy import and_, delete, func, literal_column, or_, select, update
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from src.database import SessionLocal
+from src.models.AnswerModel import Answer
+from src.models.ExportJobModel import ExportJob
+from src.models.OptionModel import Option
+from src.models.QuestionModel import Question
+from src.schemas.AnswerSchema import AvailableFormatsEnum, MultipleChoiceLayoutEnum
+from src.schemas.ExportJobSchema import ExportJobStatusEnum
+from src.shared.exports import EXPORT_FORMATS, load_export_questions
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+EXPORT_DIR = os.getenv("EXPORT_DIR", os.path.join(tempfile.gettempdir(), "surbased-exports"))
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", 2))
+#a running job renews its lease every third of this from a heartbeat task; jobs whose lease lapsed are run again by any process
+EXPORT_LEASE_SECONDS = int(os.getenv("EXPORT_LEASE_SECONDS", 60))
+#finished jobs and their artifacts are deleted after this many hours
+EXPORT_TTL_HOURS = int(os.getenv("EXPORT_TTL_HOURS", 24))
+EXPORT_SWEEP_INTERVAL_SECONDS = int(os.getenv("EXPORT_SWEEP_INTERVAL_SECONDS", 60))
+
+#jobs run outside of any request, so they open their own sessions
+job_session_factory = SessionLocal
+
+
+async def answers_fingerprint(db: AsyncSession, survey_id: uuid.UUID) -> Tuple[int, Optional[int], Optional[str]]:
+    #submissions replace answers with new rows, so any change to them moves the count or the highest sequence;
+    #the questions and options the headers are built from are hashed, they are few per survey
+    answers = (
+        select(func.count(Answer.id), func.max(Answer.sequence))
+        .join(Question, Answer.question_id == Question.id)
+        .where(Question.survey_id == survey_id)
+    )
+    definition = func.concat_ws("|", Question.id, Question.number, Question.type, Question.description, Option.description)
+    questions = (
+        select(func.md5(func.string_agg(definition, aggregate_order_by(literal_column("','"), Question.number, Option.description))))
+        .select_from(Question)
+        .outerjoin(Option, Option.question_id == Question.id)
+        .where(Question.survey_id == survey_id)
+        .correlate(None)
+        .scalar_subquery()
+    )
+    result = await db.execute(answers.add_columns(questions))
+    return tuple(result.one())
+
+
+def _lease() -> datetime:
+    return datetime.now() + timedelta(seconds=EXPORT_LEASE_SECONDS)
+
+
+def _leased(job_id: uuid.UUID, lease_token: uuid.UUID):
+    return and_(ExportJob.id == job_id, ExportJob.lease_token == lease_token)
+
+
+async def _heartbeat(job_id: uuid.UUID, lease_token: uuid.UUID) -> None:
+    #renews the lease on its own session for as long as the export runs, however long the writer goes without yielding
+    async with job_session_factory() as db:
+        while True:
+            await asyncio.sleep(EXPORT_LEASE_SECONDS / 3)
+            try:
+                result = await db.execute(update(ExportJob).where(_leased(job_id, lease_token)).values(lease_expires_at=_lease()))
+                await db.commit()
+            except Exception:
+                logger.exception("Export job %s could not renew its lease", job_id)
+                await db.rollback()
+                continue
+
+            if not result.rowcount:
+                logger.warning("Export job %s lease was taken over by another worker", job_id)
+                return
+
+
+async def run_export_job(job_id: uuid.UUID) -> None:
+    lease_token = uuid.uuid4()
+    async with job_session_factory() as db:
+        result = await db.execute(
+            update(ExportJob)
+            .where(
+                ExportJob.id == job_id,
+                or_(
+                    ExportJob.status == ExportJobStatusEnum.pending,
+                    and_(ExportJob.status == ExportJobStatusEnum.running, ExportJob.lease_expires_at < datetime.now()),
+                ),
+            )
+            .values(status=ExportJobStatusEnum.running, lease_expires_at=_lease(), lease_token=lease_token)
+            .returning(ExportJob.survey_id, ExportJob.format, ExportJob.multiple_choice)
+        )
+        claimed = result.first()
+        await db.commit()
+        if not claimed:
+            return
+
+        survey_id, format, multiple_choice = claimed
+        export_format = EXPORT_FORMATS[AvailableFormatsEnum(format)]
+        path = os.path.join(EXPORT_DIR, f"{job_id}.{export_format.extension}")
+        #every attempt writes its own file, a worker that lost its lease never writes into the file of the one that took over
+        partial_path = f"{path}.{lease_token}.part"
+        heartbeat = asyncio.create_task(_heartbeat(job_id, lease_token))
+        values = {}
+
+        try:
+            questions = await load_export_questions(db, survey_id)
+            #the session is not used again until the job finishes, so it does not hold a transaction open meanwhile
+            await db.commit()
+            os.makedirs(EXPORT_DIR, exist_ok=True)
+
+            #writers close the session they stream from, so they get one of their own
+            with open(partial_path, "wb") as file:
+                async for chunk in export_format.writer(job_session_factory(), survey_id, questions, MultipleChoiceLayoutEnum(multiple_choice)):
+                    await run_in_threadpool(file.write, chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+
+            #readers only ever see complete artifacts
+            os.replace(partial_path, path)
+            values = {"status": ExportJobStatusEnum.completed, "path": path, "size": os.path.getsize(path)}
+
+        except Exception as e:
+            logger.exception("Export job %s failed", job_id)
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            values = {"status": ExportJobStatusEnum.failed, "error": str(e)[:250]}
+
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+
+        await db.execute(
+            update(ExportJob)
+            .where(_leased(job_id, lease_token))
+            .values(finished_at=datetime.now(), lease_expires_at=None, lease_token=None, **values)
+        )
+        await db.commit()
+
+
+async def reclaim_export_jobs() -> List[uuid.UUID]:
+    #jobs of a process that died: running with a lapsed lease, or still pending a lease after they were requested
+    now = datetime.now()
+    async with job_session_factory() as db:
+        result = await db.execute(
+            select(ExportJob.id)
+            .where(or_(
+                and_(ExportJob.status == ExportJobStatusEnum.running, ExportJob.lease_expires_at < now),
+                and_(ExportJob.status == ExportJobStatusEnum.pending, ExportJob.created_at < now - timedelta(seconds=EXPORT_LEASE_SECONDS)),
+            ))
+            .order_by(ExportJob.created_at)
+        )
+        return result.scalars().all()
+
+
+def _remove_artifacts(paths: Sequence[str], cutoff: datetime) -> None:
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+    #files no job points to anymore, e.g. of surveys deleted since
+    if os.path.isdir(EXPORT_DIR):
+        for entry in os.scandir(EXPORT_DIR):
+            if entry.is_file() and datetime.fromtimestamp(entry.stat().st_mtime) < cutoff:
+                os.remove(entry.path)
+
+
+async def sweep_export_jobs(max_age_hours: int = EXPORT_TTL_HOURS) -> int:
+    cutoff = datetime.now() - timedelta(hours=max_age_hours)
+    async with job_session_factory() as db:
+        result = await db.execute(
+            delete(ExportJob)
+            .where(ExportJob.status.in_([ExportJobStatusEnum.completed, ExportJobStatusEnum.failed]), ExportJob.finished_at < cutoff)
+            .returning(ExportJob.path)
+        )
+        paths = result.scalars().all()
+        await db.commit()
+
+    await run_in_threadpool(_remove_artifacts, [path for path in paths if path], cutoff)
+    return len(paths)
+
+
+class ExportWorkerPool:
+    #a fixed number of asyncio workers consuming job ids; blocking file work is done in the threadpool by the writers.
+    #every EXPORT_SWEEP_INTERVAL_SECONDS it also picks up jobs abandoned by dead processes and deletes expired ones
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._loop = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._queued: Set[uuid.UUID] = set()
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._queued = set()
+        self._tasks = [loop.create_task(self._work()) for _ in range(self.workers)] + [loop.create_task(self._sweep())]
+
+    def submit(self, job_id: uuid.UUID) -> None:
+        self.start()
+        #the sweep finds jobs that are already waiting here
+        if job_id in self._queued:
+            return
+        self._queued.add(job_id)
+        self._queue.put_nowait(job_id)
+
+    async def join(self) -> None:
+        if self._queue is not None and self._loop is asyncio.get_running_loop():
+            await self._queue.join()
+
+    async def shutdown(self) -> None:
+        if self._loop is not asyncio.get_running_loop():
+            return
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._loop = None
+        self._queue = None
+        self._queued = set()
+        self._tasks = []
+
+    async def _work(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await run_export_job(job_id)
+            except Exception:
+                logger.exception("Export worker could not run job %s", job_id)
+            finally:
+                self._queued.discard(job_id)
+                self._queue.task_done()
+
+    async def _sweep(self) -> None:
+        while True:
+            try:
+                for job_id in await reclaim_export_jobs():
+                    self.submit(job_id)
+                swept = await sweep_export_jobs()
+                if swept:
+                    logger.info("Deleted %s expired export jobs", swept)
+            except Exception:
+                logger.exception("Export worker could not sweep export jobs")
+
+            await asyncio.sleep(EXPORT_SWEEP_INTERVAL_SECONDS)
+
+
+export_workers = ExportWorkerPool(EXPORT_WORKERS)
+
+
+async def request_export(db: AsyncSession, survey_id: uuid.UUID, format: AvailableFormatsEnum, multiple_choice: MultipleChoiceLayoutEnum, user_id: uuid.UUID) -> ExportJob:
+    answer_count, answers_sequence, questions_hash = await answers_fingerprint(db, survey_id)
+
+    #a job over the same answers is reused: finished artifacts are served again and pending ones are shared
+    result = await db.execute(
+        select(ExportJob)
+        .where(
+            ExportJob.survey_id == survey_id,
+            ExportJob.format == format,
+            ExportJob.multiple_choice == multiple_choice,
+            ExportJob.answer_count == answer_count,
+            ExportJob.answers_sequence.is_not_distinct_from(answers_sequence),
+            ExportJob.questions_hash.is_not_distinct_from(questions_hash),
+            ExportJob.status != ExportJobStatusEnum.failed,
+        )
+        .order_by(ExportJob.created_at.desc())
+        .limit(1)
+    )
+    job = result.scalars().first()
+    if job and (job.status != ExportJobStatusEnum.completed or os.path.exists(job.path)):
+        return job
+
+    job = ExportJob(
+        survey_id=survey_id,
+        requested_by=user_id,
+        format=format,
+        multiple_choice=multiple_choice,
+        status=ExportJobStatusEnum.pending,
+        answer_count=answer_count,
+        answers_sequence=answers_sequence,
+        questions_hash=questions_hash,
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+
+    export_workers.submit(job.id)
+    return job
@@ -0,0 +1,376 @@
+import csv
+import io
+import os
+import tempfile
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple, Union
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from openpyxl import Workbook
+import pyarrow as pa
+import pyarrow.parquet as pq
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.auth.Principal import Principal
+from src.models.AnswerModel import Answer
+from src.models.OptionModel import Option
+from src.models.QuestionModel import Question
+from src.models.SurveyModel import Survey
+from src.models.SurveyUserModel import survey_user
+from src.models.UserModel import User
+from src.schemas.AnswerSchema import AvailableFormatsEnum, MultipleChoiceLayoutEnum
+from src.schemas.QuestionSchema import QuestionTypeEnum
+from src.schemas.SurveySchema import SurveyScopeEnum
+from src.schemas.UserSchema import UserRoleEnum
+
+load_dotenv()
+
+
+#rows fetched per round trip from the server-side cursor
+EXPORT_FETCH_SIZE = int(os.getenv("EXPORT_FETCH_SIZE", 2000))
+#respondent rows written per chunk sent to the client
+EXPORT_CHUNK_ROWS = 500
+#bytes per chunk when sending a finished workbook
+EXPORT_FILE_CHUNK_BYTES = 64 * 1024
+MULTIPLE_VALUES_SEPARATOR = "; "
+
+#[since, until) transaction ids: only respondents with answers written by transactions in that range are exported
+ExportWindow = Tuple[int, int]
+
+
+@dataclass(frozen=True)
+class ExportQuestion:
+    id: uuid.UUID
+    description: str
+    type: str
+    options: Tuple[str, ...]
+    #header of the question's column, unique within the export
+    column: str
+
+
+async def get_exportable_survey(db: AsyncSession, survey_id: uuid.UUID, current_user: Principal) -> Survey:
+    result = await db.execute(select(Survey).where(Survey.id == survey_id))
+    survey = result.scalars().first()
+
+    if not survey:
+        raise HTTPException(status_code=404, detail="Survey not found")
+
+    if survey.scope == SurveyScopeEnum.private:
+        result = await db.execute(
+            select(survey_user.c.user_id).where(survey_user.c.user_id == current_user.id, survey_user.c.survey_id == survey_id)
+        )
+        assignment = result.first()
+
+        if not assignment and survey.owner_id != current_user.id and current_user.role != UserRoleEnum.admin:
+            raise HTTPException(status_code=403, detail="Access denied: User not assigned to this survey")
+
+    elif survey.scope == SurveyScopeEnum.organization:
+        if current_user.organization_id != survey.organization_id and current_user.role != UserRoleEnum.admin:
+            raise HTTPException(status_code=403, detail="Access denied: User not in the same organization")
+
+    return survey
+
+
+async def load_export_questions(db: AsyncSession, survey_id: uuid.UUID) -> List[ExportQuestion]:
+    result = await db.execute(
+        select(Question.id, Question.number, Question.description, Question.type, Option.description)
+        .outerjoin(Option, Option.question_id == Question.id)
+        .where(Question.survey_id == survey_id)
+        .order_by(Question.number, Option.description)
+    )
+
+    questions = {}
+    options = {}
+    for question_id, number, description, question_type, option in result.all():
+        if question_id not in questions:
+            questions[question_id] = (number, description, question_type)
+            options[question_id] = []
+        if option is not None:
+            options[question_id].append(option)
+
+    #columnar schemas need unique field names: repeated descriptions, and one named like the user column, get the question number
+    repeated = Counter(description for _, description, _ in questions.values())
+    repeated["user"] += 2
+
+    return [
+        ExportQuestion(
+            id=question_id,
+            description=description,
+            type=question_type,
+            options=tuple(options[question_id]),
+            column=f"{description} ({number})" if repeated[description] > 1 else description,
+        )
+        for question_id, (number, description, question_type) in questions.items()
+    ]
+
+
+def _one_hot(question: ExportQuestion, layout: MultipleChoiceLayoutEnum) -> bool:
+    return layout == MultipleChoiceLayoutEnum.one_hot and question.type == QuestionTypeEnum.multiple_choice
+
+
+def export_header(questions: List[ExportQuestion], layout: MultipleChoiceLayoutEnum = MultipleChoiceLayoutEnum.joined) -> List[str]:
+    header = ["user"]
+    for q in questions:
+        if _one_hot(q, layout):
+            header.extend(f"{q.column}: {option}" for option in q.options)
+        else:
+            header.append(q.column)
+    return header
+
+
+def _wide_row(email: str, cells: Dict[uuid.UUID, List[str]], questions: List[ExportQuestion], layout: MultipleChoiceLayoutEnum) -> List[Union[str, int]]:
+    #multiple choice answers are aggregated per cell: joined labels or one 1/0 column per option
+    row = [email]
+    for q in questions:
+        values = cells.get(q.id, [])
+        if _one_hot(q, layout):
+            selected = set(values)
+            row.extend(1 if option in selected else 0 for option in q.options)
+        else:
+            row.append(MULTIPLE_VALUES_SEPARATOR.join(values))
+    return row
+
+
+async def get_export_watermark(db: AsyncSession) -> int:
+    #every transaction below the oldest one still running has finished, so no answer can be committed below this
+    #watermark later; answers of transactions still in flight fall in the next export's window
+    result = await db.execute(select(text("pg_snapshot_xmin(pg_current_snapshot())::text::bigint")))
+    return result.scalar_one()
+
+
+async def iter_respondents(db: AsyncSession, survey_id: uuid.UUID, window: Optional[ExportWindow] = None) -> AsyncIterator[Tuple[str, Dict[uuid.UUID, List[str]]]]:
+    #answers are streamed ordered by respondent, so only one respondent is held in memory at a time
+    query = (
+        select(User.email, Answer.question_id, Option.description, Answer.text)
+        .join(Answer, Answer.user_id == User.id)
+        .join(Question, Answer.question_id == Question.id)
+        .outerjoin(Option, Answer.option_id == Option.id)
+        .where(Question.survey_id == survey_id)
+    )
+
+    if window is not None:
+        #changed respondents are exported with all their current answers, so consumers can replace their rows
+        since, until = window
+        changed = (
+            select(Answer.user_id)
+            .join(Question, Answer.question_id == Question.id)
+            .where(Question.survey_id == survey_id, Answer.xact_id >= since, Answer.xact_id < until)
+        )
+        query = query.where(User.id.in_(changed))
+
+    result = await db.stream(
+        query
+        .order_by(User.email, Question.number, Option.description)
+        .execution_options(yield_per=EXPORT_FETCH_SIZE)
+    )
+
+    current_email = None
+    cells = {}
+    async for email, question_id, option, text in result:
+        if email != current_email:
+            if current_email is not None:
+                yield current_email, cells
+            current_email = email
+            cells = {}
+
+        #a question answered without a selection is kept as an empty cell, unanswered ones have none
+        answered = cells.setdefault(question_id, [])
+        value = option if option is not None else text
+        if value is not None:
+            answered.append(value)
+
+    if current_email is not None:
+        yield current_email, cells
+
+
+async def iter_respondent_rows(db: AsyncSession, survey_id: uuid.UUID, questions: List[ExportQuestion], layout: MultipleChoiceLayoutEnum, window: Optional[ExportWindow]) -> AsyncIterator[List[Union[str, int]]]:
+    async for email, cells in iter_respondents(db, survey_id, window):
+        yield _wide_row(email, cells, questions, layout)
+
+
+async def stream_csv_export(db: AsyncSession, survey_id: uuid.UUID, questions: List[ExportQuestion], layout: MultipleChoiceLayoutEnum = MultipleChoiceLayoutEnum.joined, window: Optional[ExportWindow] = None) -> AsyncIterator[str]:
+    #the generator owns the session until the last chunk is sent
+    try:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(export_header(questions, layout))
+
+        rows = 0
+        async for row in iter_respondent_rows(db, survey_id, questions, layout, window):
+            writer.writerow(row)
+            rows += 1
+            if rows % EXPORT_CHUNK_ROWS == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+        yield buffer.getvalue()
+
+    finally:
+        await db.close()
+
+
+def _append_rows(sheet, rows: List[List[str]]) -> None:
+    for row in rows:
+        sheet.append(row)
+
+
+async def stream_xlsx_export(db: AsyncSession, survey_id: uuid.UUID, questions: List[ExportQuestion], layout: MultipleChoiceLayoutEnum = MultipleChoiceLayoutEnum.joined, window: Optional[ExportWindow] = None) -> AsyncIterator[bytes]:
+    #write-only workbooks keep rows in a temporary file instead of building the sheet in memory,
+    #and every openpyxl call runs in the threadpool so the event loop keeps serving other requests
+    try:
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet("Answers")
+
+        batch = [export_header(questions, layout)]
+        async for row in iter_respondent_rows(db, survey_id, questions, layout, window):
+            batch.append(row)
+            if len(batch) >= EXPORT_CHUNK_ROWS:
+                await run_in_threadpool(_append_rows, sheet, batch)
+                batch = []
+
+        await run_in_threadpool(_append_rows, sheet, batch)
+
+    finally:
+        await db.close()
+
+    #the zip container can only be written once every row is known
+    with tempfile.TemporaryFile() as file:
+        await run_in_threadpool(workbook.save, file)
+        file.seek(0)
+
+        while chunk := await run_in_threadpool(file.read, EXPORT_FILE_CHUNK_BYTES):
+            yield chunk
+
+
+class _ChunkSink(io.RawIOBase):
+    #write-only file object that hands out what has been written so far; tell() keeps counting so parquet offsets stay valid
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _label_type() -> pa.DataType:
+    return pa.dictionary(pa.int32(), pa.string())
+
+
+def columnar_schema(questions: List[ExportQuestion]) -> pa.Schema:
+    fields = [pa.field("user", pa.string(), nullable=False)]
+    for q in questions:
+        if q.type == QuestionTypeEnum.open:
+            fields.append(pa.field(q.column, pa.string()))
+        elif q.type == QuestionTypeEnum.multiple_choice:
+            fields.append(pa.field(q.column, pa.list_(_label_type())))
+        else:
+            fields.append(pa.field(q.column, _label_type()))
+    return pa.schema(fields)
+
+
+def _record_batch(respondents: List[Tuple[str, Dict[uuid.UUID, List[str]]]], questions: List[ExportQuestion], schema: pa.Schema) -> pa.RecordBatch:
+    #option labels are indices into the question's full option list, so every batch shares the same dictionary
+    columns = [pa.array([email for email, _ in respondents], pa.string())]
+
+    for q in questions:
+        values = [cells.get(q.id) for _, cells in respondents]
+
+        if q.type == QuestionTypeEnum.open:
+            columns.append(pa.array([MULTIPLE_VALUES_SEPARATOR.join(v) if v else None for v in values], pa.string()))
+            continue
+
+        positions = {}
+        for position, option in enumerate(q.options):
+            positions.setdefault(option, position)
+        dictionary = pa.array(q.options, pa.string())
+
+        #free text stored on a choice question has no label to point to, so it is left out instead of failing the export
+        selected = [None if v is None else [positions[option] for option in v if option in positions] for v in values]
+
+        if q.type == QuestionTypeEnum.multiple_choice:
+            #unanswered is null, answered without a selection is an empty list
+            offsets = [0]
+            indices = []
+            for chosen in selected:
+                indices.extend(chosen or [])
+                offsets.append(len(indices))
+            labels = pa.DictionaryArray.from_arrays(pa.array(indices, pa.int32()), dictionary)
+            unanswered = pa.array([chosen is None for chosen in selected], pa.bool_())
+            columns.append(pa.ListArray.from_arrays(pa.array(offsets, pa.int32()), labels, mask=unanswered))
+        else:
+            indices = pa.array([chosen[0] if chosen else None for chosen in selected], pa.int32())
+            columns.append(pa.DictionaryArray.from_arrays(indices, dictionary))
+
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def _write_batch(writer, respondents: List[Tuple[str, Dict[uuid.UUID, List[str]]]], questions: List[ExportQuestion], schema: pa.Schema) -> None:
+    writer.write_batch(_record_batch(respondents, questions, schema))
+
+
+async def _stream_columnar_export(db: AsyncSession, survey_id: uuid.UUID, questions: List[ExportQuestion], window: Optional[ExportWindow], open_writer: Callable[[_ChunkSink, pa.Schema], object]) -> AsyncIterator[bytes]:
+    #each batch of respondents becomes one record batch (a row group in parquet) and is sent as soon as it is encoded
+    schema = columnar_schema(questions)
+    sink = _ChunkSink()
+    writer = open_writer(sink, schema)
+
+    try:
+        batch = []
+        async for respondent in iter_respondents(db, survey_id, window):
+            batch.append(respondent)
+            if len(batch) >= EXPORT_CHUNK_ROWS:
+                await run_in_threadpool(_write_batch, writer, batch, questions, schema)
+                batch = []
+                yield sink.drain()
+
+        if batch:
+            await run_in_threadpool(_write_batch, writer, batch, questions, schema)
+
+    finally:
+        await db.close()
+
+    await run_in_threadpool(writer.close)
+    yield sink.drain()
+
+
+#columnar files always store multiple choice answers as list columns, so the layout does not apply to them
+def stream_parquet_export(db: AsyncSession, survey_id: uuid.UUID, questions: List[ExportQuestion], layout: MultipleChoiceLayoutEnum = MultipleChoiceLayoutEnum.joined, window: Optional[ExportWindow] = None) -> AsyncIterator[bytes]:
+    return _stream_columnar_export(db, survey_id, questions, window, lambda sink, schema: pq.ParquetWriter(sink, schema))
+
+
+def stream_arrow_export(db: AsyncSession, survey_id: uuid.UUID, questions: List[ExportQuestion], layout: MultipleChoiceLayoutEnum = MultipleChoiceLayoutEnum.joined, window: Optional[ExportWindow] = None) -> AsyncIterator[bytes]:
+    return _stream_columnar_export(db, survey_id, questions, window, pa.ipc.new_stream)
+
+
+@dataclass(frozen=True)
+class ExportFormat:
+    #writer(db, survey_id, questions, layout, window) streams the file and closes the session when done
+    writer: Callable[..., AsyncIterator[Union[str, bytes]]]
+    media_type: str
+    extension: str
+
+
+EXPORT_FORMATS: Dict[AvailableFormatsEnum, ExportFormat] = {
+    AvailableFormatsEnum.csv: ExportFormat(stream_csv_export, "text/csv", "csv"),
+    AvailableFormatsEnum.excel: ExportFormat(stream_xlsx_export, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+    AvailableFormatsEnum.parquet: ExportFormat(stream_parquet_export, "application/vnd.apache.parquet", "parquet"),
+    AvailableFormatsEnum.arrow: ExportFormat(stream_arrow_export, "application/vnd.apache.arrow.stream", "arrows"),
+}
@@ -0,0 +1,31 @@
+import os
+from datetime import datetime, timedelta
+from typing import Collection
+from dotenv import load_dotenv
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.models.NotificationOutboxModel import NotificationOutbox
+from src.models.UserFcmTokenModel import UserFcmToken
+
+load_dotenv()
+
+
+#devices that have not registered their token again in this many days are forgotten; the app registers it on every login
+FCM_TOKEN_MAX_AGE_DAYS = int(os.getenv("FCM_TOKEN_MAX_AGE_DAYS", 60))
+FCM_TOKEN_SWEEP_INTERVAL_SECONDS = int(os.getenv("FCM_TOKEN_SWEEP_INTERVAL_SECONDS", 24 * 60 * 60))
+
+
+async def prune_fcm_tokens(db: AsyncSession, tokens: Collection[str]) -> int:
+    #tokens FCM reported as dead go for every user that registered them, with whatever is still queued for them
+    if not tokens:
+        return 0
+
+    result = await db.execute(delete(UserFcmToken).where(UserFcmToken.fcm_token.in_(tokens)))
+    await db.execute(delete(NotificationOutbox).where(NotificationOutbox.token.in_(tokens)))
+    return result.rowcount
+
+
+async def sweep_stale_fcm_tokens(db: AsyncSession, max_age_days: int = FCM_TOKEN_MAX_AGE_DAYS) -> int:
+    result = await db.execute(delete(UserFcmToken).where(UserFcmToken.updated_at < datetime.now() - timedelta(days=max_age_days)))
+    await db.commit()
+    return result.rowcount
@@ -0,0 +1,18 @@
+from sqlalchemy.orm import selectinload
+from src.models.SurveyModel import Survey
+from src.models.QuestionModel import Question
+
+
+# Loader profiles: relationships are declared with lazy="raise" in the models, so every
+# query that needs related rows has to ask for them explicitly with .options(*PROFILE)
+
+# survey with everything SurveyResponse serializes (questions -> options and tags)
+SURVEY_DETAIL = (
+    selectinload(Survey.questions).selectinload(Question.options),
+    selectinload(Survey.tags),
+)
+
+# survey with its questions and options, used when editing the questionnaire
+SURVEY_QUESTIONS = (
+    selectinload(Survey.questions).selectinload(Question.options),
+)
@@ -0,0 +1,237 @@
+import asyncio
+import logging
+import os
+import random
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+from dotenv import load_dotenv
+from sqlalchemy import JSON, Select, delete, func, insert, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.database import SessionLocal
+from src.models.NotificationOutboxModel import NotificationOutbox
+from src.models.UserFcmTokenModel import UserFcmToken
+from src.models.UserModel import User
+from src.schemas.NotificationSchema import NotificationOutboxStatusEnum, NotificationRequest
+from src.shared.fcm_tokens import FCM_TOKEN_SWEEP_INTERVAL_SECONDS, prune_fcm_tokens, sweep_stale_fcm_tokens
+from src.shared.notifications import fcm_client, is_dead_token_error, notification_content
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+#rows claimed at once by a dispatcher worker, 500 is the most FCM accepts in one multicast
+NOTIFICATION_BATCH_SIZE = int(os.getenv("NOTIFICATION_BATCH_SIZE", 500))
+#chunks sent at the same time
+NOTIFICATION_WORKERS = int(os.getenv("NOTIFICATION_WORKERS", 4))
+#messages of a chunk in flight to FCM at the same time
+NOTIFICATION_CONCURRENCY = int(os.getenv("NOTIFICATION_CONCURRENCY", 100))
+NOTIFICATION_MAX_ATTEMPTS = int(os.getenv("NOTIFICATION_MAX_ATTEMPTS", 5))
+NOTIFICATION_RETRY_BASE_SECONDS = int(os.getenv("NOTIFICATION_RETRY_BASE_SECONDS", 5))
+NOTIFICATION_RETRY_MAX_SECONDS = int(os.getenv("NOTIFICATION_RETRY_MAX_SECONDS", 900))
+#how often the dispatcher looks for due retries when nothing wakes it up
+NOTIFICATION_POLL_SECONDS = float(os.getenv("NOTIFICATION_POLL_SECONDS", 30))
+#claimed rows are hidden from other dispatchers for this long, in case this one dies mid-chunk
+NOTIFICATION_LEASE_SECONDS = 300
+
+#the dispatcher runs outside of any request, so it opens its own sessions
+outbox_session_factory = SessionLocal
+
+SENT = "sent"
+RETRY = "retry"
+DEAD = "dead"
+#the device token is gone: the token is deleted instead of retrying or dead-lettering the message
+PRUNE = "prune"
+
+
+async def enqueue_notifications(db: AsyncSession, user_ids: Union[Sequence[uuid.UUID], Select], payload: NotificationRequest) -> int:
+    #queued in the caller's transaction and sent by the dispatcher, so a failed send cannot undo the change it announces
+    devices = (
+        select(UserFcmToken.fcm_token, literal(notification_content(payload), JSON))
+        .join(User, UserFcmToken.user_id == User.id)
+        .where(UserFcmToken.user_id.in_(user_ids), User.allow_notifications.is_(True))
+    )
+    result = await db.execute(insert(NotificationOutbox).from_select([NotificationOutbox.token, NotificationOutbox.message], devices))
+    return result.rowcount
+
+
+def retry_delay(attempts: int) -> float:
+    #exponential backoff with jitter, so messages that failed together are not retried together
+    delay = min(NOTIFICATION_RETRY_BASE_SECONDS * 2 ** (attempts - 1), NOTIFICATION_RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.5, 1)
+
+
+async def _deliver(token: str, message: dict, limit: asyncio.Semaphore) -> Tuple[str, Optional[str]]:
+    async with limit:
+        try:
+            response = await fcm_client.send({"token": token, **message})
+        except Exception as e:
+            return RETRY, str(e)[:250] or type(e).__name__
+
+    if response.status_code == 200:
+        return SENT, None
+
+    if is_dead_token_error(response):
+        return PRUNE, None
+
+    error = f"{response.status_code} {response.text}"[:250]
+    #throttling and server errors are transient, any other rejection will not change on a retry
+    if response.status_code == 429 or response.status_code >= 500:
+        return RETRY, error
+    return DEAD, error
+
+
+@dataclass
+class DispatchResult:
+    #accounting of one chunk, or of every chunk sent by a drain
+    claimed: int = 0
+    sent: int = 0
+    retried: int = 0
+    dead: int = 0
+    pruned: int = 0
+
+    def add(self, other: "DispatchResult") -> None:
+        self.claimed += other.claimed
+        self.sent += other.sent
+        self.retried += other.retried
+        self.dead += other.dead
+        self.pruned += other.pruned
+
+
+async def dispatch_batch() -> DispatchResult:
+    async with outbox_session_factory() as db:
+        due = (
+            select(NotificationOutbox.id)
+            .where(NotificationOutbox.status == NotificationOutboxStatusEnum.pending, NotificationOutbox.next_attempt_at <= func.now())
+            .order_by(NotificationOutbox.next_attempt_at)
+            .limit(NOTIFICATION_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        result = await db.execute(
+            update(NotificationOutbox)
+            .where(NotificationOutbox.id.in_(due))
+            .values(next_attempt_at=func.now() + timedelta(seconds=NOTIFICATION_LEASE_SECONDS), attempts=NotificationOutbox.attempts + 1)
+            .returning(NotificationOutbox.id, NotificationOutbox.token, NotificationOutbox.message, NotificationOutbox.attempts)
+        )
+        claimed = result.all()
+        await db.commit()
+        if not claimed:
+            return DispatchResult()
+
+        limit = asyncio.Semaphore(NOTIFICATION_CONCURRENCY)
+        outcomes = await asyncio.gather(*(_deliver(token, message, limit) for _, token, message, _ in claimed))
+
+        #rows are settled with one statement per outcome, error and attempt count rather than one per row
+        chunk = DispatchResult(claimed=len(claimed))
+        sent: List[uuid.UUID] = []
+        dead_tokens = set()
+        failed: Dict[Tuple[str, Optional[str], int], List[uuid.UUID]] = defaultdict(list)
+        for (id, token, _, attempts), (outcome, error) in zip(claimed, outcomes):
+            if outcome == SENT:
+                sent.append(id)
+            elif outcome == PRUNE:
+                dead_tokens.add(token)
+                chunk.pruned += 1
+            elif outcome == RETRY and attempts < NOTIFICATION_MAX_ATTEMPTS:
+                failed[RETRY, error, attempts].append(id)
+            else:
+                failed[DEAD, error, attempts].append(id)
+
+        if sent:
+            await db.execute(delete(NotificationOutbox).where(NotificationOutbox.id.in_(sent)))
+            chunk.sent = len(sent)
+
+        for (outcome, error, attempts), ids in failed.items():
+            if outcome == RETRY:
+                values = {"next_attempt_at": func.now() + timedelta(seconds=retry_delay(attempts)), "last_error": error}
+                chunk.retried += len(ids)
+            else:
+                values = {"status": NotificationOutboxStatusEnum.dead, "last_error": error}
+                chunk.dead += len(ids)
+            await db.execute(update(NotificationOutbox).where(NotificationOutbox.id.in_(ids)).values(**values))
+
+        await prune_fcm_tokens(db, dead_tokens)
+        await db.commit()
+
+    if chunk.dead:
+        logger.warning("Notification chunk dead-lettered %s of %s messages", chunk.dead, chunk.claimed)
+    logger.info("Notification chunk: %s", chunk)
+    return chunk
+
+
+async def drain_outbox() -> DispatchResult:
+    #NOTIFICATION_WORKERS chunks are in flight at a time, each worker claiming the next one until the outbox has nothing due;
+    #a burst of notifications is spread at NOTIFICATION_WORKERS * NOTIFICATION_CONCURRENCY messages at a time
+    total = DispatchResult()
+
+    async def work() -> None:
+        while True:
+            chunk = await dispatch_batch()
+            total.add(chunk)
+            if chunk.claimed < NOTIFICATION_BATCH_SIZE:
+                return
+
+    await asyncio.gather(*(work() for _ in range(NOTIFICATION_WORKERS)))
+    return total
+
+
+class NotificationDispatcher:
+    #a single asyncio task draining the outbox when woken up, and every NOTIFICATION_POLL_SECONDS for due retries;
+    #it also deletes stale device tokens every FCM_TOKEN_SWEEP_INTERVAL_SECONDS
+
+    def __init__(self):
+        self._loop = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._next_sweep = 0.0
+
+    def wake(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+        self._wakeup.set()
+
+    async def shutdown(self) -> None:
+        if self._loop is not asyncio.get_running_loop():
+            return
+
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._loop = None
+        self._task = None
+        self._wakeup = None
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                await drain_outbox()
+            except Exception:
+                logger.exception("Notification dispatcher could not drain the outbox")
+
+            if time.monotonic() >= self._next_sweep:
+                self._next_sweep = time.monotonic() + FCM_TOKEN_SWEEP_INTERVAL_SECONDS
+                await self._sweep()
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), NOTIFICATION_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _sweep(self) -> None:
+        try:
+            async with outbox_session_factory() as db:
+                swept = await sweep_stale_fcm_tokens(db)
+            if swept:
+                logger.info("Deleted %s stale FCM tokens", swept)
+        except Exception:
+            logger.exception("Notification dispatcher could not sweep stale FCM tokens")
+
+
+notification_dispatcher = NotificationDispatcher()
@@ -1,58 +1,172 @@
-import json
+import asyncio
+import logging
 import os
-from firebase_admin import messaging
-from google.oauth2 import service_account
-import google.auth.transport.requests 
-import requests
-from typing import TYPE_CHECKING
+import time
+from datetime import datetime
+from typing import Optional
+import httpx
+from dotenv import load_dotenv
 from google.auth.transport.requests import Request
+from google.oauth2 import service_account
+from starlette.concurrency import run_in_threadpool
 from src.schemas.NotificationSchema import NotificationRequest
 
-def send_notification(payload: NotificationRequest):
+load_dotenv()
 
+logger = logging.getLogger(__name__)
 
-    if not payload.token:
-        print("No token provided for notification")
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+FCM_PROJECT_ID = os.getenv("FCM_PROJECT_ID", "surbased-9d626")
+FCM_CREDENTIALS_FILE = os.getenv("FCM_CREDENTIALS_FILE", os.path.join(API_DIR, "surbased-9d626-firebase-adminsdk-fbsvc-5b498651ed.json"))
+FCM_SCOPES = ["https://www.googleapis.com/auth/cloud-platform"]
+#access tokens last an hour, they are refreshed this many seconds before they expire
+FCM_TOKEN_REFRESH_MARGIN_SECONDS = int(os.getenv("FCM_TOKEN_REFRESH_MARGIN_SECONDS", 300))
+FCM_TIMEOUT_SECONDS = float(os.getenv("FCM_TIMEOUT_SECONDS", 10))
+FCM_MAX_CONNECTIONS = int(os.getenv("FCM_MAX_CONNECTIONS", 20))
+#error codes meaning the device token will never work again
+FCM_DEAD_TOKEN_ERRORS = {"UNREGISTERED", "SENDER_ID_MISMATCH"}
+
+
+class FcmClient:
+    """FCM HTTP v1 client sharing one HTTP/2 keep-alive connection pool and one cached OAuth token.
+
+    The service account file is read once. Concurrent callers that find the token expired
+    wait for a single refresh instead of each doing their own.
+    """
+
+    def __init__(self, project_id: str, credentials_file: str, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.url = f"https://fcm.googleapis.com/v1/projects/{project_id}/messages:send"
+        self.credentials_file = credentials_file
+        self.transport = transport
+        self._credentials: Optional[service_account.Credentials] = None
+        self._token: Optional[str] = None
+        self._token_deadline = 0.0
+        self._refresh: Optional[asyncio.Future] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop = None
+
+    def _http(self) -> httpx.AsyncClient:
+        #the pool belongs to the event loop it was opened on
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._loop = loop
+            self._client = httpx.AsyncClient(
+                transport=self.transport,
+                #fan-outs multiplex many messages over each connection
+                http2=True,
+                timeout=FCM_TIMEOUT_SECONDS,
+                limits=httpx.Limits(max_connections=FCM_MAX_CONNECTIONS, max_keepalive_connections=FCM_MAX_CONNECTIONS),
+            )
+        return self._client
+
+    def _fetch_token(self):
+        if self._credentials is None:
+            self._credentials = service_account.Credentials.from_service_account_file(self.credentials_file, scopes=FCM_SCOPES)
+
+        self._credentials.refresh(Request())
+        #google-auth reports the expiry as a naive UTC datetime
+        lifetime = (self._credentials.expiry - datetime.utcnow()).total_seconds()
+        return self._credentials.token, time.monotonic() + lifetime - FCM_TOKEN_REFRESH_MARGIN_SECONDS
+
+    async def access_token(self) -> str:
+        if self._token is not None and time.monotonic() < self._token_deadline:
+            return self._token
+
+        refresh = self._refresh
+        if refresh is not None and refresh.get_loop() is asyncio.get_running_loop():
+            return await asyncio.shield(refresh)
+
+        refresh = self._refresh = asyncio.get_running_loop().create_future()
+        try:
+            #the refresh is a blocking signed-JWT exchange, done once per token lifetime
+            self._token, self._token_deadline = await run_in_threadpool(self._fetch_token)
+        except asyncio.CancelledError:
+            refresh.cancel()
+            raise
+        except Exception as e:
+            refresh.set_exception(e)
+            #retrieve it so an exception nobody waited for is not reported as unhandled
+            refresh.exception()
+            raise
+        finally:
+            if self._refresh is refresh:
+                self._refresh = None
+
+        refresh.set_result(self._token)
+        return self._token
+
+    def invalidate_token(self) -> None:
+        self._token = None
+        self._token_deadline = 0.0
+
+    async def send(self, message: dict) -> httpx.Response:
+        token = await self.access_token()
+        response = await self._http().post(self.url, json={"message": message}, headers={"Authorization": f"Bearer {token}"})
+
+        if response.status_code == 401:
+            #revoked before its expiry: refresh once and retry
+            self.invalidate_token()
+            token = await self.access_token()
+            response = await self._http().post(self.url, json={"message": message}, headers={"Authorization": f"Bearer {token}"})
+
+        return response
+
+    async def aclose(self) -> None:
+        if self._client is not None and self._loop is asyncio.get_running_loop():
+            await self._client.aclose()
+        self._client = None
+        self._loop = None
+
+
+fcm_client = FcmClient(FCM_PROJECT_ID, FCM_CREDENTIALS_FILE)
+
+
+def is_dead_token_error(response: httpx.Response) -> bool:
+    try:
+        error = response.json().get("error") or {}
+    except ValueError:
         return False
-        
-    url = f"https://fcm.googleapis.com/v1/projects/surbased-9d626/messages:send"
-
-
-    message = {
-        "message": {
-            "token": payload.token,
-            "notification": {
-                "title": payload.title,
-                "body": payload.body
-            },
-            "data": {
-                "survey_id": str(payload.survey_id),
-                "survey_name": payload.survey_name,
-                "email": payload.email,
-                "user_id": str(payload.user_id)
-            }
-        }
-    }
 
-    headers = {
-        "Authorization": f"Bearer {get_access_token()}",
-        "Content-Type": "application/json"
+    codes = {detail.get("errorCode") for detail in error.get("details", []) if isinstance(detail, dict)}
+    if codes & FCM_DEAD_TOKEN_ERRORS:
+        return True
+    #INVALID_ARGUMENT is also used for malformed messages, only a rejected token is dead
+    return "INVALID_ARGUMENT" in codes and "registration token" in error.get("message", "")
+
+
+def notification_content(payload: NotificationRequest) -> dict:
+    #the message without its device token, shared by every device of the recipients
+    data = {
+        "type": payload.type,
+        "survey_id": payload.survey_id,
+        "survey_name": payload.survey_name,
+        "email": payload.email,
+        "user_id": payload.user_id,
+    }
+    return {
+        "notification": {
+            "title": payload.title,
+            "body": payload.body
+        },
+        #FCM data values must be strings, unset fields are left out
+        "data": {key: str(value) for key, value in data.items() if value is not None}
     }
 
-    response = requests.post(url, headers=headers, data=json.dumps(message))
 
-    print(payload)
+def build_message(payload: NotificationRequest) -> dict:
+    return {"token": payload.token, **notification_content(payload)}
 
-    print("status code: ", response.status_code, "response: ", response.json() )
-     
-    return response.json()
 
+async def send_notification(payload: NotificationRequest):
+    if not payload.token:
+        print("No token provided for notification")
+        return False
 
-def  get_access_token():
-    api_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-    credentials = service_account.Credentials.from_service_account_file(os.path.join(api_dir, 'surbased-9d626-firebase-adminsdk-fbsvc-5b498651ed.json'), scopes=['https://www.googleapis.com/auth/cloud-platform'])
-    credentials.refresh(Request())
-    return credentials.token
-    
+    response = await fcm_client.send(build_message(payload))
 
+    if response.status_code != 200:
+        logger.warning("FCM rejected notification: %s %s", response.status_code, response.text)
 
+    return response.json()
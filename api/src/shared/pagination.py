@@ -0,0 +1,91 @@
+import base64
+import binascii
+import json
+import os
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+from dotenv import load_dotenv
+from fastapi import HTTPException, Query
+from sqlalchemy import Select, tuple_
+
+load_dotenv()
+
+
+DEFAULT_PAGE_SIZE = int(os.getenv("PAGE_SIZE_DEFAULT", 100))
+MAX_PAGE_SIZE = int(os.getenv("PAGE_SIZE_MAX", 500))
+
+
+@dataclass(frozen=True)
+class PageParams:
+    cursor: Optional[str]
+    limit: int
+
+
+def page_params(cursor: Optional[str] = None, limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)) -> PageParams:
+    return PageParams(cursor=cursor, limit=limit)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([str(v) if v is not None else None for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _from_cursor_value(value: Any, column) -> Any:
+    if value is None:
+        return None
+    #encode_cursor only writes strings, anything else was not issued by us
+    if not isinstance(value, str):
+        raise ValueError("cursor values must be strings")
+
+    python_type = column.type.python_type
+
+    if python_type is uuid.UUID:
+        return uuid.UUID(value)
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("cursor does not match the sort key")
+
+        return [_from_cursor_value(v, c) for v, c in zip(values, columns)]
+
+    except (ValueError, TypeError, binascii.Error, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def paginate(query: Select, sort_column, tiebreaker, page: PageParams, descending: bool = False) -> Select:
+    #keyset pagination over (sort_column, tiebreaker); the tiebreaker must be unique (usually the primary key)
+    key = tuple_(sort_column, tiebreaker)
+
+    if page.cursor:
+        values = tuple_(*decode_cursor(page.cursor, (sort_column, tiebreaker)))
+        query = query.where(key < values if descending else key > values)
+
+    if descending:
+        query = query.order_by(sort_column.desc(), tiebreaker.desc())
+    else:
+        query = query.order_by(sort_column.asc(), tiebreaker.asc())
+
+    #one extra row tells whether there is a next page
+    return query.limit(page.limit + 1)
+
+
+def page_rows(rows: Sequence, page: PageParams, key: Callable[[Any], Tuple]) -> Tuple[List, Optional[str]]:
+    rows = list(rows)
+
+    if len(rows) <= page.limit:
+        return rows, None
+
+    rows = rows[:page.limit]
+    return rows, encode_cursor(key(rows[-1]))
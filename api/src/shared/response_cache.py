@@ -0,0 +1,109 @@
+import asyncio
+import os
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+from cachetools import TTLCache
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class ResponseCache:
+    """In-process TTL cache for responses that are the same for every caller.
+
+    Concurrent misses on a key share one computation; if its caller is cancelled, a waiter
+    computes the value again. invalidate() drops the entries of a key, or of every key, and
+    makes their computations that started before it return their result without caching it.
+    Values must not hold ORM objects: cache the validated response schema instead.
+    """
+
+    def __init__(self, ttl: int, maxsize: int = 256):
+        self._cache: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        while True:
+            if key in self._cache:
+                self.hits += 1
+                return self._cache[key]
+
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+
+            self.hits += 1
+            try:
+                #shield: a cancelled waiter must not cancel the computation the others wait for
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                #the caller that owned the computation was cancelled, not this one: take it over
+                if not inflight.cancelled() or asyncio.current_task().cancelling():
+                    raise
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            #retrieve it so an exception nobody waited for is not reported as unhandled
+            future.exception()
+            raise
+        finally:
+            #invalidate() unregisters computations whose result must not be stored
+            current = self._inflight.get(key) is future
+            if current:
+                del self._inflight[key]
+
+        if current:
+            self._cache[key] = value
+        future.set_result(value)
+        return value
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        #without a key every entry goes; either way the computations in flight for it are not stored
+        if key is None:
+            self._cache.clear()
+            self._inflight.clear()
+        else:
+            self._cache.pop(key, None)
+            self._inflight.pop(key, None)
+
+
+def _ttl(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+
+highlighted_surveys_cache = ResponseCache(ttl=_ttl("HIGHLIGHTED_SURVEYS_CACHE_TTL_SECONDS", 30))
+public_surveys_cache = ResponseCache(ttl=_ttl("PUBLIC_SURVEYS_CACHE_TTL_SECONDS", 30))
+categories_cache = ResponseCache(ttl=_ttl("CATEGORIES_CACHE_TTL_SECONDS", 300))
+tags_cache = ResponseCache(ttl=_ttl("TAGS_CACHE_TTL_SECONDS", 300))
+#keyed by survey id
+survey_stats_cache = ResponseCache(ttl=_ttl("SURVEY_STATS_CACHE_TTL_SECONDS", 300), maxsize=1024)
+
+RESPONSE_CACHES: List[ResponseCache] = [highlighted_surveys_cache, public_surveys_cache, categories_cache, tags_cache, survey_stats_cache]
+
+
+def invalidate_survey_caches(survey_id: Optional[uuid.UUID] = None) -> None:
+    #survey writes change the public listings and can create tags; editing questions changes the stats
+    highlighted_surveys_cache.invalidate()
+    public_surveys_cache.invalidate()
+    tags_cache.invalidate()
+    if survey_id is not None:
+        survey_stats_cache.invalidate(survey_id)
+
+
+def invalidate_category_caches() -> None:
+    categories_cache.invalidate()
+
+
+def clear_response_caches() -> None:
+    for cache in RESPONSE_CACHES:
+        cache.invalidate()
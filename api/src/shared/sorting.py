@@ -0,0 +1,56 @@
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Dict, Optional
+from fastapi import HTTPException
+from src.models.UserModel import User
+from src.models.SurveyModel import Survey
+
+
+class SortOrderEnum(str, Enum):
+    ASC = "ASC"
+    DESC = "DESC"
+
+
+@dataclass(frozen=True)
+class Sort:
+    column: Any
+    descending: bool
+
+    def key(self, entity) -> Any:
+        return getattr(entity, self.column.key)
+
+
+@dataclass(frozen=True)
+class SortSpec:
+    #whitelist of sortable fields; every column here must be non nullable and covered by a (filter, column, id)
+    #index for each listing that uses the spec, declared on the model and in src/schema_upgrades.py
+    fields: Dict[str, Any]
+    default_field: str
+    default_order: SortOrderEnum
+
+    def resolve(self, sort_by: Optional[str], order: Optional[SortOrderEnum]) -> Sort:
+        field = sort_by or self.default_field
+        if field not in self.fields:
+            raise HTTPException(status_code=400, detail=f"Invalid sort field: {field}. Allowed: {', '.join(self.fields)}")
+
+        return Sort(column=self.fields[field], descending=(order or self.default_order) == SortOrderEnum.DESC)
+
+
+def sort_params(spec: SortSpec):
+    def dependency(sortBy: Optional[str] = None, order: Optional[SortOrderEnum] = None) -> Sort:
+        return spec.resolve(sortBy, order)
+
+    return dependency
+
+
+USER_SORT = SortSpec(
+    fields={"email": User.email, "role": User.role},
+    default_field="email",
+    default_order=SortOrderEnum.ASC,
+)
+
+SURVEY_SORT = SortSpec(
+    fields={"end_date": Survey.end_date, "start_date": Survey.start_date, "name": Survey.name},
+    default_field="end_date",
+    default_order=SortOrderEnum.DESC,
+)
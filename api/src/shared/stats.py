@@ -0,0 +1,77 @@
+import uuid
+from sqlalchemy import and_, distinct, func, or_, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.models.AnswerModel import Answer
+from src.models.OptionModel import Option
+from src.models.QuestionModel import Question
+from src.models.SurveyModel import Survey
+from src.schemas.SurveyStatsSchema import OptionStats, QuestionStats, SurveyStatsResponse
+
+
+def _percentage(count: int, total: int) -> float:
+    return round(count * 100 / total, 2) if total else 0.0
+
+
+async def compute_survey_stats(db: AsyncSession, survey_id: uuid.UUID) -> SurveyStatsResponse:
+    #one grouped query: a row per (question, option) with its answer count, open questions get a single row without option
+    question_respondents = (
+        select(func.count(distinct(Answer.user_id)))
+        .where(Answer.question_id == Question.id)
+        .correlate(Question)
+        .scalar_subquery()
+    )
+    #the survey totals are the counters maintained by the answers triggers
+    survey_counters = select(Survey.respondent_count, Survey.answer_count).where(Survey.id == survey_id).subquery()
+    answered = and_(
+        Answer.question_id == Question.id,
+        or_(Answer.option_id == Option.id, and_(Option.id.is_(None), Answer.option_id.is_(None))),
+    )
+
+    result = await db.execute(
+        select(
+            Question.id, Question.number, Question.description, Question.type,
+            question_respondents.label("respondents"),
+            Option.id.label("option_id"), Option.description.label("option"), Option.points,
+            func.count(Answer.id).label("answers"),
+            survey_counters.c.respondent_count, survey_counters.c.answer_count,
+        )
+        .select_from(Question)
+        .join(survey_counters, true())
+        .outerjoin(Option, Option.question_id == Question.id)
+        .outerjoin(Answer, answered)
+        .where(Question.survey_id == survey_id)
+        .group_by(Question.id, Option.id, survey_counters.c.respondent_count, survey_counters.c.answer_count)
+        #likert distributions come out ordered by the points of their options
+        .order_by(Question.number, Option.points, Option.description)
+    )
+
+    questions = {}
+    survey_respondents = survey_answers = 0
+    for question_id, number, description, question_type, respondents, option_id, option, points, answers, survey_respondents, survey_answers in result.all():
+        stats = questions.get(question_id)
+        if stats is None:
+            stats = questions[question_id] = QuestionStats(
+                id=question_id, number=number, description=description, type=question_type, respondents=respondents, answers=0
+            )
+
+        stats.answers += answers
+        if option_id is None:
+            continue
+
+        stats.options.append(OptionStats(
+            id=option_id, description=option, points=points, count=answers, percentage=_percentage(answers, respondents)
+        ))
+        if points is not None:
+            stats.points_sum = (stats.points_sum or 0) + points * answers
+
+    for stats in questions.values():
+        scored = sum(o.count for o in stats.options if o.points is not None)
+        if stats.points_sum is not None and scored:
+            stats.points_mean = round(stats.points_sum / scored, 2)
+
+    return SurveyStatsResponse(
+        survey_id=survey_id,
+        respondents=survey_respondents,
+        answers=survey_answers,
+        questions=list(questions.values()),
+    )
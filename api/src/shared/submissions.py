@@ -0,0 +1,118 @@
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+import os
+import uuid
+from fastapi import HTTPException
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.models.AnswerModel import Answer
+from src.models.OptionModel import Option
+from src.models.QuestionModel import Question
+from src.schemas.AnswerSchema import AnswerCreate
+from src.schemas.QuestionSchema import QuestionTypeEnum
+
+
+#answer records are plain tuples in this column order, the id is added by bulk_insert_answers
+AnswerRecord = Tuple[uuid.UUID, uuid.UUID, Optional[uuid.UUID], Optional[str]]
+ANSWER_COLUMNS = ("id", "user_id", "question_id", "option_id", "text")
+
+#batches at least this large are sent with COPY when the driver is asyncpg
+ANSWER_COPY_THRESHOLD = int(os.getenv("ANSWER_COPY_THRESHOLD", 1000))
+#every row of a multi-values insert binds its columns plus the client-side defaults of the ones left out (created_at)
+ANSWER_BOUND_COLUMNS = len(ANSWER_COLUMNS) + sum(
+    1 for column in Answer.__table__.columns if column.default is not None and column.name not in ANSWER_COLUMNS
+)
+#postgres accepts at most 32767 bind parameters per statement
+ANSWER_INSERT_CHUNK = 32767 // ANSWER_BOUND_COLUMNS
+
+
+@dataclass(frozen=True)
+class SurveyQuestion:
+    id: uuid.UUID
+    type: str
+    description: str
+    option_ids: FrozenSet[uuid.UUID]
+
+
+async def load_survey_questions(db: AsyncSession, survey_id: uuid.UUID) -> Dict[uuid.UUID, SurveyQuestion]:
+    #one round trip for the whole question/option map of the survey
+    result = await db.execute(
+        select(Question.id, Question.type, Question.description, Option.id.label("option_id"))
+        .outerjoin(Option, Option.question_id == Question.id)
+        .where(Question.survey_id == survey_id)
+    )
+
+    questions = {}
+    options = {}
+    for question_id, question_type, description, option_id in result.all():
+        if question_id not in questions:
+            questions[question_id] = (question_type, description)
+            options[question_id] = set()
+        if option_id is not None:
+            options[question_id].add(option_id)
+
+    return {
+        question_id: SurveyQuestion(id=question_id, type=question_type, description=description, option_ids=frozenset(options[question_id]))
+        for question_id, (question_type, description) in questions.items()
+    }
+
+
+def build_answer_rows(questions: Dict[uuid.UUID, SurveyQuestion], answer: AnswerCreate, user_id: uuid.UUID) -> List[AnswerRecord]:
+    #validates the whole payload in memory and returns the rows to insert
+    rows = []
+
+    for q in answer.questions:
+        question = questions.get(q.id)
+        if not question:
+            raise HTTPException(status_code=400, detail="Question not found in this survey")
+
+        if question.type == QuestionTypeEnum.open:
+            if not q.text:
+                raise HTTPException(status_code=400, detail=f"Question {question.description} has no answer")
+
+            rows.append((user_id, question.id, None, q.text))
+            continue
+
+        if not q.options:
+            raise HTTPException(status_code=400, detail=f"Question {question.description} has no options")
+
+        if any(o.id not in question.option_ids for o in q.options):
+            raise HTTPException(status_code=400, detail="Option not found in this question")
+
+        if len(q.options) > 1 and question.type != QuestionTypeEnum.multiple_choice:
+            raise HTTPException(status_code=400, detail="Question is not multiple answer")
+
+        rows.extend((user_id, question.id, o.id, None) for o in q.options)
+
+    return rows
+
+
+async def bulk_insert_answers(db: AsyncSession, records: Sequence[AnswerRecord]) -> int:
+    """Write answer records without building ORM objects.
+
+    Small batches go out as multi-row INSERT statements; large batches use asyncpg's COPY.
+    Both run on the session's connection, inside its transaction. The caller commits.
+    Records are not validated here; offline imports are expected to be trusted data.
+    """
+    if not records:
+        return 0
+
+    rows = [(uuid.uuid4(), *record) for record in records]
+
+    connection = await db.connection()
+    if len(rows) >= ANSWER_COPY_THRESHOLD and connection.dialect.driver == "asyncpg":
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(Answer.__tablename__, records=rows, columns=ANSWER_COLUMNS)
+        return len(rows)
+
+    for start in range(0, len(rows), ANSWER_INSERT_CHUNK):
+        chunk = rows[start:start + ANSWER_INSERT_CHUNK]
+        await db.execute(insert(Answer).values([dict(zip(ANSWER_COLUMNS, row)) for row in chunk]))
+
+    return len(rows)
+
+
+async def replace_user_answers(db: AsyncSession, user_id: uuid.UUID, question_ids: List[uuid.UUID], records: List[AnswerRecord]) -> None:
+    #previous answers to the submitted questions are replaced with one bulk delete and one bulk insert
+    await db.execute(delete(Answer).where(Answer.user_id == user_id, Answer.question_id.in_(question_ids)))
+    await bulk_insert_answers(db, records)
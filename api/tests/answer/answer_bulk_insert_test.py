@@ -0,0 +1,40 @@
+import pytest
+from src.models.AnswerModel import Answer
+from src.shared import submissions
+from src.shared.submissions import ANSWER_COPY_THRESHOLD, ANSWER_INSERT_CHUNK, bulk_insert_answers
+from sqlalchemy import func, select
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("count", [3, ANSWER_COPY_THRESHOLD])
+async def test_bulk_insert_answers(db_session, create_survey, count):
+    # Arrange
+    survey, [question], [[option]] = await create_survey(("single_choice", "Test Question", {"Option": 1}))
+    records = [(survey.owner_id, question.id, option.id, None) for _ in range(count)]
+
+    # Act
+    inserted = await bulk_insert_answers(db_session, records)
+    await db_session.commit()
+
+    # Assert
+    assert inserted == count
+    result = await db_session.execute(select(func.count(Answer.id)).where(Answer.question_id == question.id, Answer.option_id == option.id))
+    assert result.scalar() == count
+
+
+@pytest.mark.asyncio
+async def test_bulk_insert_answers_full_insert_chunk(db_session, create_survey, monkeypatch):
+    # Arrange
+    #a full chunk of plain inserts, the largest statement bulk_insert_answers builds
+    monkeypatch.setattr(submissions, "ANSWER_COPY_THRESHOLD", ANSWER_INSERT_CHUNK + 1)
+    survey, [question], [[option]] = await create_survey(("single_choice", "Test Question", {"Option": 1}))
+    records = [(survey.owner_id, question.id, option.id, None) for _ in range(ANSWER_INSERT_CHUNK)]
+
+    # Act
+    inserted = await bulk_insert_answers(db_session, records)
+    await db_session.commit()
+
+    # Assert
+    assert inserted == ANSWER_INSERT_CHUNK
+    result = await db_session.execute(select(func.count(Answer.id)).where(Answer.question_id == question.id))
+    assert result.scalar() == ANSWER_INSERT_CHUNK
@@ -1,7 +1,12 @@
+import io
 from httpx import AsyncClient, ASGITransport
 import pytest
 import pytest_asyncio
+from openpyxl import load_workbook
+import pyarrow as pa
+import pyarrow.parquet as pq
 from src.main import app
+from src.shared import exports
 from src.models.SurveyModel import Survey
 from src.models.CategoryModel import Category
 from src.models.UserModel import User
@@ -103,6 +108,232 @@ async def test_export_answers_csv_success(db_session, researcher_token):
     assert response.headers["content-disposition"] == "attachment; filename=test_export.csv"
     assert "user,Test Question" in response.text
 
+@pytest.mark.asyncio
+async def test_export_answers_csv_one_row_per_respondent(db_session, researcher_token):
+    # Arrange
+    category = Category(name="Test Category")
+    db_session.add(category)
+    await db_session.flush()
+
+    researcher = (await db_session.execute(select(User).where(User.email == "researcher@test.com"))).unique().scalars().first()
+    participant = (await db_session.execute(select(User).where(User.email == "participant@test.com"))).unique().scalars().first()
+
+    survey = Survey(
+        name="Test Survey",
+        description="Test Description",
+        scope="public",
+        category_id=category.id,
+        owner_id=researcher.id,
+        start_date=date.today(),
+        end_date=date.today() + timedelta(days=7)
+    )
+    db_session.add(survey)
+    await db_session.flush()
+
+    open_question = Question(number=1, description="Name", type="open", survey_id=survey.id, required=True)
+    choice_question = Question(number=2, description="Colors", type="multiple_choice", survey_id=survey.id, required=True)
+    db_session.add_all([open_question, choice_question])
+    await db_session.flush()
+
+    red = Option(description="Red", question_id=choice_question.id)
+    blue = Option(description="Blue", question_id=choice_question.id)
+    db_session.add_all([red, blue])
+    await db_session.flush()
+
+    db_session.add_all([
+        Answer(user_id=participant.id, question_id=open_question.id, text="Ana"),
+        Answer(user_id=participant.id, question_id=choice_question.id, option_id=red.id),
+        Answer(user_id=participant.id, question_id=choice_question.id, option_id=blue.id),
+        Answer(user_id=researcher.id, question_id=choice_question.id, option_id=red.id),
+    ])
+    await db_session.commit()
+
+    # Act
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get(
+            f"/surveys/{survey.id}/answers/export/csv?filename=test_export",
+            headers={"Authorization": f"Bearer {researcher_token}"}
+        )
+
+    # Assert
+    assert response.status_code == 200
+    assert response.text.splitlines() == [
+        "user,Name,Colors",
+        "participant@test.com,Ana,Blue; Red",
+        "researcher@test.com,,Red",
+    ]
+
+@pytest_asyncio.fixture()
+async def choice_survey(db_session, create_survey):
+    survey, [single, multiple], [[small, large], [red, blue]] = await create_survey(
+        ("single_choice", "Size", {"Small": None, "Large": None}),
+        ("multiple_choice", "Colors", {"Red": None, "Blue": None})
+    )
+    participant = (await db_session.execute(select(User).where(User.email == "participant@test.com"))).unique().scalars().first()
+
+    db_session.add_all([
+        Answer(user_id=participant.id, question_id=single.id, option_id=large.id),
+        Answer(user_id=participant.id, question_id=multiple.id, option_id=red.id),
+        Answer(user_id=participant.id, question_id=multiple.id, option_id=blue.id),
+        Answer(user_id=survey.owner_id, question_id=single.id, option_id=small.id),
+    ])
+    await db_session.commit()
+
+    return survey
+
+
+@pytest.mark.asyncio
+async def test_export_answers_csv_multiple_choice_one_hot(db_session, researcher_token, choice_survey):
+    # Arrange
+    survey = choice_survey
+
+    # Act
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get(
+            f"/surveys/{survey.id}/answers/export/csv?filename=test_export&multiple_choice=one_hot",
+            headers={"Authorization": f"Bearer {researcher_token}"}
+        )
+
+    # Assert
+    assert response.status_code == 200
+    assert response.text.splitlines() == [
+        "user,Size,Colors: Blue,Colors: Red",
+        "participant@test.com,Large,1,1",
+        "researcher@test.com,Small,0,0",
+    ]
+
+@pytest.mark.asyncio
+async def test_export_answers_since_watermark(db_session, researcher_token, choice_survey):
+    # Arrange
+    survey = choice_survey
+    researcher = (await db_session.execute(select(User).where(User.email == "researcher@test.com"))).unique().scalars().first()
+    question = (await db_session.execute(select(Question).where(Question.survey_id == survey.id, Question.type == "multiple_choice"))).scalars().first()
+    red = (await db_session.execute(select(Option).where(Option.question_id == question.id, Option.description == "Red"))).scalars().first()
+    headers = {"Authorization": f"Bearer {researcher_token}"}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        full = await ac.get(f"/surveys/{survey.id}/answers/export/csv?filename=test_export", headers=headers)
+        watermark = int(full.headers["x-export-watermark"])
+
+        db_session.add(Answer(user_id=researcher.id, question_id=question.id, option_id=red.id))
+        await db_session.commit()
+
+        # Act
+        delta = await ac.get(f"/surveys/{survey.id}/answers/export/csv?filename=test_export&since={watermark}", headers=headers)
+        empty = await ac.get(f"/surveys/{survey.id}/answers/export/csv?filename=test_export&since={delta.headers['x-export-watermark']}", headers=headers)
+
+    # Assert
+    assert len(full.text.splitlines()) == 3
+    assert delta.status_code == 200
+    assert int(delta.headers["x-export-watermark"]) > watermark
+    assert delta.text.splitlines() == [
+        "user,Size,Colors",
+        "researcher@test.com,Small,Red",
+    ]
+    assert empty.text.splitlines() == ["user,Size,Colors"]
+
+@pytest.mark.asyncio
+async def test_export_answers_since_watermark_with_overlapping_writers(db_session, researcher_token, test_engine, choice_survey):
+    # Arrange
+    survey = choice_survey
+    researcher = (await db_session.execute(select(User).where(User.email == "researcher@test.com"))).unique().scalars().first()
+    admin = (await db_session.execute(select(User).where(User.email == "admin@test.com"))).unique().scalars().first()
+    size = (await db_session.execute(select(Question).where(Question.survey_id == survey.id, Question.type == "single_choice"))).scalars().first()
+    small = (await db_session.execute(select(Option).where(Option.question_id == size.id, Option.description == "Small"))).scalars().first()
+
+    other_survey = Survey(name="Other Survey", description="Other", scope="public", category_id=survey.category_id, owner_id=researcher.id,
+                          start_date=date.today(), end_date=date.today() + timedelta(days=7))
+    db_session.add(other_survey)
+    await db_session.flush()
+    other_question = Question(number=1, description="Comments", type="open", survey_id=other_survey.id, required=True)
+    db_session.add(other_question)
+    await db_session.commit()
+    headers = {"Authorization": f"Bearer {researcher_token}"}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        #a long import into the survey inserts first and is still running when the export is taken
+        async with test_engine.connect() as slow_import:
+            await slow_import.execute(insert(Answer).values(user_id=admin.id, question_id=size.id, option_id=small.id))
+
+            #meanwhile a submission to another survey commits an answer with a higher sequence
+            db_session.add(Answer(user_id=researcher.id, question_id=other_question.id, text="Quick"))
+            await db_session.commit()
+
+            full = await ac.get(f"/surveys/{survey.id}/answers/export/csv?filename=test_export", headers=headers)
+            await slow_import.commit()
+
+        # Act
+        delta = await ac.get(f"/surveys/{survey.id}/answers/export/csv?filename=test_export&since={full.headers['x-export-watermark']}", headers=headers)
+
+    # Assert
+    assert "admin@test.com" not in full.text
+    assert delta.text.splitlines() == [
+        "user,Size,Colors",
+        "admin@test.com,Small,",
+    ]
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("format, media_type", [
+    ("parquet", "application/vnd.apache.parquet"),
+    ("arrow", "application/vnd.apache.arrow.stream"),
+])
+async def test_export_answers_columnar(db_session, researcher_token, format, media_type, monkeypatch, choice_survey):
+    # Arrange
+    survey = choice_survey
+    #one respondent per record batch, so the file is sent in several chunks
+    monkeypatch.setattr(exports, "EXPORT_CHUNK_ROWS", 1)
+
+    # Act
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get(
+            f"/surveys/{survey.id}/answers/export/{format}?filename=test_export",
+            headers={"Authorization": f"Bearer {researcher_token}"}
+        )
+
+    # Assert
+    assert response.status_code == 200
+    assert response.headers["content-type"] == media_type
+    if format == "parquet":
+        table = pq.read_table(pa.BufferReader(response.content))
+    else:
+        table = pa.ipc.open_stream(response.content).read_all()
+
+    assert pa.types.is_dictionary(table.schema.field("Size").type)
+    assert pa.types.is_list(table.schema.field("Colors").type)
+    assert table.to_pydict() == {
+        "user": ["participant@test.com", "researcher@test.com"],
+        "Size": ["Large", "Small"],
+        "Colors": [["Blue", "Red"], None],
+    }
+
+@pytest.mark.asyncio
+async def test_export_answers_columnar_empty_and_unlabeled_answers(db_session, researcher_token, choice_survey):
+    # Arrange
+    survey = choice_survey
+    questions = {q.description: q for q in (await db_session.execute(select(Question).where(Question.survey_id == survey.id))).scalars().all()}
+    admin = (await db_session.execute(select(User).where(User.email == "admin@test.com"))).unique().scalars().first()
+    #answered the multiple choice question without selecting anything, and left text on the single choice one
+    db_session.add_all([
+        Answer(user_id=admin.id, question_id=questions["Colors"].id),
+        Answer(user_id=admin.id, question_id=questions["Size"].id, text="Medium"),
+    ])
+    await db_session.commit()
+
+    # Act
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get(
+            f"/surveys/{survey.id}/answers/export/parquet?filename=test_export",
+            headers={"Authorization": f"Bearer {researcher_token}"}
+        )
+
+    # Assert
+    assert response.status_code == 200
+    assert pq.read_table(pa.BufferReader(response.content)).to_pydict() == {
+        "user": ["admin@test.com", "participant@test.com", "researcher@test.com"],
+        "Size": [None, "Large", "Small"],
+        "Colors": [[], ["Blue", "Red"], None],
+    }
+
 @pytest.mark.asyncio
 async def test_export_answers_excel_success(db_session, researcher_token):
     # Arrange
@@ -190,6 +421,11 @@ async def test_export_answers_excel_success(db_session, researcher_token):
     assert response.status_code == 200
     assert response.headers["content-type"] == "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
     assert response.headers["content-disposition"] == "attachment; filename=test_export.xlsx"
+    sheet = load_workbook(io.BytesIO(response.content), read_only=True).active
+    assert [list(row) for row in sheet.iter_rows(values_only=True)] == [
+        ["user", "Test Question"],
+        ["participant@test.com", "Test Answer"],
+    ]
 
 @pytest.mark.asyncio
 async def test_export_answers_unauthorized(db_session):
@@ -325,3 +561,38 @@ async def test_export_answers_not_in_organization(db_session, researcher_token):
     # Assert
     assert response.status_code == 403
     assert response.json()["detail"] == "Access denied: User not in the same organization"
+
+@pytest.mark.asyncio
+async def test_export_answers_repeated_question_descriptions(db_session, researcher_token, create_survey):
+    # Arrange
+    survey, [first, second, named_user], _ = await create_survey(
+        ("open", "Comments", {}),
+        ("open", "Comments", {}),
+        ("open", "user", {}),
+    )
+    db_session.add_all([
+        Answer(user_id=survey.owner_id, question_id=first.id, text="First"),
+        Answer(user_id=survey.owner_id, question_id=second.id, text="Second"),
+        Answer(user_id=survey.owner_id, question_id=named_user.id, text="Me"),
+    ])
+    await db_session.commit()
+    headers = {"Authorization": f"Bearer {researcher_token}"}
+
+    # Act
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        csv_response = await ac.get(f"/surveys/{survey.id}/answers/export/csv?filename=test_export", headers=headers)
+        parquet_response = await ac.get(f"/surveys/{survey.id}/answers/export/parquet?filename=test_export", headers=headers)
+
+    # Assert
+    #every question keeps a column of its own
+    assert csv_response.text.splitlines() == [
+        "user,Comments (1),Comments (2),user (3)",
+        "researcher@test.com,First,Second,Me",
+    ]
+    assert parquet_response.status_code == 200
+    assert pq.read_table(pa.BufferReader(parquet_response.content)).to_pydict() == {
+        "user": ["researcher@test.com"],
+        "Comments (1)": ["First"],
+        "Comments (2)": ["Second"],
+        "user (3)": ["Me"],
+    }
@@ -240,3 +240,63 @@ async def test_get_survey_answers_organization_forbidden(db_session, researcher_
     # Assert
     assert response.status_code == 403
     assert response.json()["detail"] == "Access denied: User not in the same organization"
+
+
+@pytest.mark.asyncio
+async def test_get_survey_answers_paginated_by_respondent(db_session, researcher_token):
+    # Arrange
+    category = Category(name="Test Category")
+    db_session.add(category)
+    await db_session.flush()
+
+    researcher = (await db_session.execute(select(User).where(User.email == "researcher@test.com"))).unique().scalars().first()
+    respondents = (await db_session.execute(select(User).where(User.email.in_(["admin@test.com", "participant@test.com", "researcher@test.com"])))).unique().scalars().all()
+
+    survey = Survey(
+        name="Test Survey",
+        description="Test Description",
+        scope="public",
+        category_id=category.id,
+        owner_id=researcher.id,
+        start_date=date.today(),
+        end_date=date.today() + timedelta(days=7)
+    )
+    db_session.add(survey)
+    await db_session.flush()
+
+    question = Question(number=1, description="Colors", type="multiple_choice", survey_id=survey.id, required=True)
+    db_session.add(question)
+    await db_session.flush()
+
+    red = Option(description="Red", question_id=question.id)
+    blue = Option(description="Blue", question_id=question.id)
+    db_session.add_all([red, blue])
+    await db_session.flush()
+
+    for respondent in respondents:
+        db_session.add_all([
+            Answer(user_id=respondent.id, question_id=question.id, option_id=red.id),
+            Answer(user_id=respondent.id, question_id=question.id, option_id=blue.id),
+        ])
+    await db_session.commit()
+
+    # Act
+    pages = []
+    cursor = None
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        while True:
+            params = {"limit": 2} | ({"cursor": cursor} if cursor else {})
+            response = await ac.get(f"/surveys/{survey.id}/answers", params=params, headers={"Authorization": f"Bearer {researcher_token}"})
+            assert response.status_code == 200
+            pages.append(response.json()["answers"])
+            cursor = response.json()["next_cursor"]
+            if cursor is None:
+                break
+
+    # Assert
+    assert [len(page) for page in pages] == [2, 1]
+    answers = [respondent for page in pages for respondent in page]
+    assert sorted(a["user_id"] for a in answers) == sorted(str(r.id) for r in respondents)
+    for respondent in answers:
+        assert len(respondent["questions"]) == 1
+        assert [o["description"] for o in respondent["questions"][0]["options"]] == ["Blue", "Red"]
@@ -0,0 +1,86 @@
+from httpx import AsyncClient, ASGITransport
+import pytest
+from src.main import app
+from src.models.UserModel import User
+from src.models.AnswerModel import Answer
+from sqlalchemy import select
+
+
+async def _create_answered_survey(db_session, create_survey, scope="public"):
+    survey, [likert, colors, comments], [scale, [red, blue], _] = await create_survey(
+        ("likert_scale", "Satisfaction", {f"Level {points}": points for points in (3, 1, 2)}),
+        ("multiple_choice", "Colors", {"Red": None, "Blue": None}),
+        ("open", "Comments", {}),
+        scope=scope
+    )
+    admin = (await db_session.execute(select(User).where(User.email == "admin@test.com"))).unique().scalars().first()
+
+    db_session.add_all([
+        Answer(user_id=survey.owner_id, question_id=likert.id, option_id=scale[0].id),
+        Answer(user_id=survey.owner_id, question_id=colors.id, option_id=red.id),
+        Answer(user_id=survey.owner_id, question_id=colors.id, option_id=blue.id),
+        Answer(user_id=survey.owner_id, question_id=comments.id, text="Nice"),
+        Answer(user_id=admin.id, question_id=likert.id, option_id=scale[1].id),
+        Answer(user_id=admin.id, question_id=colors.id, option_id=red.id),
+    ])
+    await db_session.commit()
+
+    return survey, likert, scale
+
+
+@pytest.mark.asyncio
+async def test_get_survey_stats_success(db_session, researcher_token, create_survey):
+    # Arrange
+    survey, _, _ = await _create_answered_survey(db_session, create_survey)
+
+    # Act
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get(f"/surveys/{survey.id}/stats", headers={"Authorization": f"Bearer {researcher_token}"})
+
+    # Assert
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["respondents"], data["answers"]) == (2, 6)
+
+    likert, colors, comments = data["questions"]
+    assert (likert["respondents"], likert["answers"], likert["points_sum"], likert["points_mean"]) == (2, 2, 4, 2.0)
+    assert [(o["points"], o["count"], o["percentage"]) for o in likert["options"]] == [(1, 1, 50.0), (2, 0, 0.0), (3, 1, 50.0)]
+    assert [(o["description"], o["count"], o["percentage"]) for o in colors["options"]] == [("Blue", 1, 50.0), ("Red", 2, 100.0)]
+    assert colors["points_sum"] is None
+    assert (comments["respondents"], comments["answers"], comments["options"]) == (1, 1, [])
+
+
+@pytest.mark.asyncio
+async def test_get_survey_stats_refreshed_after_submission(db_session, researcher_token, participant_token, create_survey):
+    # Arrange
+    survey, likert, scale = await _create_answered_survey(db_session, create_survey)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        before = await ac.get(f"/surveys/{survey.id}/stats", headers={"Authorization": f"Bearer {researcher_token}"})
+
+        # Act
+        await ac.post(
+            f"/surveys/{survey.id}/answers",
+            headers={"Authorization": f"Bearer {participant_token}"},
+            json={"questions": [{"id": str(likert.id), "type": "likert_scale", "text": None, "options": [{"id": str(scale[0].id)}]}]}
+        )
+        after = await ac.get(f"/surveys/{survey.id}/stats", headers={"Authorization": f"Bearer {researcher_token}"})
+
+    # Assert
+    assert before.json()["respondents"] == 2
+    assert after.json()["respondents"] == 3
+    assert after.json()["questions"][0]["points_mean"] == round(7 / 3, 2)
+
+
+@pytest.mark.asyncio
+async def test_get_survey_stats_not_assigned(db_session, participant_token, create_survey):
+    # Arrange
+    survey, _, _ = await _create_answered_survey(db_session, create_survey, scope="private")
+
+    # Act
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get(f"/surveys/{survey.id}/stats", headers={"Authorization": f"Bearer {participant_token}"})
+
+    # Assert
+    assert response.status_code == 403
+    assert response.json()["detail"] == "Access denied: User not assigned to this survey"
@@ -500,3 +500,41 @@ async def test_register_answers_option_not_found(db_session, participant_token):
 
     # Assert
     assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_register_answers_replaces_previous_answers(db_session, participant_token, create_survey):
+    # Arrange
+    survey, [question], [options] = await create_survey(("multiple_choice", "Test Question", {f"Option {i}": i for i in range(3)}))
+
+    def payload(chosen):
+        return {"questions": [{"id": str(question.id), "type": "multiple_choice", "text": None, "options": [{"id": str(o.id)} for o in chosen]}]}
+
+    # Act
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        first = await ac.post(f"/surveys/{survey.id}/answers", headers={"Authorization": f"Bearer {participant_token}"}, json=payload(options[:2]))
+        second = await ac.post(f"/surveys/{survey.id}/answers", headers={"Authorization": f"Bearer {participant_token}"}, json=payload(options[2:]))
+
+    # Assert
+    assert first.status_code == 201
+    assert second.status_code == 201
+    result = await db_session.execute(select(Answer.option_id).where(Answer.question_id == question.id))
+    assert [row.option_id for row in result.all()] == [options[2].id]
+
+
+@pytest.mark.asyncio
+async def test_register_answers_single_choice_with_several_options(db_session, participant_token, create_survey):
+    # Arrange
+    survey, [question], [options] = await create_survey(("single_choice", "Test Question", {f"Option {i}": i for i in range(3)}))
+
+    # Act
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post(
+            f"/surveys/{survey.id}/answers",
+            headers={"Authorization": f"Bearer {participant_token}"},
+            json={"questions": [{"id": str(question.id), "type": "single_choice", "text": None, "options": [{"id": str(o.id)} for o in options[:2]]}]}
+        )
+
+    # Assert
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Question is not multiple answer"
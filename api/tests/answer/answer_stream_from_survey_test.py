@@ -0,0 +1,80 @@
+from httpx import AsyncClient, ASGITransport
+import json
+import pytest
+import uuid
+from src.main import app
+from src.models.SurveyModel import Survey
+from src.models.CategoryModel import Category
+from src.models.UserModel import User
+from src.models.QuestionModel import Question
+from src.models.OptionModel import Option
+from src.models.AnswerModel import Answer
+from sqlalchemy import select
+from datetime import date, timedelta
+
+
+@pytest.mark.asyncio
+async def test_stream_survey_answers_success(db_session, researcher_token):
+    # Arrange
+    category = Category(name="Test Category")
+    db_session.add(category)
+    await db_session.flush()
+
+    researcher = (await db_session.execute(select(User).where(User.email == "researcher@test.com"))).unique().scalars().first()
+    participant = (await db_session.execute(select(User).where(User.email == "participant@test.com"))).unique().scalars().first()
+
+    survey = Survey(
+        name="Test Survey",
+        description="Test Description",
+        scope="public",
+        category_id=category.id,
+        owner_id=researcher.id,
+        start_date=date.today(),
+        end_date=date.today() + timedelta(days=7)
+    )
+    db_session.add(survey)
+    await db_session.flush()
+
+    rating = Question(number=1, description="Rating", type="likert_scale", survey_id=survey.id, required=True)
+    comments = Question(number=2, description="Comments", type="open", survey_id=survey.id, required=False)
+    db_session.add_all([rating, comments])
+    await db_session.flush()
+
+    high = Option(description="High", points=5, question_id=rating.id)
+    db_session.add(high)
+    await db_session.flush()
+
+    db_session.add_all([
+        Answer(user_id=participant.id, question_id=rating.id, option_id=high.id),
+        Answer(user_id=participant.id, question_id=comments.id, text="Great"),
+        Answer(user_id=researcher.id, question_id=rating.id, option_id=high.id),
+    ])
+    await db_session.commit()
+
+    # Act
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get(f"/surveys/{survey.id}/answers/stream", headers={"Authorization": f"Bearer {researcher_token}"})
+
+    # Assert
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    respondents = {line["user_id"]: line for line in map(json.loads, response.text.splitlines())}
+    assert set(respondents) == {str(participant.id), str(researcher.id)}
+
+    answered = respondents[str(participant.id)]
+    assert answered["username"] == f"{participant.name} {participant.lastname}"
+    assert [q["description"] for q in answered["questions"]] == ["Rating", "Comments"]
+    assert answered["questions"][0]["options"] == [{"id": str(high.id), "description": "High", "points": 5}]
+    assert answered["questions"][1]["text"] == "Great"
+    assert len(respondents[str(researcher.id)]["questions"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_stream_survey_answers_not_found(db_session, researcher_token):
+    # Act
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get(f"/surveys/{uuid.uuid4()}/answers/stream", headers={"Authorization": f"Bearer {researcher_token}"})
+
+    # Assert
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Survey not found"
@@ -4,6 +4,8 @@ import pytest_asyncio
 from src.main import app
 from src.models.CategoryModel import Category
 from sqlalchemy import select
+from src.shared.response_cache import ResponseCache
+import asyncio
 
 @pytest.mark.asyncio
 async def test_get_all_categories_success(db_session, admin_token):
@@ -43,3 +45,108 @@ async def test_get_all_categories_unauthorized(db_session):
     assert response.status_code == 401
 
 
+
+
+@pytest.mark.asyncio
+async def test_get_all_categories_cached_until_category_created(db_session, admin_token):
+    # Arrange
+    db_session.add(Category(name="Category 1"))
+    await db_session.commit()
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        first = await ac.get("/categories", headers=headers)
+
+        #written behind the API's back: served from the cache
+        db_session.add(Category(name="Category 2"))
+        await db_session.commit()
+        cached = await ac.get("/categories", headers=headers)
+
+        # Act
+        await ac.post("/categories/create", json={"name": "Category 3"}, headers=headers)
+        refreshed = await ac.get("/categories", headers=headers)
+
+    # Assert
+    assert [c["name"] for c in first.json()["categories"]] == ["Category 1"]
+    assert cached.json() == first.json()
+    assert [c["name"] for c in refreshed.json()["categories"]] == ["Category 1", "Category 2", "Category 3"]
+
+
+@pytest.mark.asyncio
+async def test_response_cache_coalesces_concurrent_misses():
+    # Arrange
+    cache = ResponseCache(ttl=60)
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    # Act
+    results = await asyncio.gather(*[cache.get_or_compute("key", compute) for _ in range(10)])
+
+    # Assert
+    assert results == [1] * 10
+    assert calls == 1
+    assert (cache.hits, cache.misses) == (9, 1)
+
+
+@pytest.mark.asyncio
+async def test_response_cache_recomputes_when_owner_cancelled():
+    # Arrange
+    cache = ResponseCache(ttl=60)
+    calls = 0
+    started = asyncio.Event()
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        started.set()
+        await asyncio.sleep(0.05)
+        return calls
+
+    owner = asyncio.create_task(cache.get_or_compute("key", compute))
+    await started.wait()
+    waiters = [asyncio.create_task(cache.get_or_compute("key", compute)) for _ in range(3)]
+    await asyncio.sleep(0)
+
+    # Act
+    owner.cancel()
+    results = await asyncio.gather(*waiters)
+
+    # Assert
+    assert owner.cancelled()
+    #one waiter takes the computation over, the others share it
+    assert results == [2] * 3
+    assert calls == 2
+    assert await cache.get_or_compute("key", compute) == 2
+
+
+@pytest.mark.asyncio
+async def test_response_cache_invalidate_key_keeps_other_computations():
+    # Arrange
+    cache = ResponseCache(ttl=60)
+    calls = {"first": 0, "second": 0}
+
+    def computing(key):
+        async def compute():
+            calls[key] += 1
+            await asyncio.sleep(0.02)
+            return calls[key]
+        return compute
+
+    pending = [asyncio.create_task(cache.get_or_compute(key, computing(key))) for key in calls]
+    await asyncio.sleep(0)
+
+    # Act
+    cache.invalidate("first")
+    await asyncio.gather(*pending)
+    first = await cache.get_or_compute("first", computing("first"))
+    second = await cache.get_or_compute("second", computing("second"))
+
+    # Assert
+    #only the invalidated key is computed again
+    assert (first, second) == (2, 1)
+    assert calls == {"first": 2, "second": 1}
@@ -1,4 +1,4 @@
-from datetime import date
+from datetime import date, timedelta
 from httpx import ASGITransport, AsyncClient
 import pytest
 import pytest_asyncio
@@ -19,10 +19,17 @@ api_dir = Path(__file__).parent.parent.absolute()
 sys.path.insert(0, str(api_dir))
 
 from src.models.OrganizationModel import Organization
+from src.models.CategoryModel import Category
+from src.models.SurveyModel import Survey
+from src.models.QuestionModel import Question
+from src.models.OptionModel import Option
 from src.main import app
 from src.database import Base, get_db
 from src.models.UserModel import User
 from src.auth.Auth import get_current_user
+from src.auth.Principal import clear_principal_cache
+from src.auth.RefreshTokens import clear_revoked_refresh_tokens
+from src.shared.response_cache import clear_response_caches
 
 # Configuración de la base de datos de test
 TEST_DB_NAME = f"test_db_{uuid.uuid4().hex[:10]}"
@@ -91,6 +98,10 @@ async def db_session(test_engine):
 async def setup_test_data(db_session):
     """Configure test data before each test"""
 
+    clear_principal_cache()
+    clear_revoked_refresh_tokens()
+    clear_response_caches()
+
     org = Organization(name="Organization")
     
 
@@ -211,5 +222,41 @@ async def participant_token():
         return response.json()["access_token"]
 
 
+@pytest_asyncio.fixture()
+async def create_survey(db_session):
+    """Create a survey owned by the researcher; each question is (type, description, {option: points})"""
+
+    async def create(*questions, scope="public"):
+        category = Category(name="Test Category")
+        db_session.add(category)
+        await db_session.flush()
+
+        survey = Survey(
+            name="Test Survey",
+            description="Test Description",
+            scope=scope,
+            category_id=category.id,
+            owner_id=RESEARCHER_ID,
+            start_date=date.today(),
+            end_date=date.today() + timedelta(days=7)
+        )
+        db_session.add(survey)
+        await db_session.flush()
+
+        created = [
+            Question(number=number, description=description, type=question_type, survey_id=survey.id, required=True)
+            for number, (question_type, description, _) in enumerate(questions, start=1)
+        ]
+        db_session.add_all(created)
+        await db_session.flush()
+
+        options = [
+            [Option(description=option, points=points, question_id=question.id) for option, points in spec[2].items()]
+            for question, spec in zip(created, questions)
+        ]
+        db_session.add_all([option for question_options in options for option in question_options])
+        await db_session.commit()
 
+        return survey, created, options
 
+    return create
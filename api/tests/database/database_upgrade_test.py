@@ -0,0 +1,153 @@
+from httpx import AsyncClient, ASGITransport
+import pytest
+from src.main import app
+from src.models.AnswerModel import Answer
+from src.models.CategoryModel import Category
+from src.models.QuestionModel import Question
+from src.models.SurveyModel import Survey
+from src.models.UserModel import User
+from src.schema_upgrades import UPGRADES, upgrade_database
+from sqlalchemy import insert, select, text
+from datetime import date, timedelta
+
+
+async def _upgrade(test_engine):
+    async with test_engine.begin() as conn:
+        return await upgrade_database(conn)
+
+
+async def _columns(test_engine, table):
+    async with test_engine.connect() as conn:
+        result = await conn.execute(text("SELECT column_name FROM information_schema.columns WHERE table_name = :table"), {"table": table})
+        return set(result.scalars())
+
+
+@pytest.mark.asyncio
+async def test_upgrade_runs_each_upgrade_once(test_engine, db_session):
+    # Act
+    first = await _upgrade(test_engine)
+    second = await _upgrade(test_engine)
+
+    # Assert
+    assert first == [name for name, _ in UPGRADES]
+    assert second == []
+
+
+@pytest.mark.asyncio
+async def test_upgrade_adds_token_version_to_existing_users(test_engine, db_session):
+    # Arrange
+    #a users table from before token versions existed
+    async with test_engine.begin() as conn:
+        await conn.execute(text("ALTER TABLE users DROP COLUMN token_version"))
+
+    # Act
+    await _upgrade(test_engine)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        login = await ac.post(
+            "/users/login",
+            data={"username": "participant@test.com", "password": "test123"},
+            headers={"Content-Type": "application/x-www-form-urlencoded"}
+        )
+        me = await ac.get("/users/me", headers={"Authorization": f"Bearer {login.json()['access_token']}"})
+
+    # Assert
+    assert "token_version" in await _columns(test_engine, "users")
+    assert me.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_upgrade_adds_export_columns_to_existing_answers(test_engine, db_session):
+    # Arrange
+    async with test_engine.begin() as conn:
+        await conn.execute(text("ALTER TABLE answers DROP COLUMN created_at, DROP COLUMN sequence, DROP COLUMN xact_id"))
+
+    # Act
+    await _upgrade(test_engine)
+
+    # Assert
+    assert {"created_at", "sequence", "xact_id"} <= await _columns(test_engine, "answers")
+
+
+async def _answer_without_counters(test_engine, db_session):
+    #a survey answered before the respondent bookkeeping and its triggers existed
+    category = Category(name="Test Category")
+    db_session.add(category)
+    await db_session.flush()
+
+    users = (await db_session.execute(select(User).order_by(User.email))).unique().scalars().all()
+    survey = Survey(name="Answered Survey", description="Answered before the upgrade", scope="public", category_id=category.id, owner_id=users[0].id,
+                    start_date=date.today(), end_date=date.today() + timedelta(days=7))
+    db_session.add(survey)
+    await db_session.flush()
+    questions = [Question(number=i, description=f"Question {i}", type="open", survey_id=survey.id, required=True) for i in (1, 2)]
+    db_session.add_all(questions)
+    await db_session.commit()
+
+    async with test_engine.begin() as conn:
+        await conn.execute(text("DROP TRIGGER answers_inserted_counters ON answers"))
+        await conn.execute(text("DROP TRIGGER answers_deleted_counters ON answers"))
+        await conn.execute(text("DROP TABLE survey_respondents"))
+        await conn.execute(text("ALTER TABLE surveys DROP COLUMN respondent_count, DROP COLUMN answer_count"))
+        await conn.execute(insert(Answer), [
+            {"user_id": user.id, "question_id": question.id, "text": "Answer"}
+            for user in users[1:] for question in questions
+        ])
+
+    return survey, questions, users
+
+
+async def _counters(test_engine, survey_id):
+    async with test_engine.connect() as conn:
+        survey = (await conn.execute(text("SELECT respondent_count, answer_count FROM surveys WHERE id = :id"), {"id": survey_id})).one()
+        respondents = (await conn.execute(text("SELECT count(*) FROM survey_respondents WHERE survey_id = :id"), {"id": survey_id})).scalar_one()
+        return tuple(survey), respondents
+
+
+@pytest.mark.asyncio
+async def test_upgrade_backfills_survey_counters_from_existing_answers(test_engine, db_session, admin_token):
+    # Arrange
+    survey, questions, users = await _answer_without_counters(test_engine, db_session)
+
+    # Act
+    await _upgrade(test_engine)
+    backfilled = await _counters(test_engine, survey.id)
+
+    #the triggers are installed too, later answers keep the counters current
+    async with test_engine.begin() as conn:
+        await conn.execute(insert(Answer).values(user_id=users[0].id, question_id=questions[0].id, text="Answer"))
+    counted = await _counters(test_engine, survey.id)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        highlighted = await ac.get("/surveys/public/highlighted", headers={"Authorization": f"Bearer {admin_token}"})
+
+    # Assert
+    assert backfilled == ((2, 4), 2)
+    assert counted == ((3, 5), 3)
+    assert [s["id"] for s in highlighted.json()["surveys"]] == [str(survey.id)]
+
+
+@pytest.mark.asyncio
+async def test_upgrade_pages_answers_written_before_counters(test_engine, db_session, admin_token):
+    # Arrange
+    survey, questions, users = await _answer_without_counters(test_engine, db_session)
+    await _upgrade(test_engine)
+
+    # Act
+    pages = []
+    cursor = None
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        while True:
+            params = {"limit": 1} | ({"cursor": cursor} if cursor else {})
+            response = await ac.get(f"/surveys/{survey.id}/answers", params=params, headers={"Authorization": f"Bearer {admin_token}"})
+            assert response.status_code == 200
+            pages.append(response.json()["answers"])
+            cursor = response.json()["next_cursor"]
+            if cursor is None:
+                break
+
+    # Assert
+    #answers are paged by respondent from survey_respondents, which the upgrade filled in
+    assert [len(page) for page in pages] == [1, 1]
+    answers = [respondent for page in pages for respondent in page]
+    assert sorted(a["user_id"] for a in answers) == sorted(str(user.id) for user in users[1:])
+    assert all(len(respondent["questions"]) == len(questions) for respondent in answers)
@@ -0,0 +1,243 @@
+from httpx import AsyncClient, ASGITransport
+import pytest
+import pytest_asyncio
+from src.main import app
+from src.models.UserModel import User
+from src.models.QuestionModel import Question
+from src.models.AnswerModel import Answer
+from src.models.ExportJobModel import ExportJob
+from src.shared import export_jobs
+from src.shared.exports import ExportFormat
+from src.schemas.AnswerSchema import AvailableFormatsEnum
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from datetime import datetime, timedelta
+import asyncio
+import os
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def export_worker(test_engine, tmp_path, monkeypatch):
+    monkeypatch.setattr(export_jobs, "job_session_factory", sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False))
+    monkeypatch.setattr(export_jobs, "EXPORT_DIR", str(tmp_path))
+    yield
+    await export_jobs.export_workers.shutdown()
+
+
+async def _create_answered_survey(db_session, create_survey, scope="public"):
+    survey, [question], _ = await create_survey(("open", "Test Question", {}), scope=scope)
+    participant = (await db_session.execute(select(User).where(User.email == "participant@test.com"))).unique().scalars().first()
+
+    db_session.add(Answer(user_id=participant.id, question_id=question.id, text="Test Answer"))
+    await db_session.commit()
+
+    return survey, question
+
+
+@pytest.mark.asyncio
+async def test_export_job_completes_and_downloads(db_session, researcher_token, create_survey):
+    # Arrange
+    survey, _ = await _create_answered_survey(db_session, create_survey)
+    headers = {"Authorization": f"Bearer {researcher_token}"}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        # Act
+        created = await ac.post(f"/surveys/{survey.id}/answers/exports", json={"format": "csv"}, headers=headers)
+        await export_jobs.export_workers.join()
+        status = await ac.get(f"/surveys/{survey.id}/answers/exports/{created.json()['id']}", headers=headers)
+        download = await ac.get(f"/surveys/{survey.id}/answers/exports/{created.json()['id']}/download?filename=answers", headers=headers)
+        partial = await ac.get(f"/surveys/{survey.id}/answers/exports/{created.json()['id']}/download", headers={**headers, "Range": "bytes=0-3"})
+
+    # Assert
+    assert created.status_code == 202
+    assert created.json()["status"] == "pending"
+    assert status.status_code == 200
+    assert status.json()["status"] == "completed"
+    assert status.json()["size"] == len(download.content)
+    assert download.status_code == 200
+    assert download.headers["content-disposition"] == 'attachment; filename="answers.csv"'
+    assert download.text.splitlines() == ["user,Test Question", "participant@test.com,Test Answer"]
+    assert partial.status_code == 206
+    assert partial.content == b"user"
+
+
+@pytest.mark.asyncio
+async def test_export_job_reused_until_new_answers(db_session, researcher_token, create_survey):
+    # Arrange
+    survey, question = await _create_answered_survey(db_session, create_survey)
+    headers = {"Authorization": f"Bearer {researcher_token}"}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        first = await ac.post(f"/surveys/{survey.id}/answers/exports", json={"format": "excel"}, headers=headers)
+        await export_jobs.export_workers.join()
+
+        # Act
+        reused = await ac.post(f"/surveys/{survey.id}/answers/exports", json={"format": "excel"}, headers=headers)
+
+        db_session.add(Answer(user_id=survey.owner_id, question_id=question.id, text="Another Answer"))
+        await db_session.commit()
+        refreshed = await ac.post(f"/surveys/{survey.id}/answers/exports", json={"format": "excel"}, headers=headers)
+
+    # Assert
+    assert reused.status_code == 200
+    assert reused.json()["id"] == first.json()["id"]
+    assert reused.json()["status"] == "completed"
+    assert refreshed.status_code == 202
+    assert refreshed.json()["id"] != first.json()["id"]
+
+
+@pytest.mark.asyncio
+async def test_export_job_not_reused_after_question_edit(db_session, researcher_token, create_survey):
+    # Arrange
+    survey, question = await _create_answered_survey(db_session, create_survey)
+    headers = {"Authorization": f"Bearer {researcher_token}"}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        first = await ac.post(f"/surveys/{survey.id}/answers/exports", json={"format": "csv"}, headers=headers)
+        await export_jobs.export_workers.join()
+
+        #same answers, but the header of the artifact is stale
+        await db_session.execute(update(Question).where(Question.id == question.id).values(description="Renamed Question"))
+        await db_session.commit()
+
+        # Act
+        refreshed = await ac.post(f"/surveys/{survey.id}/answers/exports", json={"format": "csv"}, headers=headers)
+        await export_jobs.export_workers.join()
+        download = await ac.get(f"/surveys/{survey.id}/answers/exports/{refreshed.json()['id']}/download", headers=headers)
+
+    # Assert
+    assert refreshed.status_code == 202
+    assert refreshed.json()["id"] != first.json()["id"]
+    assert download.text.splitlines()[0] == "user,Renamed Question"
+
+
+async def _add_job(db_session, survey, **values):
+    job = ExportJob(survey_id=survey.id, requested_by=survey.owner_id, format="csv", multiple_choice="joined", answer_count=1, **values)
+    db_session.add(job)
+    await db_session.commit()
+    return job.id
+
+
+async def _job_status(db_session, job_id):
+    db_session.expire_all()
+    return (await db_session.execute(select(ExportJob.status).where(ExportJob.id == job_id))).scalar_one_or_none()
+
+
+@pytest.mark.asyncio
+async def test_reclaim_only_jobs_with_lapsed_leases(db_session, create_survey):
+    # Arrange
+    survey, _ = await _create_answered_survey(db_session, create_survey)
+    now = datetime.now()
+    #still leased by a live worker of another process
+    leased = await _add_job(db_session, survey, status="running", lease_expires_at=now + timedelta(seconds=30))
+    #its worker died mid-export
+    lapsed = await _add_job(db_session, survey, status="running", lease_expires_at=now - timedelta(seconds=1))
+    #queued in memory by a process that died before claiming it
+    abandoned = await _add_job(db_session, survey, status="pending", created_at=now - timedelta(minutes=10))
+    #just requested, its process is about to claim it
+    queued = await _add_job(db_session, survey, status="pending")
+
+    # Act
+    reclaimed = await export_jobs.reclaim_export_jobs()
+    for job_id in reclaimed:
+        export_jobs.export_workers.submit(job_id)
+    await export_jobs.export_workers.join()
+
+    # Assert
+    assert set(reclaimed) == {lapsed, abandoned}
+    assert await _job_status(db_session, leased) == "running"
+    assert await _job_status(db_session, lapsed) == "completed"
+    assert await _job_status(db_session, abandoned) == "completed"
+    assert await _job_status(db_session, queued) == "pending"
+
+
+@pytest.mark.asyncio
+async def test_export_job_keeps_lease_while_writer_stalls(db_session, tmp_path, monkeypatch, create_survey):
+    # Arrange
+    survey, _ = await _create_answered_survey(db_session, create_survey)
+    monkeypatch.setattr(export_jobs, "EXPORT_LEASE_SECONDS", 0.6)
+    stalled = asyncio.Event()
+    resume = asyncio.Event()
+
+    async def stalled_writer(db, survey_id, questions, layout):
+        #like the workbook writer, nothing is yielded until the whole file is built
+        await db.close()
+        stalled.set()
+        await resume.wait()
+        yield "user\n"
+
+    monkeypatch.setitem(export_jobs.EXPORT_FORMATS, AvailableFormatsEnum.csv, ExportFormat(stalled_writer, "text/csv", "csv"))
+    job_id = await _add_job(db_session, survey, status="pending")
+
+    # Act
+    running = asyncio.create_task(export_jobs.run_export_job(job_id))
+    await stalled.wait()
+    await asyncio.sleep(1.5)
+    reclaimed = await export_jobs.reclaim_export_jobs()
+    partial_files = os.listdir(tmp_path)
+    resume.set()
+    await running
+
+    # Assert
+    assert reclaimed == []
+    assert len(partial_files) == 1 and partial_files[0].startswith(f"{job_id}.csv.") and partial_files[0].endswith(".part")
+    assert await _job_status(db_session, job_id) == "completed"
+    assert os.listdir(tmp_path) == [f"{job_id}.csv"]
+
+
+@pytest.mark.asyncio
+async def test_sweep_deletes_expired_jobs_and_artifacts(db_session, tmp_path, create_survey):
+    # Arrange
+    survey, _ = await _create_answered_survey(db_session, create_survey)
+    old_path, recent_path, orphan_path = tmp_path / "old.csv", tmp_path / "recent.csv", tmp_path / "orphan.csv"
+    for path in (old_path, recent_path, orphan_path):
+        path.write_text("user")
+    two_days_ago = (datetime.now() - timedelta(days=2)).timestamp()
+    os.utime(old_path, (two_days_ago, two_days_ago))
+    os.utime(orphan_path, (two_days_ago, two_days_ago))
+
+    old = await _add_job(db_session, survey, status="completed", path=str(old_path), finished_at=datetime.now() - timedelta(days=2))
+    failed = await _add_job(db_session, survey, status="failed", finished_at=datetime.now() - timedelta(days=2))
+    recent = await _add_job(db_session, survey, status="completed", path=str(recent_path), finished_at=datetime.now())
+
+    # Act
+    swept = await export_jobs.sweep_export_jobs(max_age_hours=24)
+
+    # Assert
+    assert swept == 2
+    assert await _job_status(db_session, old) is None
+    assert await _job_status(db_session, failed) is None
+    assert await _job_status(db_session, recent) == "completed"
+    assert sorted(os.listdir(tmp_path)) == ["recent.csv"]
+
+
+@pytest.mark.asyncio
+async def test_export_job_download_before_completion(db_session, researcher_token, monkeypatch, create_survey):
+    # Arrange
+    survey, _ = await _create_answered_survey(db_session, create_survey)
+    headers = {"Authorization": f"Bearer {researcher_token}"}
+    monkeypatch.setattr(export_jobs.export_workers, "submit", lambda job_id: None)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        # Act
+        created = await ac.post(f"/surveys/{survey.id}/answers/exports", json={"format": "csv"}, headers=headers)
+        response = await ac.get(f"/surveys/{survey.id}/answers/exports/{created.json()['id']}/download", headers=headers)
+
+    # Assert
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Export job is pending"
+
+
+@pytest.mark.asyncio
+async def test_export_job_not_assigned(db_session, participant_token, create_survey):
+    # Arrange
+    survey, _ = await _create_answered_survey(db_session, create_survey, scope="private")
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        # Act
+        response = await ac.post(f"/surveys/{survey.id}/answers/exports", json={"format": "csv"}, headers={"Authorization": f"Bearer {participant_token}"})
+
+    # Assert
+    assert response.status_code == 403
+    assert response.json()["detail"] == "Access denied: User not assigned to this survey"
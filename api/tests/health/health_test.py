@@ -8,3 +8,25 @@ async def test_health():
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
         response = await ac.get("/health")
         assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_health_pool():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get("/health/pool")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["pool_size"] >= 1
+        assert data["connections_in_use"] >= 0
+        assert "checkout_wait_max_ms" in data
+
+
+@pytest.mark.asyncio
+async def test_health_passwords():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get("/health/passwords")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["workers"] >= 1
+        assert data["in_flight"] == 0
+        assert "wait_avg_ms" in data
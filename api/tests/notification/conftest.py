@@ -0,0 +1,56 @@
+import httpx
+import pytest
+import pytest_asyncio
+from src.models.UserModel import User
+from src.models.UserFcmTokenModel import UserFcmToken
+from src.shared import notification_outbox
+from src.shared.notifications import fcm_client
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def outbox(test_engine, monkeypatch):
+    """Point the outbox at the test database; the dispatcher is not started, tests drain the outbox themselves.
+    Yields the dispatcher wake-ups."""
+    woken = []
+    monkeypatch.setattr(notification_outbox, "outbox_session_factory", sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False))
+    monkeypatch.setattr(notification_outbox.notification_dispatcher, "wake", lambda: woken.append(True))
+    yield woken
+
+
+@pytest.fixture()
+def fcm_replies(monkeypatch):
+    """Answer FCM sends with a status code, or with a function of the message returning a status code or a response.
+    Returns the messages sent."""
+    sent = []
+
+    def reply_with(reply):
+        async def send(message):
+            sent.append(message)
+            response = reply(message) if callable(reply) else reply
+            if isinstance(response, int):
+                response = httpx.Response(response, json={"name": "projects/test/messages/1"} if response == 200 else {"error": {"code": response}})
+            return response
+
+        monkeypatch.setattr(fcm_client, "send", send)
+        return sent
+
+    return reply_with
+
+
+@pytest_asyncio.fixture()
+async def participant(db_session):
+    return (await db_session.execute(select(User).where(User.email == "participant@test.com"))).unique().scalars().first()
+
+
+@pytest.fixture()
+def register_fcm_tokens(db_session):
+    """Register devices of a user, flushed but not committed"""
+
+    async def register(user, *tokens, **values):
+        db_session.add_all([UserFcmToken(user_id=user.id, fcm_token=token, **values) for token in tokens])
+        await db_session.flush()
+
+    return register
@@ -0,0 +1,98 @@
+from httpx import AsyncClient, ASGITransport
+import pytest
+from src.main import app
+from src.models.CategoryModel import Category
+from src.models.OrganizationModel import Organization
+from src.models.UserModel import User
+from src.models.NotificationOutboxModel import NotificationOutbox
+from src.shared import notification_outbox
+from sqlalchemy import select
+from datetime import date, timedelta
+
+
+@pytest.fixture(autouse=True)
+def small_batches(monkeypatch):
+    #small chunks so a handful of members spans several of them
+    monkeypatch.setattr(notification_outbox, "NOTIFICATION_BATCH_SIZE", 3)
+    monkeypatch.setattr(notification_outbox, "NOTIFICATION_WORKERS", 2)
+
+
+async def _publish_organization_survey(db_session, researcher_token, participant, register_fcm_tokens, members):
+    category = Category(name="Test Category")
+    organization = Organization(name="Test Organization")
+    other_organization = Organization(name="Other Organization")
+    db_session.add_all([category, organization, other_organization])
+    await db_session.flush()
+
+    researcher = (await db_session.execute(select(User).where(User.email == "researcher@test.com"))).unique().scalars().first()
+    researcher.organization_id = participant.organization_id = organization.id
+
+    users = [
+        User(email=f"member{i}@test.com", password="test1234", name="Member", lastname=str(i), role="participant", organization_id=researcher.organization_id)
+        for i in range(members)
+    ]
+    muted = User(email="muted@test.com", password="test1234", name="Muted", lastname="Member", role="participant", organization_id=researcher.organization_id, allow_notifications=False)
+    outsider = User(email="outsider@test.com", password="test1234", name="Outsider", lastname="User", role="participant", organization_id=other_organization.id)
+    db_session.add_all(users + [muted, outsider])
+    await db_session.flush()
+
+    for user in users:
+        await register_fcm_tokens(user, f"member-{user.lastname}")
+    await register_fcm_tokens(participant, "participant-phone", "participant-tablet")
+    await register_fcm_tokens(researcher, "owner")
+    await register_fcm_tokens(muted, "muted")
+    await register_fcm_tokens(outsider, "outsider")
+    await db_session.commit()
+
+    survey_data = {
+        "name": "Organization Survey",
+        "scope": "organization",
+        "category_id": str(category.id),
+        "owner_id": str(researcher.id),
+        "organization_id": str(researcher.organization_id),
+        "start_date": str(date.today()),
+        "end_date": str(date.today() + timedelta(days=7)),
+        "questions": [{"description": "Comments", "type": "open", "required": True, "options": []}],
+        "notification_title": "New survey",
+        "notification_body": "Please answer it"
+    }
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post("/surveys", json=survey_data, headers={"Authorization": f"Bearer {researcher_token}"})
+
+    assert response.status_code == 201
+    return response.json()
+
+
+@pytest.mark.asyncio
+async def test_publish_organization_survey_notifies_every_member(db_session, researcher_token, outbox, participant, register_fcm_tokens, fcm_replies):
+    # Arrange
+    sent = fcm_replies(200)
+    survey = await _publish_organization_survey(db_session, researcher_token, participant, register_fcm_tokens, members=5)
+
+    # Act
+    result = await notification_outbox.drain_outbox()
+
+    # Assert
+    assert outbox == [True]
+    assert (result.claimed, result.sent, result.retried, result.dead) == (7, 7, 0, 0)
+    assert sorted(m["token"] for m in sent) == ["member-0", "member-1", "member-2", "member-3", "member-4", "participant-phone", "participant-tablet"]
+    assert sent[0]["notification"] == {"title": "New survey", "body": "Please answer it"}
+    assert sent[0]["data"] == {"type": "survey_published", "survey_id": survey["id"], "survey_name": "Organization Survey", "email": "researcher@test.com"}
+    assert (await db_session.execute(select(NotificationOutbox))).scalars().all() == []
+
+
+@pytest.mark.asyncio
+async def test_publish_organization_survey_accounts_for_each_outcome(db_session, researcher_token, participant, register_fcm_tokens, fcm_replies):
+    # Arrange
+    fcm_replies(lambda message: {"member-0": 503, "member-1": 400}.get(message["token"], 200))
+    await _publish_organization_survey(db_session, researcher_token, participant, register_fcm_tokens, members=4)
+
+    # Act
+    result = await notification_outbox.drain_outbox()
+
+    # Assert
+    assert (result.claimed, result.sent, result.retried, result.dead) == (6, 4, 1, 1)
+    db_session.expire_all()
+    rows = (await db_session.execute(select(NotificationOutbox.token, NotificationOutbox.status).order_by(NotificationOutbox.token))).all()
+    assert rows == [("member-0", "pending"), ("member-1", "dead")]
@@ -0,0 +1,123 @@
+from httpx import AsyncClient, ASGITransport
+import pytest
+import pytest_asyncio
+from src.main import app
+from src.models.SurveyModel import Survey
+from src.models.CategoryModel import Category
+from src.models.UserModel import User
+from src.models.NotificationOutboxModel import NotificationOutbox
+from src.shared import notification_outbox
+from sqlalchemy import select, update
+from datetime import date, datetime, timedelta
+
+
+@pytest_asyncio.fixture()
+async def invite_participant(db_session, admin_token, participant, register_fcm_tokens):
+    """Assign the participant, who has two devices, to a new private survey"""
+
+    async def invite(allow_notifications=True):
+        category = Category(name="Test Category")
+        db_session.add(category)
+        await db_session.flush()
+
+        researcher = (await db_session.execute(select(User).where(User.email == "researcher@test.com"))).unique().scalars().first()
+        participant.allow_notifications = allow_notifications
+
+        survey = Survey(
+            name="Test Survey",
+            description="Test Description",
+            scope="private",
+            category_id=category.id,
+            owner_id=researcher.id,
+            start_date=date.today(),
+            end_date=date.today() + timedelta(days=7)
+        )
+        db_session.add(survey)
+        await register_fcm_tokens(participant, "device-1", "device-2")
+        await db_session.commit()
+
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            response = await ac.post(
+                f"/surveys/{survey.id}/users/add",
+                headers={"Authorization": f"Bearer {admin_token}"},
+                json={"email": participant.email, "notification_title": "Test Notification", "notification_body": "Test Body"}
+            )
+
+        assert response.status_code == 200
+        return survey
+
+    return invite
+
+
+async def _outbox_rows(db_session):
+    db_session.expire_all()
+    result = await db_session.execute(select(NotificationOutbox).order_by(NotificationOutbox.token))
+    return result.scalars().all()
+
+
+@pytest.mark.asyncio
+async def test_assign_user_queues_and_dispatches_notifications(db_session, outbox, invite_participant, fcm_replies):
+    # Arrange
+    sent = fcm_replies(200)
+    survey = await invite_participant()
+    queued = await _outbox_rows(db_session)
+
+    # Act
+    dispatched = await notification_outbox.drain_outbox()
+
+    # Assert
+    assert outbox == [True]
+    assert [row.token for row in queued] == ["device-1", "device-2"]
+    assert (dispatched.claimed, dispatched.sent) == (2, 2)
+    assert sorted(m["token"] for m in sent) == ["device-1", "device-2"]
+    assert sent[0]["notification"] == {"title": "Test Notification", "body": "Test Body"}
+    assert sent[0]["data"]["survey_id"] == str(survey.id)
+    assert await _outbox_rows(db_session) == []
+
+
+@pytest.mark.asyncio
+async def test_assign_user_without_notifications_queues_nothing(db_session, outbox, invite_participant, fcm_replies):
+    # Arrange
+    fcm_replies(200)
+
+    # Act
+    await invite_participant(allow_notifications=False)
+
+    # Assert
+    assert outbox == []
+    assert await _outbox_rows(db_session) == []
+
+
+@pytest.mark.asyncio
+async def test_dispatch_retries_transient_failures_then_dead_letters(db_session, invite_participant, fcm_replies, monkeypatch):
+    # Arrange
+    fcm_replies(503)
+    monkeypatch.setattr(notification_outbox, "NOTIFICATION_MAX_ATTEMPTS", 2)
+    await invite_participant()
+
+    # Act
+    await notification_outbox.drain_outbox()
+    retried = [(row.status, row.attempts, row.last_error) for row in await _outbox_rows(db_session)]
+    #make the retries due now
+    await db_session.execute(update(NotificationOutbox).values(next_attempt_at=datetime(2000, 1, 1)))
+    await db_session.commit()
+    await notification_outbox.drain_outbox()
+    dead = await _outbox_rows(db_session)
+
+    # Assert
+    assert [(status, attempts) for status, attempts, _ in retried] == [("pending", 1), ("pending", 1)]
+    assert all(error.startswith("503") for _, _, error in retried)
+    assert [(row.status, row.attempts) for row in dead] == [("dead", 2), ("dead", 2)]
+
+
+@pytest.mark.asyncio
+async def test_dispatch_dead_letters_rejected_messages(db_session, invite_participant, fcm_replies):
+    # Arrange
+    fcm_replies(400)
+    await invite_participant()
+
+    # Act
+    await notification_outbox.drain_outbox()
+
+    # Assert
+    assert [(row.status, row.attempts) for row in await _outbox_rows(db_session)] == [("dead", 1), ("dead", 1)]
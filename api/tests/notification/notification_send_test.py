@@ -0,0 +1,63 @@
+import asyncio
+import time
+import httpx
+import pytest
+from src.shared.notifications import FcmClient
+
+
+def _fcm_client(handler, tokens):
+    client = FcmClient("test-project", "unused.json", transport=httpx.MockTransport(handler))
+
+    #each refresh hands out the next token, valid for an hour
+    def fetch_token():
+        time.sleep(0.05)
+        tokens.append(f"token-{len(tokens) + 1}")
+        return tokens[-1], time.monotonic() + 3600
+
+    client._fetch_token = fetch_token
+    return client
+
+
+@pytest.mark.asyncio
+async def test_send_notifications_share_one_token_refresh():
+    # Arrange
+    tokens = []
+    authorizations = []
+
+    def handler(request):
+        authorizations.append(request.headers["Authorization"])
+        return httpx.Response(200, json={"name": "projects/test-project/messages/1"})
+
+    client = _fcm_client(handler, tokens)
+
+    # Act
+    responses = await asyncio.gather(*(client.send({"token": f"device-{i}"}) for i in range(10)))
+    await client.send({"token": "device-10"})
+    await client.aclose()
+
+    # Assert
+    assert [r.status_code for r in responses] == [200] * 10
+    assert tokens == ["token-1"]
+    assert set(authorizations) == {"Bearer token-1"}
+    assert len(authorizations) == 11
+
+
+@pytest.mark.asyncio
+async def test_send_notification_refreshes_rejected_token():
+    # Arrange
+    tokens = []
+
+    def handler(request):
+        if request.headers["Authorization"] == "Bearer token-1":
+            return httpx.Response(401, json={"error": {"status": "UNAUTHENTICATED"}})
+        return httpx.Response(200, json={"name": "projects/test-project/messages/1"})
+
+    client = _fcm_client(handler, tokens)
+
+    # Act
+    response = await client.send({"token": "device"})
+    await client.aclose()
+
+    # Assert
+    assert response.status_code == 200
+    assert tokens == ["token-1", "token-2"]
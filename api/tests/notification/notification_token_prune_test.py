@@ -0,0 +1,88 @@
+import httpx
+import pytest
+import pytest_asyncio
+from src.models.UserFcmTokenModel import UserFcmToken
+from src.models.NotificationOutboxModel import NotificationOutbox
+from src.schemas.NotificationSchema import NotificationRequest
+from src.shared import notification_outbox
+from src.shared.fcm_tokens import sweep_stale_fcm_tokens
+from sqlalchemy import select
+from datetime import datetime, timedelta
+
+
+def _fcm_error(status_code, status, error_code, message="Requested entity was not found."):
+    return httpx.Response(status_code, json={"error": {
+        "code": status_code,
+        "message": message,
+        "status": status,
+        "details": [{"@type": "type.googleapis.com/google.firebase.fcm.v1.FcmError", "errorCode": error_code}],
+    }})
+
+
+@pytest_asyncio.fixture()
+async def queue_for_participant(db_session, participant, register_fcm_tokens):
+    """Queue a notification for each of the participant's devices"""
+
+    async def queue(tokens):
+        await register_fcm_tokens(participant, *tokens)
+        await notification_outbox.enqueue_notifications(db_session, [participant.id], NotificationRequest(title="Test Notification", body="Test Body"))
+        await db_session.commit()
+
+    return queue
+
+
+async def _registered_tokens(db_session):
+    db_session.expire_all()
+    result = await db_session.execute(select(UserFcmToken.fcm_token).order_by(UserFcmToken.fcm_token))
+    return result.scalars().all()
+
+
+@pytest.mark.asyncio
+async def test_dispatch_prunes_unregistered_tokens(db_session, queue_for_participant, fcm_replies):
+    # Arrange
+    replies = {
+        "alive": httpx.Response(200, json={"name": "projects/test/messages/1"}),
+        "uninstalled": _fcm_error(404, "NOT_FOUND", "UNREGISTERED"),
+        "other-project": _fcm_error(403, "PERMISSION_DENIED", "SENDER_ID_MISMATCH"),
+        "garbled": _fcm_error(400, "INVALID_ARGUMENT", "INVALID_ARGUMENT", "The registration token is not a valid FCM registration token"),
+    }
+
+    fcm_replies(lambda message: replies[message["token"]])
+    await queue_for_participant(replies)
+
+    # Act
+    result = await notification_outbox.drain_outbox()
+
+    # Assert
+    assert (result.claimed, result.sent, result.pruned, result.dead) == (4, 1, 3, 0)
+    assert await _registered_tokens(db_session) == ["alive"]
+    assert (await db_session.execute(select(NotificationOutbox))).scalars().all() == []
+
+
+@pytest.mark.asyncio
+async def test_dispatch_keeps_tokens_of_malformed_messages(db_session, queue_for_participant, fcm_replies):
+    # Arrange
+    fcm_replies(_fcm_error(400, "INVALID_ARGUMENT", "INVALID_ARGUMENT", "Invalid value at 'message.data'"))
+    await queue_for_participant(["device"])
+
+    # Act
+    result = await notification_outbox.drain_outbox()
+
+    # Assert
+    assert (result.pruned, result.dead) == (0, 1)
+    assert await _registered_tokens(db_session) == ["device"]
+
+
+@pytest.mark.asyncio
+async def test_sweep_deletes_tokens_not_registered_again(db_session, participant, register_fcm_tokens):
+    # Arrange
+    await register_fcm_tokens(participant, "recent", updated_at=datetime.now() - timedelta(days=5))
+    await register_fcm_tokens(participant, "stale", updated_at=datetime.now() - timedelta(days=90))
+    await db_session.commit()
+
+    # Act
+    swept = await sweep_stale_fcm_tokens(db_session, max_age_days=60)
+
+    # Assert
+    assert swept == 1
+    assert await _registered_tokens(db_session) == ["recent"]
@@ -67,3 +67,24 @@ async def test_get_organization_by_id_unauthorized():
     # Assert
     assert response.status_code == 401
 
+
+
+@pytest.mark.asyncio
+async def test_get_organization_by_id_counts(db_session, admin_token):
+    # Arrange
+    org = Organization(name="Test Organization")
+    db_session.add(org)
+    await db_session.flush()
+    await db_session.refresh(org)
+
+    db_session.add_all([User(email=f"user{i}@test.com", password="test123", name=f"User{i}", lastname="Test", role="participant", organization_id=org.id) for i in range(3)])
+    await db_session.commit()
+
+    # Act
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get(f"/organizations/{org.id}", headers={"Authorization": f"Bearer {admin_token}"})
+
+    # Assert
+    assert response.status_code == 200
+    assert response.json()["users_count"] == 3
+    assert response.json()["surveys_count"] == 0
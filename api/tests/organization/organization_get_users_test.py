@@ -134,3 +134,63 @@ async def test_get_users_in_organization_forbidden(db_session, researcher_token)
     assert response.status_code == 403
 
 
+
+
+@pytest.mark.asyncio
+async def test_get_users_in_organization_paginated_desc(db_session, admin_token):
+    # Arrange
+    org = Organization(name="Test Organization")
+    db_session.add(org)
+    await db_session.flush()
+    await db_session.refresh(org)
+
+    db_session.add_all([User(email=f"user{i}@test.com", password="test123", name=f"User{i}", lastname="Test", role="participant", organization_id=org.id) for i in range(3)])
+    await db_session.commit()
+
+    # Act
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        first = await ac.get(f"/organizations/{org.id}/users", params={"limit": 2, "order": "DESC"}, headers={"Authorization": f"Bearer {admin_token}"})
+        second = await ac.get(f"/organizations/{org.id}/users", params={"limit": 2, "order": "DESC", "cursor": first.json()["next_cursor"]}, headers={"Authorization": f"Bearer {admin_token}"})
+
+    # Assert
+    assert first.status_code == 200
+    assert [u["email"] for u in first.json()["users"]] == ["user2@test.com", "user1@test.com"]
+    assert [u["email"] for u in second.json()["users"]] == ["user0@test.com"]
+    assert second.json()["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_get_users_in_organization_sorted_by_role(db_session, admin_token):
+    # Arrange
+    org = Organization(name="Test Organization")
+    db_session.add(org)
+    await db_session.flush()
+    await db_session.refresh(org)
+
+    db_session.add(User(email="a@test.com", password="test123", name="A", lastname="Test", role="participant", organization_id=org.id))
+    db_session.add(User(email="b@test.com", password="test123", name="B", lastname="Test", role="researcher", organization_id=org.id))
+    await db_session.commit()
+
+    # Act
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get(f"/organizations/{org.id}/users", params={"sortBy": "role", "order": "DESC"}, headers={"Authorization": f"Bearer {admin_token}"})
+
+    # Assert
+    assert response.status_code == 200
+    assert [u["role"] for u in response.json()["users"]] == ["researcher", "participant"]
+
+
+@pytest.mark.asyncio
+async def test_get_users_in_organization_invalid_sort_field(db_session, admin_token):
+    # Arrange
+    org = Organization(name="Test Organization")
+    db_session.add(org)
+    await db_session.commit()
+    await db_session.refresh(org)
+
+    # Act
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get(f"/organizations/{org.id}/users", params={"sortBy": "password"}, headers={"Authorization": f"Bearer {admin_token}"})
+
+    # Assert
+    assert response.status_code == 400
@@ -8,7 +8,8 @@ from src.models.UserModel import User
 from src.models.OrganizationModel import Organization
 from src.models.QuestionModel import Question
 from src.models.AnswerModel import Answer
-from sqlalchemy import select
+from src.shared.response_cache import highlighted_surveys_cache
+from sqlalchemy import delete, select
 import uuid
 from datetime import date, timedelta
 
@@ -265,3 +266,53 @@ async def test_get_highlighted_public_surveys_expired(db_session, admin_token):
     assert response.status_code == 200
     data = response.json()["surveys"]
     assert len(data) == 0  # It should not show expired surveys
+
+@pytest.mark.asyncio
+async def test_get_highlighted_public_surveys_ranked_by_respondents(db_session, admin_token):
+    # Arrange
+    category = Category(name="Test Category")
+    db_session.add(category)
+    await db_session.flush()
+
+    researcher = (await db_session.execute(select(User).where(User.email == "researcher@test.com"))).unique().scalars().first()
+    participant = (await db_session.execute(select(User).where(User.email == "participant@test.com"))).unique().scalars().first()
+
+    surveys = [
+        Survey(name=name, description="Description", scope=scope, category_id=category.id, owner_id=researcher.id,
+               start_date=date.today(), end_date=date.today() + timedelta(days=7))
+        for name, scope in [("Long Survey", "public"), ("Shared Survey", "public"), ("Private Survey", "private")]
+    ]
+    db_session.add_all(surveys)
+    await db_session.flush()
+
+    questions = [Question(number=n, description=f"Question {n}", survey_id=survey.id, required=True, type="open") for survey in surveys for n in (1, 2, 3)]
+    db_session.add_all(questions)
+    await db_session.flush()
+    long_questions, shared_questions, private_questions = questions[0:3], questions[3:6], questions[6:9]
+
+    db_session.add_all(
+        [Answer(question_id=q.id, user_id=participant.id, text="Answer") for q in long_questions]
+        + [Answer(question_id=shared_questions[0].id, user_id=user.id, text="Answer") for user in (participant, researcher)]
+        + [Answer(question_id=q.id, user_id=user.id, text="Answer") for q in private_questions for user in (participant, researcher)]
+    )
+    await db_session.commit()
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        # Act
+        ranked = await ac.get("/surveys/public/highlighted", headers={"Authorization": f"Bearer {admin_token}"})
+
+        await db_session.execute(delete(Answer).where(Answer.question_id == shared_questions[0].id, Answer.user_id == researcher.id))
+        await db_session.commit()
+        #answer writes do not invalidate the highlighted cache, its entry would otherwise live until the TTL
+        highlighted_surveys_cache.invalidate()
+        reranked = await ac.get("/surveys/public/highlighted", headers={"Authorization": f"Bearer {admin_token}"})
+
+    # Assert
+    assert [(s["name"], s["respondent_count"], s["response_count"]) for s in ranked.json()["surveys"]] == [
+        ("Shared Survey", 2, 2),
+        ("Long Survey", 1, 3),
+    ]
+    assert [(s["name"], s["respondent_count"], s["response_count"]) for s in reranked.json()["surveys"]] == [
+        ("Long Survey", 1, 3),
+        ("Shared Survey", 1, 1),
+    ]
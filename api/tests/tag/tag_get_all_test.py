@@ -1,3 +1,5 @@
+import base64
+import json
 from httpx import AsyncClient, ASGITransport
 import pytest
 import pytest_asyncio
@@ -42,3 +44,53 @@ async def test_get_all_tags_unauthorized(db_session):
     assert response.status_code == 401
 
 
+
+
+@pytest.mark.asyncio
+async def test_get_all_tags_paginated(db_session, admin_token):
+    # Arrange
+    db_session.add_all([Tag(name=f"Tag {i}") for i in range(5)])
+    await db_session.commit()
+
+    # Act
+    names = []
+    cursor = None
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        for _ in range(3):
+            params = {"limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = await ac.get("/tags", params=params, headers={"Authorization": f"Bearer {admin_token}"})
+            assert response.status_code == 200
+            names.extend(tag["name"] for tag in response.json()["tags"])
+            cursor = response.json()["next_cursor"]
+
+    # Assert
+    assert names == [f"Tag {i}" for i in range(5)]
+    assert cursor is None
+
+
+@pytest.mark.asyncio
+async def test_get_all_tags_invalid_cursor(db_session, admin_token):
+    # Act
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get("/tags", params={"cursor": "not-a-cursor"}, headers={"Authorization": f"Bearer {admin_token}"})
+
+    # Assert
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+@pytest.mark.asyncio
+async def test_get_all_tags_cursor_with_non_string_values(db_session, admin_token):
+    # Arrange
+    #well-formed base64 JSON, but the values were not written by encode_cursor
+    cursor = base64.urlsafe_b64encode(json.dumps([1, 2]).encode("utf-8")).decode("ascii").rstrip("=")
+
+    # Act
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get("/tags", params={"cursor": cursor}, headers={"Authorization": f"Bearer {admin_token}"})
+
+    # Assert
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
@@ -178,3 +178,33 @@ async def test_delete_user_forbidden(db_session, researcher_token):
 
     # Assert
     assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_delete_user_token_rejected_after_delete(db_session, researcher_token):
+    # Arrange
+    researcher = await db_session.execute(select(User).where(User.email == "researcher@test.com"))
+    researcher = researcher.unique().scalars().first()
+
+    delete_data = {
+        "password": "test123"
+    }
+
+    # Act
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        #the first request caches the researcher principal
+        response = await ac.get("/users/me", headers={"Authorization": f"Bearer {researcher_token}"})
+        assert response.status_code == 200
+
+        response = await ac.request(
+            "DELETE",
+            f"/users/{researcher.id}",
+            json=delete_data,
+            headers={"Authorization": f"Bearer {researcher_token}"}
+        )
+        assert response.status_code == 204
+
+        response = await ac.get("/users/me", headers={"Authorization": f"Bearer {researcher_token}"})
+
+    # Assert
+    assert response.status_code == 401
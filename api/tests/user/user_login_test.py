@@ -5,6 +5,7 @@ from src.main import app
 from src.models.UserModel import User
 from sqlalchemy import select
 import bcrypt
+import jwt
 
 @pytest.mark.asyncio
 async def test_login_success(db_session):
@@ -67,3 +68,68 @@ async def test_login_nonexistent_user(db_session):
     # Assert
     assert response.status_code == 404
     assert response.json()["detail"] == "User not found"
+
+
+@pytest.mark.asyncio
+async def test_login_token_carries_role_claims(db_session):
+    # Arrange
+    login_data = {
+        "username": "participant@test.com",
+        "password": "test123"
+    }
+
+    # Act
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post(
+            "/users/login",
+            data=login_data,
+            headers={"Content-Type": "application/x-www-form-urlencoded"}
+        )
+
+    # Assert
+    assert response.status_code == 200
+    payload = jwt.decode(response.json()["access_token"], options={"verify_signature": False})
+    assert payload["role"] == "participant"
+    assert payload["ver"] == 0
+
+@pytest.mark.asyncio
+async def test_login_rehashes_password_with_new_cost(db_session, monkeypatch):
+    # Arrange
+    from src.auth.Passwords import password_hasher
+    monkeypatch.setattr(password_hasher, "rounds", 5)
+    admin = (await db_session.execute(select(User).where(User.email == "admin@test.com"))).unique().scalars().first()
+    admin.password = bcrypt.hashpw("test123".encode("utf-8"), bcrypt.gensalt(4)).decode("utf-8")
+    await db_session.commit()
+    old_hash = admin.password
+    rehashed = password_hasher.rehashed
+
+    # Act
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        first = await ac.post("/users/login", data={"username": "admin@test.com", "password": "test123"})
+        second = await ac.post("/users/login", data={"username": "admin@test.com", "password": "test123"})
+
+    # Assert
+    assert (first.status_code, second.status_code) == (200, 200)
+    new_hash = (await db_session.execute(select(User.password).where(User.email == "admin@test.com"))).scalar_one()
+    assert new_hash != old_hash
+    assert new_hash.startswith("$2b$05$")
+    assert bcrypt.checkpw("test123".encode("utf-8"), new_hash.encode("utf-8"))
+    #the second login finds the upgraded hash and leaves it alone
+    assert password_hasher.rehashed == rehashed + 1
+
+
+@pytest.mark.asyncio
+async def test_login_keeps_password_with_higher_cost(db_session, monkeypatch):
+    # Arrange
+    from src.auth.Passwords import password_hasher
+    monkeypatch.setattr(password_hasher, "rounds", 5)
+    old_hash = (await db_session.execute(select(User.password).where(User.email == "admin@test.com"))).scalar_one()
+
+    # Act
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post("/users/login", data={"username": "admin@test.com", "password": "test123"})
+
+    # Assert
+    assert response.status_code == 200
+    db_session.expire_all()
+    assert (await db_session.execute(select(User.password).where(User.email == "admin@test.com"))).scalar_one() == old_hash
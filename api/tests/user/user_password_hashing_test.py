@@ -0,0 +1,74 @@
+import asyncio
+import bcrypt
+import pytest
+from fastapi import HTTPException
+from src.auth.Passwords import PasswordHasher
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_round_trip():
+    # Arrange
+    hasher = PasswordHasher(workers=2, max_queue=2, rounds=4)
+
+    # Act
+    hashed = await hasher.hash("secret")
+
+    # Assert
+    assert await hasher.verify("secret", hashed)
+    assert not await hasher.verify("wrong", hashed)
+    assert not hasher.needs_rehash(hashed)
+    assert PasswordHasher(workers=1, max_queue=0, rounds=5).needs_rehash(hashed)
+    #a stronger hash is kept when the configured cost is lowered
+    assert not PasswordHasher(workers=1, max_queue=0, rounds=4).needs_rehash(bcrypt.hashpw(b"secret", bcrypt.gensalt(5)).decode("utf-8"))
+    assert hasher.status()["completed"] == 3
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_rejects_calls_beyond_queue_limit():
+    # Arrange
+    hasher = PasswordHasher(workers=1, max_queue=1, rounds=4)
+
+    # Act
+    results = await asyncio.gather(*(hasher.hash("secret") for _ in range(3)), return_exceptions=True)
+
+    # Assert
+    rejected = [r for r in results if isinstance(r, HTTPException)]
+    assert len(rejected) == 1
+    assert rejected[0].status_code == 503
+    assert hasher.status()["rejected"] == 1
+    assert hasher.status()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_rehash_counts_upgrades():
+    # Arrange
+    hasher = PasswordHasher(workers=1, max_queue=0, rounds=4)
+
+    # Act
+    hashed = await hasher.rehash("secret")
+
+    # Assert
+    assert await hasher.verify("secret", hashed)
+    assert hasher.status()["rehashed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_counts_cancelled_calls_until_done():
+    # Arrange
+    hasher = PasswordHasher(workers=1, max_queue=0, rounds=12)
+    running = asyncio.create_task(hasher.hash("secret"))
+    #a cost 12 hash takes far longer than this, so it is still running when the caller goes away
+    await asyncio.sleep(0.01)
+
+    # Act
+    running.cancel()
+    await asyncio.gather(running, return_exceptions=True)
+    #bcrypt is still running in the worker thread
+    with pytest.raises(HTTPException) as rejected:
+        await hasher.hash("secret")
+    while hasher.in_flight:
+        await asyncio.sleep(0.01)
+
+    # Assert
+    assert rejected.value.status_code == 503
+    assert hasher.status()["completed"] == 1
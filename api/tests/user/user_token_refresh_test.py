@@ -0,0 +1,170 @@
+from httpx import AsyncClient, ASGITransport
+import pytest
+from src.main import app
+from src.models.RefreshTokenModel import RefreshToken
+from src.auth.Passwords import password_hasher
+from src.auth import RefreshTokens
+from src.auth.RefreshTokens import hash_refresh_token, refresh_token_sweeper, revoked_refresh_tokens, sweep_expired_refresh_tokens
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+import asyncio
+from datetime import datetime, timedelta
+
+
+async def _login(ac, email="participant@test.com"):
+    response = await ac.post(
+        "/users/login",
+        data={"username": email, "password": "test123"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"}
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+async def _refresh(ac, refresh_token):
+    return await ac.post("/users/token/refresh", json={"refresh_token": refresh_token})
+
+
+async def _stored_tokens(db_session):
+    db_session.expire_all()
+    result = await db_session.execute(select(RefreshToken.token_hash, RefreshToken.rotated_at, RefreshToken.revoked_at).order_by(RefreshToken.created_at))
+    return result.all()
+
+
+@pytest.mark.asyncio
+async def test_refresh_token_success(db_session):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        # Arrange
+        login = await _login(ac)
+        hashed_before = password_hasher.completed
+
+        # Act
+        response = await _refresh(ac, login["refresh_token"])
+        me = await ac.get("/users/me", headers={"Authorization": f"Bearer {response.json()['access_token']}"})
+
+    # Assert
+    assert response.status_code == 200
+    data = response.json()
+    assert data["token_type"] == "bearer"
+    assert data["refresh_token"] != login["refresh_token"]
+    assert password_hasher.completed == hashed_before
+    assert me.status_code == 200
+    assert me.json()["email"] == "participant@test.com"
+
+    #only hashes are stored, the first token is marked as rotated
+    stored = await _stored_tokens(db_session)
+    assert [row.token_hash for row in stored] == [hash_refresh_token(login["refresh_token"]), hash_refresh_token(data["refresh_token"])]
+    assert stored[0].rotated_at is not None and stored[1].rotated_at is None
+
+
+@pytest.mark.asyncio
+async def test_refresh_token_reuse_revokes_session(db_session):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        # Arrange
+        login = await _login(ac)
+        other_session = await _login(ac)
+        rotated = (await _refresh(ac, login["refresh_token"])).json()
+
+        # Act
+        replayed = await _refresh(ac, login["refresh_token"])
+        latest = await _refresh(ac, rotated["refresh_token"])
+        other = await _refresh(ac, other_session["refresh_token"])
+
+    # Assert
+    assert replayed.status_code == 401
+    assert replayed.json()["detail"] == "Invalid refresh token"
+    assert latest.status_code == 401
+    assert hash_refresh_token(rotated["refresh_token"]) in revoked_refresh_tokens
+    #sessions opened by other logins are not affected
+    assert other.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_refresh_token_unknown(db_session):
+    # Act
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await _refresh(ac, "not-a-refresh-token")
+
+    # Assert
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Invalid refresh token"
+
+
+@pytest.mark.asyncio
+async def test_refresh_token_expired(db_session):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        # Arrange
+        login = await _login(ac)
+        await db_session.execute(update(RefreshToken).values(expires_at=datetime(2000, 1, 1)))
+        await db_session.commit()
+
+        # Act
+        response = await _refresh(ac, login["refresh_token"])
+
+    # Assert
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_change_password_revokes_refresh_tokens(db_session):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        # Arrange
+        login = await _login(ac)
+        changed = await ac.put(
+            "/users/change-password",
+            json={"password": "newpassword123"},
+            headers={"Authorization": f"Bearer {login['access_token']}"}
+        )
+
+        # Act
+        response = await _refresh(ac, login["refresh_token"])
+
+    # Assert
+    assert changed.status_code == 200
+    assert response.status_code == 401
+    assert all(row.revoked_at is not None for row in await _stored_tokens(db_session))
+
+
+@pytest.mark.asyncio
+async def test_sweep_deletes_expired_refresh_tokens(db_session):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        # Arrange
+        expired = await _login(ac)
+        current = await _login(ac)
+        await db_session.execute(
+            update(RefreshToken)
+            .where(RefreshToken.token_hash == hash_refresh_token(expired["refresh_token"]))
+            .values(expires_at=datetime.now() - timedelta(days=1))
+        )
+        await db_session.commit()
+
+        # Act
+        swept = await sweep_expired_refresh_tokens(db_session)
+        refreshed = await _refresh(ac, current["refresh_token"])
+
+    # Assert
+    assert swept == 1
+    assert refreshed.status_code == 200
+    assert hash_refresh_token(expired["refresh_token"]) not in [row.token_hash for row in await _stored_tokens(db_session)]
+
+
+@pytest.mark.asyncio
+async def test_sweeper_deletes_expired_refresh_tokens(db_session, test_engine, monkeypatch):
+    # Arrange
+    monkeypatch.setattr(RefreshTokens, "sweep_session_factory", sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False))
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        await _login(ac)
+    await db_session.execute(update(RefreshToken).values(expires_at=datetime.now() - timedelta(days=1)))
+    await db_session.commit()
+
+    # Act
+    refresh_token_sweeper.start()
+    for _ in range(50):
+        if not await _stored_tokens(db_session):
+            break
+        await asyncio.sleep(0.05)
+    await refresh_token_sweeper.shutdown()
+
+    # Assert
+    assert await _stored_tokens(db_session) == []
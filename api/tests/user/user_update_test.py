@@ -168,3 +168,34 @@ async def test_update_user_duplicate_email(db_session, admin_token):
     # Assert
     assert response.status_code == 400
     assert response.json()["detail"] == "Email already registered"
+
+
+@pytest.mark.asyncio
+async def test_update_user_organization_revokes_issued_tokens(db_session, admin_token, participant_token):
+    # Arrange
+    org = Organization(name="Test Organization")
+    db_session.add(org)
+    await db_session.flush()
+    await db_session.refresh(org)
+
+    participant = await db_session.execute(select(User).where(User.email == "participant@test.com"))
+    participant = participant.unique().scalars().first()
+
+    update_data = {
+        "email": "participant@test.com",
+        "organization": str(org.name)
+    }
+
+    # Act
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.put(
+            f"/users/{participant.id}",
+            json=update_data,
+            headers={"Authorization": f"Bearer {admin_token}"}
+        )
+        assert response.status_code == 200
+
+        response = await ac.get("/users/me", headers={"Authorization": f"Bearer {participant_token}"})
+
+    # Assert
+    assert response.status_code == 401
@@ -6,6 +6,7 @@ from src.models.UserModel import User
 from src.models.UserFcmTokenModel import UserFcmToken
 from sqlalchemy import select
 import uuid
+from datetime import datetime, timedelta
 
 @pytest.mark.asyncio
 async def test_register_fcm_token_success(db_session, participant_token):
@@ -85,6 +86,31 @@ async def test_register_fcm_token_already_exists(db_session, participant_token):
     tokens = result.unique().scalars().all()
     assert len(tokens) == 1
 
+@pytest.mark.asyncio
+async def test_register_fcm_token_again_refreshes_it(db_session, participant_token):
+    # Arrange
+    participant = await db_session.execute(select(User).where(User.email == "participant@test.com"))
+    participant = participant.unique().scalars().first()
+
+    registered_at = datetime.now() - timedelta(days=90)
+    db_session.add(UserFcmToken(user_id=participant.id, fcm_token="test_fcm_token_123", created_at=registered_at, updated_at=registered_at))
+    await db_session.commit()
+
+    # Act
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post(
+            "/fcm-token",
+            headers={"Authorization": f"Bearer {participant_token}"},
+            json={"fcm_token": "test_fcm_token_123", "user_id": str(participant.id)}
+        )
+
+    # Assert
+    assert response.status_code == 200
+    db_session.expire_all()
+    token = (await db_session.execute(select(UserFcmToken).where(UserFcmToken.fcm_token == "test_fcm_token_123"))).scalars().one()
+    assert token.created_at == registered_at
+    assert token.updated_at > datetime.now() - timedelta(minutes=1)
+
 @pytest.mark.asyncio
 async def test_register_fcm_token_unauthorized(db_session):
     # Arrange
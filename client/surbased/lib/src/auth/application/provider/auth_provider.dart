@@ -57,6 +57,7 @@ class AuthProvider with ChangeNotifier {
           _isLoading = false;
           final prefs = await _prefs;
           prefs.setString('token', _token!);
+          prefs.setString('refresh_token', loginResponse['data']['refresh_token']);
           prefs.setString('email', _user!.email);
           notifyListeners();
           return true;
@@ -294,7 +295,19 @@ class AuthProvider with ChangeNotifier {
 
     try {
       _token = token;
-      final userDataResult = await _authService.getCurrentUser(token);
+      var userDataResult = await _authService.getCurrentUser(token);
+
+      // The access token is short-lived, renew it instead of asking for the password again
+      final refreshToken = prefs.getString('refresh_token');
+      if (!userDataResult['success'] && refreshToken != null) {
+        final refreshResponse = await _authService.refreshToken(refreshToken);
+        if (refreshResponse['success']) {
+          _token = refreshResponse['data']['access_token'];
+          await prefs.setString('token', _token!);
+          await prefs.setString('refresh_token', refreshResponse['data']['refresh_token']);
+          userDataResult = await _authService.getCurrentUser(_token!);
+        }
+      }
 
       if (userDataResult['success']) {
         _user = User.fromJson(userDataResult['data']);
@@ -308,6 +321,7 @@ class AuthProvider with ChangeNotifier {
         _isAuthenticated = false;
         _isLoading = false;
         await prefs.remove('token');
+        await prefs.remove('refresh_token');
         await prefs.remove('email');
         notifyListeners();
         return false;
@@ -317,6 +331,7 @@ class AuthProvider with ChangeNotifier {
       _isAuthenticated = false;
       _isLoading = false;
       await prefs.remove('token');
+      await prefs.remove('refresh_token');
       await prefs.remove('email');
       notifyListeners();
       return false;
@@ -1,6 +1,7 @@
 import 'dart:convert';
 
 import 'package:http/http.dart' as http;
+import 'package:surbased/src/shared/infrastructure/paged_request.dart';
 
 class AuthService {
   final _baseUrl = 'http://10.0.2.2:8000/users';
@@ -77,6 +78,34 @@ class AuthService {
     }
   }
 
+  Future<Map<String, dynamic>> refreshToken(String refreshToken) async {
+    try {
+      final response = await http.post(
+        Uri.parse('$_baseUrl/token/refresh'),
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: json.encode({
+          'refresh_token': refreshToken,
+        }),
+      );
+
+      if (response.statusCode == 200) {
+        return {
+          'success': true,
+          'data': json.decode(utf8.decode(response.bodyBytes)),
+        };
+      } else {
+        return {
+          'success': false,
+          'data': json.decode(utf8.decode(response.bodyBytes))['detail']
+        };
+      }
+    } catch (e) {
+      return {'success': false, 'data': e.toString()};
+    }
+  }
+
   Future<Map<String, dynamic>> getCurrentUser(String token) async {
     try {
       final response = await http.get(
@@ -241,29 +270,9 @@ class AuthService {
 
   Future<Map<String, dynamic>> getSurveysAssignedToUser(
       String userId, String token, {String? category}) async {
-    try {
-      final existingCategory = category != null ? '?category=$category' : '';
-      final response = await http.get(
-          Uri.parse('$_baseUrl/$userId/surveys$existingCategory'),
-          headers: {
-            'Authorization': 'Bearer $token',
-            'Content-Type': 'application/json',
-          });
-
-      if (response.statusCode == 200) {
-        return {
-          'success': true,
-          'data': json.decode(utf8.decode(response.bodyBytes)),
-        };
-      } else {
-        return {
-          'success': false,
-          'data': json.decode(utf8.decode(response.bodyBytes))['detail']
-        };
-      }
-    } catch (e) {
-      return {'success': false, 'data': e.toString()};
-    }
+    final existingCategory = category != null ? '?category=$category' : '';
+    return getAllPages(
+        Uri.parse('$_baseUrl/$userId/surveys$existingCategory'), token, ['surveys']);
   }
 
   Future<Map<String, dynamic>> acceptSurveyAssignment(String userId, String surveyId, String token) async {
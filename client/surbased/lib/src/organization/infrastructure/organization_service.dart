@@ -1,6 +1,7 @@
 import 'dart:convert';
 
 import 'package:http/http.dart' as http;
+import 'package:surbased/src/shared/infrastructure/paged_request.dart';
 
 class OrganizationService {
   final String _baseUrl = 'http://10.0.2.2:8000/organizations';
@@ -89,57 +90,17 @@ class OrganizationService {
   Future<Map<String, dynamic>> getUsersInCurrentOrganization(
       String token, String organizationId,
       {String? sortBy, String? order}) async {
-    try {
-      String sortByExists = sortBy != null ? '?sortBy=$sortBy' : '';
-      String orderExists = order != null ? '&order=$order' : '';
-      final response = await http.get(
-        Uri.parse('$_baseUrl/$organizationId/users$sortByExists$orderExists'),
-        headers: {
-          'Authorization': 'Bearer $token',
-          'Content-Type': 'application/json'
-        },
-      );
-
-      if (response.statusCode == 200) {
-        return {
-          'success': true,
-          'data': json.decode(utf8.decode(response.bodyBytes)),
-        };
-      } else {
-        return {
-          'success': false,
-          'data': json.decode(utf8.decode(response.bodyBytes))['detail']
-        };
-      }
-    } catch (e) {
-      return {'success': false, 'data': e.toString()};
-    }
+    String sortByExists = sortBy != null ? '?sortBy=$sortBy' : '';
+    String orderExists = order != null ? '&order=$order' : '';
+    return getAllPages(
+        Uri.parse('$_baseUrl/$organizationId/users$sortByExists$orderExists'), token, ['users']);
   }
 
   Future<Map<String, dynamic>> getSurveysInOrganization(
       String orgId, String token, {String? category}) async {
-    try {
-      final existingCategory = category != null ? '&category=$category' : '';
-      final response = await http
-          .get(Uri.parse('$_baseUrl/$orgId/surveys$existingCategory'), headers: {
-        'Authorization': 'Bearer $token',
-        'Content-Type': 'application/json',
-      });
-
-      if (response.statusCode == 200) {
-        return {
-          'success': true,
-          'data': json.decode(utf8.decode(response.bodyBytes)),
-        };
-      } else {
-        return {
-          'success': false,
-          'data': json.decode(utf8.decode(response.bodyBytes))['detail']
-        };
-      }
-    } catch (e) {
-      return {'success': false, 'data': e.toString()};
-    }
+    final existingCategory = category != null ? '&category=$category' : '';
+    return getAllPages(
+        Uri.parse('$_baseUrl/$orgId/surveys$existingCategory'), token, ['surveys']);
   }
 
   Future<Map<String, dynamic>> updateOrganization(
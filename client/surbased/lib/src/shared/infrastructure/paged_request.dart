@@ -0,0 +1,40 @@
+import 'dart:convert';
+
+import 'package:http/http.dart' as http;
+
+// los listados de la API se devuelven por páginas: se siguen los next_cursor
+// hasta la última y se juntan las listas indicadas en `keys`
+Future<Map<String, dynamic>> getAllPages(
+    Uri uri, String token, List<String> keys) async {
+  try {
+    final Map<String, dynamic> data = {for (final key in keys) key: <dynamic>[]};
+    String? cursor;
+
+    do {
+      final response = await http.get(
+        cursor != null
+            ? uri.replace(
+                queryParameters: {...uri.queryParameters, 'cursor': cursor})
+            : uri,
+        headers: {
+          'Authorization': 'Bearer $token',
+          'Content-Type': 'application/json',
+        },
+      );
+
+      final page = json.decode(utf8.decode(response.bodyBytes));
+      if (response.statusCode != 200) {
+        return {'success': false, 'data': page['detail']};
+      }
+
+      for (final key in keys) {
+        (data[key] as List<dynamic>).addAll(page[key] as List<dynamic>);
+      }
+      cursor = page['next_cursor'];
+    } while (cursor != null);
+
+    return {'success': true, 'data': data};
+  } catch (e) {
+    return {'success': false, 'data': e.toString()};
+  }
+}
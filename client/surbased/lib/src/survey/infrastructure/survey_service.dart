@@ -1,6 +1,7 @@
 import 'dart:convert';
 
 import 'package:http/http.dart' as http;
+import 'package:surbased/src/shared/infrastructure/paged_request.dart';
 import 'package:surbased/src/survey/domain/answer_model.dart';
 import 'package:flutter_downloader/flutter_downloader.dart';
 
@@ -66,27 +67,8 @@ class SurveyService {
   }
 
   Future<Map<String, dynamic>> getSurveysByScope(String scope, String token) async {
-    try {
-      final scopeQuery = '?scope=$scope';
-      final response = await http
-          .get(Uri.parse('$_baseUrl/surveys/$scopeQuery'), headers: {
-        'Authorization': 'Bearer $token',
-        'Content-Type': 'application/json',
-      });
-      if (response.statusCode == 200) {
-        return {
-          'success': true,
-          'data': json.decode(utf8.decode(response.bodyBytes)),
-        };
-      } else {
-        return {
-          'success': false,
-          'data': json.decode(utf8.decode(response.bodyBytes))['detail']
-        };
-      }
-    } catch (e) {
-      return {'success': false, 'data': e.toString()};
-    }
+    return getAllPages(
+        Uri.parse('$_baseUrl/surveys/?scope=$scope'), token, ['surveys']);
   }
 
 
@@ -115,57 +97,17 @@ class SurveyService {
   }
 
   Future<Map<String, dynamic>> getSurveysByOwner(String ownerId, String token, {bool? includeFinished}) async {
-    try {
-      final existsIncludeFinished = includeFinished != null ? '?includeFinished=$includeFinished' : '';
-      final response = await http
-          .get(Uri.parse('$_baseUrl/surveys/owner/$ownerId$existsIncludeFinished'), headers: {
-        'Authorization': 'Bearer $token',
-        'Content-Type': 'application/json',
-      });
-
-      if (response.statusCode == 200) {
-        return {
-          'success': true,
-          'data': json.decode(utf8.decode(response.bodyBytes)),
-        };
-      } else {
-        return {
-          'success': false,
-          'data': json.decode(utf8.decode(response.bodyBytes))['detail']
-        };
-      }
-    } catch (e) {
-      return {'success': false, 'data': e.toString()};
-    }
+    final existsIncludeFinished = includeFinished != null ? '?includeFinished=$includeFinished' : '';
+    return getAllPages(
+        Uri.parse('$_baseUrl/surveys/owner/$ownerId$existsIncludeFinished'), token, ['surveys']);
   }
 
   
 
   Future<Map<String, dynamic>> getUsersAssignedToSurvey(
       String surveyId, String token) async {
-    try {
-      final response = await http.get(
-        Uri.parse('$_baseUrl/surveys/$surveyId/users'),
-        headers: {
-          'Authorization': 'Bearer $token',
-          'Content-Type': 'application/json',
-        },
-      );
-
-      if (response.statusCode == 200) {
-        return {
-          'success': true,
-          'data': json.decode(utf8.decode(response.bodyBytes)),
-        };
-      } else {
-        return {
-          'success': false,
-          'data': json.decode(utf8.decode(response.bodyBytes))['detail']
-        };
-      }
-    } catch (e) {
-      return {'success': false, 'data': e.toString()};
-    }
+    return getAllPages(
+        Uri.parse('$_baseUrl/surveys/$surveyId/users'), token, ['users', 'pending_assignments']);
   }
   
   Future<Map<String, dynamic>> registerSurveyAnswers(
@@ -222,25 +164,37 @@ class SurveyService {
 
   Future<Map<String, dynamic>> getSurveyAnswers(String surveyId, String token) async {
     try {
-      final response = await http.get(
-        Uri.parse('$_baseUrl/surveys/$surveyId/answers'),
-        headers: {
-          'Authorization': 'Bearer $token',
-          'Content-Type': 'application/json',
-        },
-      );
+      // las respuestas se paginan por encuestado, se piden todas las páginas
+      final List<dynamic> answers = [];
+      String? cursor;
+
+      do {
+        final response = await http.get(
+          Uri.parse('$_baseUrl/surveys/$surveyId/answers').replace(
+            queryParameters: cursor != null ? {'cursor': cursor} : null,
+          ),
+          headers: {
+            'Authorization': 'Bearer $token',
+            'Content-Type': 'application/json',
+          },
+        );
+
+        final data = json.decode(utf8.decode(response.bodyBytes));
+        if (response.statusCode != 200) {
+          return {
+            'success': false,
+            'data': data['detail']
+          };
+        }
+
+        answers.addAll(data['answers'] as List<dynamic>);
+        cursor = data['next_cursor'];
+      } while (cursor != null);
 
-      if (response.statusCode == 200) {
-        return {
-          'success': true,
-          'data': json.decode(utf8.decode(response.bodyBytes)),
-        };
-      } else {
-        return {
-          'success': false,
-          'data': json.decode(utf8.decode(response.bodyBytes))['detail']
-        };
-      }
+      return {
+        'success': true,
+        'data': {'answers': answers},
+      };
     } catch (e) {
       return {'success': false, 'data': e.toString()};
     }
@@ -1,32 +1,11 @@
-import 'dart:convert';
-
-import 'package:http/http.dart' as http;
+import 'package:surbased/src/shared/infrastructure/paged_request.dart';
 
 class TagService {
   final String _baseUrl = 'http://10.0.2.2:8000';
 
   Future<Map<String, dynamic>> getTags(String token) async {
-    try {
-      final response = await http
-          .get(Uri.parse('$_baseUrl/tags'), headers: {
-        'Authorization': 'Bearer $token',
-        'Content-Type': 'application/json',
-      });
-
-      if (response.statusCode == 200) {
-        return {
-          'success': true,
-          'data': json.decode(utf8.decode(response.bodyBytes)),
-        };
-      } else {
-        return {
-          'success': false,
-          'data': json.decode(utf8.decode(response.bodyBytes))['detail']
-        };
-      }
-    } catch (e) {
-      return {'success': false, 'data': e.toString()};
-    }
+    return getAllPages(
+        Uri.parse('$_baseUrl/tags'), token, ['tags']);
   }
 
   
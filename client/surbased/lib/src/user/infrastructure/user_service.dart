@@ -1,6 +1,7 @@
 import 'dart:convert';
 
 import 'package:http/http.dart' as http;
+import 'package:surbased/src/shared/infrastructure/paged_request.dart';
 
 class UserService {
   final String _baseUrl = 'http://10.0.2.2:8000/users';
@@ -45,30 +46,9 @@ class UserService {
   
   Future<Map<String, dynamic>> getUsers(
       String token, String? org, String? role) async {
-    try {
-      final existingOrg = org != null ? '?organization=$org' : '';
-      final existingRole = role != null ? '?role=$role' : '';
-      final response = await http.get(
-        Uri.parse('$_baseUrl$existingOrg$existingRole'),
-        headers: {
-          'Authorization': 'Bearer $token',
-          'Content-Type': 'application/json',
-        },
-      );
-
-      if (response.statusCode == 200) {
-        return {
-          'success': true,
-          'data': json.decode(utf8.decode(response.bodyBytes)),
-        };
-      } else {
-        return {
-          'success': false,
-          'data': json.decode(utf8.decode(response.bodyBytes))['detail']
-        };
-      }
-    } catch (e) {
-      return {'success': false, 'data': e.toString()};
-    }
+    final existingOrg = org != null ? '?organization=$org' : '';
+    final existingRole = role != null ? '?role=$role' : '';
+    return getAllPages(
+        Uri.parse('$_baseUrl$existingOrg$existingRole'), token, ['users']);
   }
 }